@@ -2,28 +2,55 @@
 Security Insights Center - Enhanced Modular Application
 Includes: Custom Chart Builder, Click-to-Drill, All Original Features
 """
+import importlib.util
 import dash
 from dash import dcc, html
 from src.layouts.main_layout import create_layout
 from src.callbacks import register_all_callbacks
-from config.settings import DEBUG, PORT, HOST
+from config.settings import DEBUG, PORT, HOST, COMPRESS_RESPONSES, TRANSPORT_METRICS, WATCH_DATA
 from src.utils.logger import setup_logger
+from src.utils.transport import register_transport_metrics
+from src.data.export import register_export_routes
+from src.data.changes import register_change_stream
+from src.data.loader import register_dataset_pinning
+from src.data.watcher import register_data_watcher
+from src.data.storage import build_storage_backend
+from src.layouts.snapshot import get_default_view
 
 # Setup logging
 logger = setup_logger()
 
+# Response compression needs the optional Flask-Compress package
+compress = COMPRESS_RESPONSES and importlib.util.find_spec("flask_compress") is not None
+if COMPRESS_RESPONSES and not compress:
+    logger.warning("Flask-Compress is not installed; responses will not be compressed")
+
 # Initialize Dash app
 app = dash.Dash(
     __name__,
     suppress_callback_exceptions=True,
+    compress=compress,
     meta_tags=[{"name": "viewport", "content": "width=device-width, initial-scale=1"}]
 )
 
 app.title = "Security Insights Center"
 server = app.server
+register_dataset_pinning(server)
+if TRANSPORT_METRICS:
+    register_transport_metrics(server)
+register_export_routes(server)
+register_change_stream(server)
 
-# Set layout
-app.layout = create_layout()
+# Set layout; served per page load so it embeds the current default-view snapshot
+app.layout = create_layout
+# Build the snapshot and the storage backend now rather than on the first
+# visitor's request
+create_layout()
+build_storage_backend()
+# Reload when a data file changes; the new snapshot is built before the new
+# data is installed. The watcher starts in the process serving requests.
+if WATCH_DATA:
+    register_data_watcher(server, on_reload=get_default_view)
 
 # Register all callbacks
 register_all_callbacks(app)
@@ -0,0 +1,27 @@
+// Subscribe to dataset change events and hand each one to Dash.
+// The event is stashed on window and the hidden #data-change-signal button
+// is clicked; a clientside callback then copies it into the data-change store.
+(function () {
+    if (!window.EventSource) { return; }
+    var version = null;
+    function connect() {
+        var signal = document.getElementById("data-change-signal");
+        if (!signal) { setTimeout(connect, 250); return; }
+        if (version === null) { version = signal.getAttribute("data-version") || ""; }
+        var source = new EventSource("/events/data-changes?version=" + encodeURIComponent(version));
+        source.addEventListener("data-change", function (event) {
+            version = event.lastEventId || version;
+            window.__dataChange = JSON.parse(event.data);
+            var current = document.getElementById("data-change-signal");
+            if (current) { current.click(); }
+        });
+        // Streams that end are reopened by the browser; a refused one (the
+        // server is at its stream limit) is closed for good, so retry later
+        source.onerror = function () {
+            if (source.readyState === EventSource.CLOSED) {
+                setTimeout(connect, 20000 + Math.random() * 20000);
+            }
+        };
+    }
+    connect();
+})();
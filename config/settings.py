@@ -2,6 +2,7 @@
 Application configuration and environment settings
 """
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -13,16 +14,63 @@ PORT = int(os.getenv("PORT", 8050))
 
 # Data settings
 DATA_PATH = os.getenv("DATA_PATH", "data/security_findings_unified.csv")
+DATA_SHARD_DIRS = [d for d in os.getenv("DATA_SHARD_DIRS", "").split(",") if d]  # directories whose *.csv files extend DATA_PATH
+INCREMENTAL_INGEST = os.getenv("INCREMENTAL_INGEST", "True") == "True"  # keep parsed files to re-read only what changed
 CACHE_TIMEOUT = int(os.getenv("CACHE_TIMEOUT", 300))  # 5 minutes
+LOAD_CHUNK_ROWS = int(os.getenv("LOAD_CHUNK_ROWS", 500000))
+QUARANTINE_PATH = os.getenv("QUARANTINE_PATH", "")  # optional CSV of rejected rows
+URL_STORE_DIR = os.getenv("URL_STORE_DIR", os.path.join(tempfile.gettempdir(), "security-insights-urls"))
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "pandas")  # "pandas", "sqlite" or "partitioned"
+SQLITE_PATH = os.getenv("SQLITE_PATH", os.path.join(tempfile.gettempdir(), "security-insights.sqlite"))
+PARTITION_DIR = os.getenv("PARTITION_DIR", os.path.join(tempfile.gettempdir(), "security-insights-partitions"))
+PARTITION_HOT_MONTHS = int(os.getenv("PARTITION_HOT_MONTHS", 3))  # newest months kept in memory
+PARTITION_CACHE_SIZE = int(os.getenv("PARTITION_CACHE_SIZE", 6))  # older months cached after a read
+
+# Deduplication settings
+DEDUP_CROSS_SOURCE = os.getenv("DEDUP_CROSS_SOURCE", "True") == "True"  # link (never drop) cross-tool matches
+CORRELATION_WINDOW_HOURS = float(os.getenv("CORRELATION_WINDOW_HOURS", 24))
+
+# Large-data chart rendering
+LARGE_CHART_POINT_THRESHOLD = int(os.getenv("LARGE_CHART_POINT_THRESHOLD", 5000))
+DOWNSAMPLE_TARGET_POINTS = int(os.getenv("DOWNSAMPLE_TARGET_POINTS", 2000))
+CUSTOM_CHART_CACHE_SIZE = int(os.getenv("CUSTOM_CHART_CACHE_SIZE", 256))
+MTTR_SKETCH_ACCURACY = float(os.getenv("MTTR_SKETCH_ACCURACY", 0.02))  # relative error of MTTR percentiles
+HLL_PRECISION = int(os.getenv("HLL_PRECISION", 12))  # 2^p registers, ~1.04/sqrt(2^p) error
+FIGURE_WORKERS = int(os.getenv("FIGURE_WORKERS", min(4, os.cpu_count() or 1)))  # 0 = inline, no timeouts
+FIGURE_TIMEOUT_SECONDS = float(os.getenv("FIGURE_TIMEOUT_SECONDS", 20))  # per figure build, before it degrades
+
+# Chart builder preview
+PREVIEW_DEBOUNCE_MS = int(os.getenv("PREVIEW_DEBOUNCE_MS", 400))
+PREVIEW_SAMPLE_ROWS = int(os.getenv("PREVIEW_SAMPLE_ROWS", 50000))
+
+# Response transport
+COMPRESS_RESPONSES = os.getenv("COMPRESS_RESPONSES", "True") == "True"  # gzip/brotli via Flask-Compress
+TRANSPORT_METRICS = os.getenv("TRANSPORT_METRICS", "False") == "True"  # log callback payload sizes
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", 50000))  # rows scanned per streamed export chunk
+
+# Request coalescing: identical concurrent dashboard queries share one computation
+COALESCE_REQUESTS = os.getenv("COALESCE_REQUESTS", "True") == "True"
+COALESCE_DIR = os.getenv("COALESCE_DIR", "")  # lock/result files shared by workers; empty = per process
+COALESCE_WAIT_SECONDS = float(os.getenv("COALESCE_WAIT_SECONDS", 30))  # wait on another worker, then compute
+COALESCE_TTL_SECONDS = float(os.getenv("COALESCE_TTL_SECONDS", 2))  # reuse of another worker's result
 
 # Security settings
 ENABLE_AUTH = os.getenv("ENABLE_AUTH", "False") == "True"
 SECRET_KEY = os.getenv("SECRET_KEY", "change-me-in-production")
 
-# Refresh settings
+# Refresh settings: data changes are pushed; only SLA ages are refreshed on a timer
 AUTO_REFRESH_INTERVAL = int(os.getenv("AUTO_REFRESH_INTERVAL", 300000))  # 5 min in ms
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", 25))  # comment lines on idle event streams
+SSE_MAX_STREAMS = int(os.getenv("SSE_MAX_STREAMS", 100))  # open event streams per worker; more get 503
+SSE_STREAM_SECONDS = float(os.getenv("SSE_STREAM_SECONDS", 300))  # stream lifetime; browsers then reconnect
+WATCH_DATA = os.getenv("WATCH_DATA", "True") == "True"  # reload when DATA_PATH or a shard file changes
+WATCH_DEBOUNCE_SECONDS = float(os.getenv("WATCH_DEBOUNCE_SECONDS", 1))  # quiet time before a changed file is read
+WATCH_POLL_SECONDS = float(os.getenv("WATCH_POLL_SECONDS", 2))  # stat interval when inotify is unavailable
 
 # SLA Configuration
 SLA_HOURS_CRITICAL = int(os.getenv("SLA_HOURS_CRITICAL", 24))
 SLA_HOURS_HIGH = int(os.getenv("SLA_HOURS_HIGH", 72))
 SLA_HOURS_MEDIUM = int(os.getenv("SLA_HOURS_MEDIUM", 168))
+SLA_HOURS_LOW = int(os.getenv("SLA_HOURS_LOW", 720))
+SLA_WARNING_HOURS = int(os.getenv("SLA_WARNING_HOURS", 24))  # "breaching soon" horizon
+SLA_TOP_K = int(os.getenv("SLA_TOP_K", 10))
@@ -2,13 +2,157 @@
 Custom Chart Builder Callbacks
 Handles preview, adding custom charts, and toggle functionality
 """
-from dash import Input, Output, State, callback_context
+from dash import Input, Output, State, ALL, Patch, callback_context
 from dash.exceptions import PreventUpdate
 from dash import dcc, html
 import dash
-from src.data.loader import load_security_data, get_filtered_data
+from plotly import graph_objects as go
+from src.data.loader import (
+    load_security_data,
+    load_sample_data,
+    get_filtered_data,
+    get_data_version,
+    get_filter_signature,
+    get_time_window
+)
+from src.data.cube import get_selections
+from src.data.dedup import counted_findings
+from src.data.changes import is_affected
 from src.components.charts import create_custom_chart
+from src.data.aggregations import AGGREGATIONS
+from src.data.storage import StoragePlan, get_storage_backend
+from src.data.downsampling import parse_axis_range
+from src.utils.cache import LRUCache
 from src.utils.logger import logger
+from config.settings import LARGE_CHART_POINT_THRESHOLD, CUSTOM_CHART_CACHE_SIZE
+
+# Rendered custom chart figures keyed by _chart_cache_key
+_figure_cache = LRUCache(maxsize=CUSTOM_CHART_CACHE_SIZE)
+
+# Latest preview request sequence number per browser tab token
+_preview_requests = LRUCache(maxsize=1024)
+
+def _y_label(y_col, chart_type, agg):
+    """Y-axis description including the aggregate when one is applied"""
+    if y_col != "count" and chart_type in ("bar", "line"):
+        return f"{AGGREGATIONS.get(agg, agg)} of {y_col}"
+    return y_col
+
+def _message_figure(title):
+    """Empty themed figure carrying a message in its title"""
+    fig = go.Figure()
+    fig.update_layout(
+        title=title,
+        paper_bgcolor="#0E0F14",
+        plot_bgcolor="#0E0F14",
+        font_color="#E5E5F0"
+    )
+    return fig
+
+def _chart_cache_key(chart_cfg, data_version, filter_signature):
+    """Cache key for one custom chart under one dataset and filter state"""
+    return (data_version, filter_signature, chart_cfg["type"], chart_cfg["x"],
+            chart_cfg["y"], chart_cfg.get("color"), chart_cfg.get("agg", "sum"),
+            chart_cfg["title"])
+
+def _render_custom_figures(charts_config, source_val, severity_val, status_val,
+                           team_val, repo_val, start_date=None, end_date=None):
+    """
+    Build figures for several custom charts from one filtered frame
+
+    Figures are cached by chart config + filter signature + data version.
+    Cache misses are planned together on the storage backend, so counts and
+    aggregates are computed there and shared by charts grouping by the same
+    columns.
+
+    Returns:
+        list: One figure per config, in order
+    """
+    signature = get_filter_signature(source_val, severity_val, status_val, team_val, repo_val,
+                                     start_date, end_date)
+    version = get_data_version()
+    keys = [_chart_cache_key(cfg, version, signature) for cfg in charts_config]
+    figures = [_figure_cache.get(key) for key in keys]
+
+    missing = [i for i, fig in enumerate(figures) if fig is None]
+    if missing:
+        rows = None
+        if start_date or end_date:
+            rows = get_time_window(load_security_data(), start_date, end_date)
+        plan = StoragePlan(get_storage_backend(),
+                           get_selections(source_val, severity_val, status_val, team_val, repo_val),
+                           rows)
+        for i in missing:
+            chart_cfg = charts_config[i]
+            try:
+                fig = create_custom_chart(
+                    None,
+                    chart_cfg["x"],
+                    chart_cfg["y"],
+                    chart_cfg["type"],
+                    chart_cfg.get("color"),
+                    chart_cfg.get("agg", "sum"),
+                    plan=plan
+                )
+                fig.update_layout(
+                    title=chart_cfg["title"],
+                    height=350
+                )
+                _figure_cache.set(keys[i], fig)
+            except Exception as e:
+                logger.error(f"Error rendering custom chart {chart_cfg['id']}: {e}")
+                fig = _message_figure(f"Error: {str(e)}")
+            figures[i] = fig
+    logger.debug(f"Custom charts: {len(charts_config) - len(missing)} cached, {len(missing)} rendered")
+    return figures
+
+def _is_superseded(request):
+    """Whether a newer preview request has arrived from the same browser tab"""
+    return _preview_requests.get(request["token"], request["seq"]) != request["seq"]
+
+def _build_preview_figure(df, request):
+    """Filter df with the request's filters and draw the requested chart"""
+    chart_type, x_col, y_col = request["chart_type"], request["x"], request["y"]
+    filtered = counted_findings(get_filtered_data(df, *request["filters"]))
+    fig = create_custom_chart(filtered, x_col, y_col, chart_type,
+                              request["color"], request["agg"])
+    fig.update_layout(title=f"{chart_type.title()} Chart: {x_col} vs {_y_label(y_col, chart_type, request['agg'])}")
+    return fig
+
+def _create_custom_chart_card(chart_cfg, fig):
+    """Card wrapping one custom chart with its remove button"""
+    return html.Div([
+        html.Div([
+            html.Span(f"Chart {chart_cfg['id']}",
+                      style={"fontWeight": "600", "marginRight": "12px"}),
+            html.Button(
+                "✕",
+                id={"type": "remove-chart", "index": chart_cfg["id"]},
+                n_clicks=0,
+                title="Remove this chart",
+                style={
+                    "padding": "2px 8px",
+                    "backgroundColor": "#EF4444",
+                    "color": "white",
+                    "border": "none",
+                    "borderRadius": "3px",
+                    "cursor": "pointer",
+                    "fontSize": "12px",
+                    "float": "right"
+                }
+            )
+        ], style={"marginBottom": "8px"}),
+        dcc.Graph(id={"type": "custom-chart", "index": chart_cfg["id"]},
+                  figure=fig, config={"displayModeBar": False})
+    ], style={
+        "flex": "1 1 calc(50% - 16px)",
+        "minWidth": "400px",
+        "marginBottom": "16px",
+        "padding": "12px",
+        "backgroundColor": "#0E0F14",
+        "borderRadius": "6px",
+        "border": "1px solid #5E5CE6"
+    })
 
 def register_builder_callbacks(app):
     """Register all chart builder related callbacks"""
@@ -51,57 +195,139 @@ def register_builder_callbacks(app):
                 {"flex": "1", "marginRight": "24px", "transition": "all 0.3s ease"}
             )
    
-    # Preview chart in builder
-    @app.callback(
-        Output("builder-preview-chart", "figure"),
+    # Coalesce builder/filter changes into one pending preview request (client-side)
+    app.clientside_callback(
+        """
+        function(n_clicks, chart_type, x_col, y_col, color_col, agg,
+                 source_val, severity_val, status_val, team_val, repo_val,
+                 start_date, end_date) {
+            window.sicPreview = window.sicPreview || {
+                token: Math.random().toString(36).slice(2), seq: 0
+            };
+            window.sicPreview.seq += 1;
+            var request = {
+                token: window.sicPreview.token, seq: window.sicPreview.seq,
+                chart_type: chart_type, x: x_col, y: y_col, color: color_col, agg: agg,
+                filters: [source_val, severity_val, status_val, team_val, repo_val,
+                          start_date, end_date]
+            };
+            return [request, 0, false];
+        }
+        """,
+        [Output("builder-preview-request", "data"),
+         Output("builder-preview-debounce", "n_intervals"),
+         Output("builder-preview-debounce", "disabled")],
         [Input("preview-chart-btn", "n_clicks"),
          Input("builder-chart-type", "value"),
          Input("builder-x-axis", "value"),
          Input("builder-y-axis", "value"),
          Input("builder-color", "value"),
+         Input("builder-agg", "value"),
          Input("source-filter", "value"),
          Input("severity-filter", "value"),
          Input("status-filter", "value"),
          Input("team-filter", "value"),
-         Input("repo-filter", "value")]
+         Input("repo-filter", "value"),
+         Input("date-range", "start_date"),
+         Input("date-range", "end_date")]
     )
-    def preview_custom_chart(n_clicks, chart_type, x_col, y_col, color_col,
-                            source_val, severity_val, status_val, team_val, repo_val):
-        """Generate preview of custom chart"""
+
+    # Preview chart in builder: first pass on a sample once the inputs settle
+    @app.callback(
+        [Output("builder-preview-chart", "figure"),
+         Output("builder-preview-full-request", "data"),
+         Output("builder-preview-status", "children")],
+        [Input("builder-preview-debounce", "n_intervals")],
+        [State("builder-preview-request", "data")],
+        prevent_initial_call=True
+    )
+    def preview_custom_chart(n_intervals, request):
+        """Generate preview of custom chart, from a sample on large datasets"""
+        if not n_intervals or not request:
+            raise PreventUpdate
+        _preview_requests.set(request["token"], request["seq"])
         try:
-            if not x_col or not y_col:
-                from plotly import graph_objects as go
-                fig = go.Figure()
-                fig.update_layout(
-                    title="Select X and Y axes to preview",
-                    paper_bgcolor="#0E0F14",
-                    plot_bgcolor="#0E0F14",
-                    font_color="#E5E5F0"
-                )
-                return fig
+            if not request["x"] or not request["y"]:
+                return _message_figure("Select X and Y axes to preview"), dash.no_update, ""
             
-            # Load and filter data
-            df = load_security_data()
-            filtered = get_filtered_data(df, source_val, severity_val, 
-                                        status_val, team_val, repo_val)
+            sample = load_sample_data()
+            total = len(load_security_data())
+            if len(sample) >= total:
+                return _build_preview_figure(load_security_data(), request), dash.no_update, ""
             
-            # Create custom chart
-            fig = create_custom_chart(filtered, x_col, y_col, chart_type, color_col)
-            fig.update_layout(title=f"{chart_type.title()} Chart: {x_col} vs {y_col}")
-            
-            return fig
+            pct = 100 * len(sample) / total
+            fig = _build_preview_figure(sample, request)
+            fig.update_layout(title=f"{fig.layout.title.text} (preview on {pct:.0f}% sample)")
+            if _is_superseded(request):
+                raise PreventUpdate
+            return fig, request, f"Preview on {pct:.0f}% sample, loading full result..."
             
+        except PreventUpdate:
+            raise
         except Exception as e:
             logger.error(f"Error creating preview chart: {e}")
-            from plotly import graph_objects as go
-            fig = go.Figure()
-            fig.update_layout(
-                title=f"Error: {str(e)}",
-                paper_bgcolor="#0E0F14",
-                plot_bgcolor="#0E0F14",
-                font_color="#E5E5F0"
-            )
-            return fig
+            return _message_figure(f"Error: {str(e)}"), dash.no_update, ""
+    
+    # Second pass: replace the sampled preview with the full result
+    @app.callback(
+        [Output("builder-preview-chart", "figure", allow_duplicate=True),
+         Output("builder-preview-status", "children", allow_duplicate=True)],
+        [Input("builder-preview-full-request", "data")],
+        prevent_initial_call=True
+    )
+    def complete_custom_chart_preview(request):
+        """Render the preview over all filtered findings unless superseded"""
+        if not request or _is_superseded(request):
+            raise PreventUpdate
+        try:
+            fig = _build_preview_figure(load_security_data(), request)
+            if _is_superseded(request):
+                raise PreventUpdate
+            return fig, ""
+        except PreventUpdate:
+            raise
+        except Exception as e:
+            logger.error(f"Error creating preview chart: {e}")
+            return _message_figure(f"Error: {str(e)}"), ""
+    
+    # Zoom to load more detail on a downsampled scatter preview
+    @app.callback(
+        Output("builder-preview-chart", "figure", allow_duplicate=True),
+        [Input("builder-preview-chart", "relayoutData")],
+        [State("builder-chart-type", "value"),
+         State("builder-x-axis", "value"),
+         State("builder-y-axis", "value"),
+         State("builder-color", "value"),
+         State("source-filter", "value"),
+         State("severity-filter", "value"),
+         State("status-filter", "value"),
+         State("team-filter", "value"),
+         State("repo-filter", "value"),
+         State("date-range", "start_date"),
+         State("date-range", "end_date")],
+        prevent_initial_call=True
+    )
+    def refine_preview_chart(relayout_data, chart_type, x_col, y_col, color_col,
+                             source_val, severity_val, status_val, team_val, repo_val,
+                             start_date, end_date):
+        """Re-sample a large scatter preview for the visible window"""
+        if chart_type != "scatter" or not relayout_data:
+            raise PreventUpdate
+        if not any(key.startswith(("xaxis.", "yaxis.")) for key in relayout_data):
+            raise PreventUpdate
+        
+        df = load_security_data()
+        filtered = counted_findings(get_filtered_data(df, source_val, severity_val, status_val,
+                                                      team_val, repo_val, start_date, end_date))
+        # Small scatters are sent in full, the browser already has every point
+        if len(filtered) <= LARGE_CHART_POINT_THRESHOLD:
+            raise PreventUpdate
+        
+        fig = create_custom_chart(filtered, x_col, y_col, chart_type, color_col,
+                                  x_range=parse_axis_range(relayout_data, "xaxis"),
+                                  y_range=parse_axis_range(relayout_data, "yaxis"))
+        fig.update_layout(title=f"{chart_type.title()} Chart: {x_col} vs {y_col}")
+        return fig
     
     # Add custom chart to the custom charts tab
     @app.callback(
@@ -111,9 +337,10 @@ def register_builder_callbacks(app):
          State("builder-x-axis", "value"),
          State("builder-y-axis", "value"),
          State("builder-color", "value"),
+         State("builder-agg", "value"),
          State("custom-charts-store", "data")]
     )
-    def add_custom_chart(n_clicks, chart_type, x_col, y_col, color_col, current_charts):
+    def add_custom_chart(n_clicks, chart_type, x_col, y_col, color_col, agg, current_charts):
         """Add a new custom chart to the store"""
         if not n_clicks or n_clicks == 0:
             raise PreventUpdate
@@ -128,7 +355,8 @@ def register_builder_callbacks(app):
             "x": x_col,
             "y": y_col,
             "color": color_col if color_col != "None" else None,
-            "title": f"{chart_type.title()}: {x_col} vs {y_col}"
+            "agg": agg,
+            "title": f"{chart_type.title()}: {x_col} vs {_y_label(y_col, chart_type, agg)}"
         }
         
         current_charts.append(chart_config)
@@ -136,102 +364,101 @@ def register_builder_callbacks(app):
         
         return current_charts
     
-    # Render custom charts inline in Row 4
-
+    # Render custom charts inline in Row 4: only newly added charts are built here
     @app.callback(
-            Output("custom-charts-container-inline", "children"),
-            [Input("custom-charts-store", "data"),
-             Input("source-filter", "value"),
-             Input("severity-filter", "value"),
-             Input("status-filter", "value"),
-             Input("team-filter", "value"),
-             Input("repo-filter", "value")]
-        )
+        Output("custom-charts-container-inline", "children"),
+        [Input("custom-charts-store", "data")],
+        [State("source-filter", "value"),
+         State("severity-filter", "value"),
+         State("status-filter", "value"),
+         State("team-filter", "value"),
+         State("repo-filter", "value"),
+         State("date-range", "start_date"),
+         State("date-range", "end_date"),
+         State({"type": "custom-chart", "index": ALL}, "id")]
+    )
     def render_custom_charts_inline(charts_config, source_val, severity_val,
-                                       status_val, team_val, repo_val):
-            """Render all custom charts inline in Row 4"""
-            if not charts_config or len(charts_config) == 0:
-                return html.Div(
-                    html.P(
-                        "No custom charts yet. Use the Chart Builder to create visualizations.",
-                        style={"textAlign": "center", "color": "#6B7280", "padding": "20px"}
-                    ),
-                    style={"minHeight": "100px"}
-                )
+                                    status_val, team_val, repo_val, start_date, end_date,
+                                    rendered_ids):
+        """Append cards for charts added to the store since the last render"""
+        if not charts_config or len(charts_config) == 0:
+            return [html.Div(
+                html.P(
+                    "No custom charts yet. Use the Chart Builder to create visualizations.",
+                    style={"textAlign": "center", "color": "#6B7280", "padding": "20px"}
+                ),
+                style={"minHeight": "100px", "flex": "1 1 100%"}
+            )]
 
-            try:
-                # Load and filter data
-                df = load_security_data()
-                filtered = get_filtered_data(df, source_val, severity_val,
-                                             status_val, team_val, repo_val)
-                # Create chart components in a responsive grid
-                chart_components = []
-                for chart_cfg in charts_config:
-                    try:
-                        fig = create_custom_chart(
-                            filtered,
-                            chart_cfg["x"],
-                            chart_cfg["y"],
-                            chart_cfg["type"],
-                            chart_cfg.get("color")
-                        )
-                        fig.update_layout(
-                            title=chart_cfg["title"],
-                            height=350
-                        )
+        try:
+            rendered = {graph_id["index"] for graph_id in rendered_ids or []}
+            configured = {chart_cfg["id"] for chart_cfg in charts_config}
+            new_charts = [c for c in charts_config if c["id"] not in rendered]
 
-                        chart_components.append(
-                            html.Div([
-                                html.Div([
-                                    html.Span(f"Chart {chart_cfg['id']}",
-                                              style={"fontWeight": "600", "marginRight": "12px"}),
-                                    html.Button(
-                                        "✕",
-                                        id={"type": "remove-chart", "index": chart_cfg["id"]},
-                                        n_clicks=0,
-                                        title="Remove this chart",
-                                        style={
-                                            "padding": "2px 8px",
-                                            "backgroundColor": "#EF4444",
-                                            "color": "white",
-                                            "border": "none",
-                                            "borderRadius": "3px",
-                                            "cursor": "pointer",
-                                            "fontSize": "12px",
-                                            "float": "right"
-                                        }
-                                    )
-                                ], style={"marginBottom": "8px"}),
-                                dcc.Graph(figure=fig, config={"displayModeBar": False})
-                            ], style={
-                                "flex": "1 1 calc(50% - 16px)",
-                                "minWidth": "400px",
-                                "marginBottom": "16px",
-                                "padding": "12px",
-                                "backgroundColor": "#0E0F14",
-                                "borderRadius": "6px",
-                                "border": "1px solid #5E5CE6"
-                            })
-                        )
-                    except Exception as e:
-                        logger.error(f"Error rendering custom chart {chart_cfg['id']}: {e}")
+            # Anything other than pure additions (first chart, removals) rebuilds the grid
+            full_render = not rendered or not rendered <= configured
+            to_render = charts_config if full_render else new_charts
+            if not to_render:
+                raise PreventUpdate
 
-                return html.Div(
-                    chart_components,
-                    style={
-                        "display": "flex",
-                        "flexWrap": "wrap",
-                        "gap": "16px",
-                        "marginTop": "16px"
-                    }
-                )
+            figures = _render_custom_figures(to_render, source_val, severity_val,
+                                             status_val, team_val, repo_val,
+                                             start_date, end_date)
+            cards = [_create_custom_chart_card(cfg, fig) for cfg, fig in zip(to_render, figures)]
 
-            except Exception as e:
-                logger.error(f"Error rendering custom charts: {e}")
-                return html.Div(
-                    f"Error loading custom charts: {str(e)}",
-                    style={"color": "#EF4444", "padding": "20px"}
-                )
+            if full_render:
+                return cards
+            patched = Patch()
+            for card in cards:
+                patched.append(card)
+            return patched
+
+        except PreventUpdate:
+            raise
+        except Exception as e:
+            logger.error(f"Error rendering custom charts: {e}")
+            return [html.Div(
+                f"Error loading custom charts: {str(e)}",
+                style={"color": "#EF4444", "padding": "20px"}
+            )]
+
+    # Refresh every rendered custom chart when the filters (or the data) change
+    @app.callback(
+        Output({"type": "custom-chart", "index": ALL}, "figure"),
+        [Input("source-filter", "value"),
+         Input("severity-filter", "value"),
+         Input("status-filter", "value"),
+         Input("team-filter", "value"),
+         Input("repo-filter", "value"),
+         Input("date-range", "start_date"),
+         Input("date-range", "end_date"),
+         Input("data-change", "data")],
+        [State({"type": "custom-chart", "index": ALL}, "id"),
+         State("custom-charts-store", "data")],
+        prevent_initial_call=True
+    )
+    def update_custom_chart_figures(source_val, severity_val, status_val, team_val,
+                                    repo_val, start_date, end_date, change,
+                                    rendered_ids, charts_config):
+        """Re-render all custom charts in one batched pass over the filtered data"""
+        if not rendered_ids:
+            raise PreventUpdate
+        configs = {chart_cfg["id"]: chart_cfg for chart_cfg in charts_config or []}
+        present = [configs[graph_id["index"]] for graph_id in rendered_ids
+                   if graph_id["index"] in configs]
+        if callback_context.triggered_id == "data-change":
+            # Pushed data change: only charts over a changed column
+            selections = get_selections(source_val, severity_val, status_val, team_val, repo_val)
+            present = [cfg for cfg in present
+                       if is_affected(change, [cfg["x"], cfg["y"], cfg.get("color")], selections,
+                                      bool(start_date or end_date))]
+            if not present:
+                raise PreventUpdate
+        figures = _render_custom_figures(present, source_val, severity_val,
+                                         status_val, team_val, repo_val,
+                                         start_date, end_date)
+        by_id = {chart_cfg["id"]: fig for chart_cfg, fig in zip(present, figures)}
+        return [by_id.get(graph_id["index"], dash.no_update) for graph_id in rendered_ids]
 
     def remove_custom_chart(n_clicks_list, current_charts):
         """Remove a custom chart from the store"""
@@ -1,9 +1,31 @@
-from dash import Input, Output, State
-from src.data.loader import load_security_data, get_filtered_data
+import contextvars
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from functools import partial
+from dash import Input, Output, State, Patch, callback_context, no_update
+from dash.exceptions import PreventUpdate
+from plotly import graph_objects as go
+from config.settings import LARGE_CHART_POINT_THRESHOLD, FIGURE_WORKERS, FIGURE_TIMEOUT_SECONDS
+from config.theme import CYBER_THEME
+import numpy as np
+import pandas as pd
+from src.data.loader import (
+    load_security_data, get_filtered_data, get_tool_urls, get_time_window, resolve_date_range,
+    get_search_index, run_coalesced
+)
+from src.data.cube import get_selections, get_findings_cube
+from src.data.dedup import counted_findings
+from src.data.rollups import get_rollup_store
+from src.data.backlog import get_open_backlog, get_backlog_engine
+from src.data.storage import get_storage_backend
+from src.data.sketches import get_mttr_sketches
 from src.components.charts import (
     create_severity_pie_chart,
     create_trend_line_chart,
     create_severity_by_week_chart,
+    create_backlog_chart,
+    create_mttr_distribution_chart,
     create_source_bar_chart,
     create_category_treemap,
     create_top_repos_chart,
@@ -11,63 +33,313 @@ from src.components.charts import (
     create_risk_gauge,
     create_attack_timeline_heatmap
 )
-from src.components.tables import create_findings_table
+from src.components.tables import create_findings_table, create_export_links
+from src.data.export import export_query
+from src.data.changes import is_affected
+from src.data.downsampling import parse_axis_range
+from src.utils.helpers import get_severity_order, in_date_range
 from src.utils.logger import logger
+from src.utils.transport import DECODE_COLUMNAR_JS
+
+# Main dashboard figures, in update_all_charts output order
+DASHBOARD_FIGURES = [
+    "risk-gauge", "severity-chart", "trend-chart", "severity-week-chart",
+    "backlog-chart", "mttr-distribution-chart", "source-chart",
+    "category-chart", "repos-chart", "attack-heatmap",
+]
+
+def _dashboard_context(source_val, severity_val, status_val, team_val, repo_val,
+                       start_date, end_date) -> dict:
+    """Inputs shared by the dashboard figure builders, resolved once per update"""
+    df = load_security_data()
+    filtered = get_filtered_data(df, source_val, severity_val,
+                                 status_val, team_val, repo_val, start_date, end_date)
+    start, end = resolve_date_range(start_date, end_date)
+    windowed = start is not None or end is not None
+    # Build the shared engines here, not concurrently inside the builders
+    get_findings_cube(), get_backlog_engine()
+    # Figures count each correlation group once: "counted" holds its canonical rows
+    return {
+        "df": df, "filtered": filtered, "counted": counted_findings(filtered),
+        "selections": get_selections(source_val, severity_val, status_val, team_val, repo_val),
+        "start": start, "end": end, "windowed": windowed,
+        "rows": get_time_window(df, start_date, end_date) if windowed else None,
+        "rollups": get_rollup_store(), "sketches": get_mttr_sketches(),
+        "backend": get_storage_backend(),
+    }
+
+def _trend_figure(ctx):
+    """Trend line from the daily rollup, clipped to the date range"""
+    # Time series come from the pre-aggregated rollups, not raw rows; daily
+    # buckets are simply clipped to the date range
+    timeline = ctx["rollups"].query("D", ctx["selections"])
+    return create_trend_line_chart(
+        ctx["counted"], timeline=timeline[in_date_range(timeline["Period"], ctx["start"], ctx["end"])])
+
+def _severity_week_figure(ctx):
+    """Weekly severity bars"""
+    # Weeks cut by the range edges are counted from the windowed rows
+    return create_severity_by_week_chart(
+        ctx["counted"],
+        weekly=None if ctx["windowed"] else ctx["rollups"].query("W", ctx["selections"], by="Severity"))
+
+def _backlog_figure(ctx):
+    """Open backlog per day and severity"""
+    backlog = get_open_backlog(ctx["selections"], by="Severity")
+    return create_backlog_chart(backlog[in_date_range(backlog.index, ctx["start"], ctx["end"])])
+
+def _mttr_figure(ctx):
+    """MTTR distribution from the quantile sketches"""
+    sketches, counted = ctx["sketches"], ctx["counted"]
+    if ctx["windowed"]:
+        # Cube cells span all time: bucket the windowed rows instead
+        histograms = {
+            severity: sketches.histogram_of(group["MTTR_Hours"])
+            for severity, group in counted.groupby("Severity", observed=True)
+        }
+        histograms = {sev: histograms[sev] for sev in get_severity_order() if sev in histograms}
+        histogram = sketches.histogram_of(counted["MTTR_Hours"])
+    else:
+        histograms = sketches.histogram_by("severity", ctx["selections"])
+        histogram = sketches.histogram(ctx["selections"])
+    p50, p90, p99 = sketches.quantiles(histogram, [0.5, 0.9, 0.99])
+    return create_mttr_distribution_chart(
+        histograms, sketches.bucket_values, {"p50": p50, "p90": p90, "p99": p99})
+
+def _counts(ctx, column):
+    """Finding counts per value of column, computed by the storage backend"""
+    return ctx["backend"].count_by(column, ctx["selections"], ctx["rows"])
+
+def _heatmap_figure(ctx):
+    """Attack timeline heatmap"""
+    # The heatmap only needs two columns: read them through the storage
+    # backend, which skips data outside the date range
+    return create_attack_timeline_heatmap(
+        ctx["backend"].filter(ctx["selections"], ["Opened_At", "Repo/Account"], ctx["rows"],
+                              counted=True),
+        time_granularity="W", by="Repo/Account")
+
+# Columns each main dashboard figure reads (besides the filter columns), to
+# tell which ones a pushed data change reaches
+FIGURE_COLUMNS = {
+    "risk-gauge": ["Status", "Severity"],
+    "severity-chart": ["Severity"],
+    "trend-chart": ["Opened_At"],
+    "severity-week-chart": ["Opened_At", "Severity"],
+    "backlog-chart": ["Opened_At", "MTTR_Hours", "Status", "Severity"],
+    "mttr-distribution-chart": ["MTTR_Hours", "Severity"],
+    "source-chart": ["Source"],
+    "category-chart": ["Category", "Severity"],
+    "repos-chart": ["Repo/Account"],
+    "attack-heatmap": ["Opened_At", "Repo/Account"],
+}
+
+# Builder of each main dashboard figure, in DASHBOARD_FIGURES order
+FIGURE_BUILDERS = {
+    "risk-gauge": lambda ctx: create_risk_gauge(ctx["counted"]),
+    "severity-chart": lambda ctx: create_severity_pie_chart(None, counts=_counts(ctx, "Severity")),
+    "trend-chart": _trend_figure,
+    "severity-week-chart": _severity_week_figure,
+    "backlog-chart": _backlog_figure,
+    "mttr-distribution-chart": _mttr_figure,
+    "source-chart": lambda ctx: create_source_bar_chart(None, counts=_counts(ctx, "Source")),
+    "category-chart": lambda ctx: create_category_treemap(
+        None, counts=_counts(ctx, ["Category", "Severity"])),
+    "repos-chart": lambda ctx: create_top_repos_chart(None, counts=_counts(ctx, "Repo/Account")),
+    "attack-heatmap": _heatmap_figure,
+}
+
+def _unavailable_figure(fig_id, reason):
+    """Placeholder for one figure that failed or timed out"""
+    fig = go.Figure()
+    fig.add_annotation(text=f"{fig_id.replace('-', ' ').capitalize()} unavailable: {reason}",
+                       x=0.5, y=0.5, showarrow=False)
+    fig.update_layout(paper_bgcolor=CYBER_THEME["bg_card"], font_color=CYBER_THEME["text_primary"],
+                      xaxis_visible=False, yaxis_visible=False)
+    return fig
+
+def _start_figure(fig_id, ctx) -> Future:
+    """
+    Build one figure on its own daemon thread
+
+    The build runs in a copy of this context, so it reads the data version
+    the request has pinned. A build that is given up on keeps only its own
+    thread, never a worker later updates wait for.
+    """
+    future = Future()
+    context = contextvars.copy_context()
+
+    def run():
+        try:
+            future.set_result(context.run(FIGURE_BUILDERS[fig_id], ctx))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name=f"figure-{fig_id}", daemon=True).start()
+    return future
+
+def build_dashboard_figures(source_val=None, severity_val=None, status_val=None,
+                            team_val=None, repo_val=None, start_date=None, end_date=None,
+                            figures=None):
+    """
+    Build the main dashboard figures for the given filters
+
+    Figures are independent, so up to FIGURE_WORKERS of them are built at
+    once, each on a thread of its own. Each figure that raises, or is not done
+    FIGURE_TIMEOUT_SECONDS after its own build started, is replaced by a
+    placeholder. The others are returned as usual. A timed-out build cannot be
+    interrupted. It finishes in the background, and its slot goes to the next
+    figure. With FIGURE_WORKERS = 0 figures are built inline, one after
+    another, without timeouts.
+
+    Args:
+        figures: Figure ids to build (default: all of DASHBOARD_FIGURES)
+
+    Returns:
+        tuple: Figures in the order of figures (DASHBOARD_FIGURES by default)
+    """
+    fig_ids = list(figures or DASHBOARD_FIGURES)
+    ctx = _dashboard_context(source_val, severity_val, status_val, team_val, repo_val,
+                             start_date, end_date)
+    if FIGURE_WORKERS <= 0:
+        results = {}
+        for fig_id in fig_ids:
+            try:
+                results[fig_id] = FIGURE_BUILDERS[fig_id](ctx)
+            except Exception as e:
+                logger.error(f"Error building {fig_id}: {e}")
+                results[fig_id] = _unavailable_figure(fig_id, "error")
+        return tuple(results[fig_id] for fig_id in fig_ids)
+
+    queued, running, results = list(fig_ids), {}, {}
+    while queued or running:
+        while queued and len(running) < FIGURE_WORKERS:
+            fig_id = queued.pop(0)
+            running[fig_id] = (_start_figure(fig_id, ctx), time.monotonic() + FIGURE_TIMEOUT_SECONDS)
+        next_deadline = min(deadline for _, deadline in running.values())
+        wait([future for future, _ in running.values()],
+             timeout=max(0.0, next_deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+        now = time.monotonic()
+        for fig_id, (future, deadline) in list(running.items()):
+            if future.done():
+                del running[fig_id]
+                try:
+                    results[fig_id] = future.result()
+                except Exception as e:
+                    logger.error(f"Error building {fig_id}: {e}")
+                    results[fig_id] = _unavailable_figure(fig_id, "error")
+            elif now >= deadline:
+                del running[fig_id]
+                logger.warning(f"{fig_id} not built within {FIGURE_TIMEOUT_SECONDS}s")
+                results[fig_id] = _unavailable_figure(fig_id, "timed out")
+    return tuple(results[fig_id] for fig_id in fig_ids)
 
 def register_chart_callbacks(app):
     """Register chart update and click-to-drill callbacks"""
     
-    # Main dashboard charts update
+    # Main dashboard charts update; the unfiltered first paint comes from
+    # the default-view snapshot embedded in the layout
     @app.callback(
-        [Output("risk-gauge", "figure"),
-         Output("severity-chart", "figure"),
-         Output("trend-chart", "figure"),
-         Output("severity-week-chart", "figure"),
-         Output("source-chart", "figure"),
-         Output("category-chart", "figure"),
-         Output("repos-chart", "figure"),
-         Output("attack-heatmap", "figure")],
+        [Output(fig_id, "figure") for fig_id in DASHBOARD_FIGURES],
         [Input("source-filter", "value"),
          Input("severity-filter", "value"),
          Input("status-filter", "value"),
          Input("team-filter", "value"),
          Input("repo-filter", "value"),
-         Input("refresh-interval", "n_intervals")]
+         Input("date-range", "start_date"),
+         Input("date-range", "end_date"),
+         Input("data-change", "data")],
+        prevent_initial_call=True
     )
-    def update_all_charts(source_val, severity_val, status_val, team_val, repo_val, n):
+    def update_all_charts(source_val, severity_val, status_val, team_val, repo_val,
+                          start_date, end_date, change):
         """Update all main dashboard charts including new visualizations"""
+        stale = DASHBOARD_FIGURES
+        if callback_context.triggered_id == "data-change":
+            # Pushed data change: rebuild only the figures it reaches
+            selections = get_selections(source_val, severity_val, status_val, team_val, repo_val)
+            stale = [fig_id for fig_id in DASHBOARD_FIGURES
+                     if is_affected(change, FIGURE_COLUMNS[fig_id], selections,
+                                    bool(start_date or end_date))]
+            if not stale:
+                raise PreventUpdate
         try:
-            df = load_security_data()
-            filtered = get_filtered_data(df, source_val, severity_val, 
-                                        status_val, team_val, repo_val)
-            
-            # Debug prints (optional - can be removed in production)
-            logger.info(f"Filtered data: {len(filtered)} rows")
-            
-            risk_fig = create_risk_gauge(filtered)
-            severity_fig = create_severity_pie_chart(filtered)
-            trend_fig = create_trend_line_chart(filtered)
-            severity_week_fig = create_severity_by_week_chart(filtered)
-            source_fig = create_source_bar_chart(filtered)
-            category_fig = create_category_treemap(filtered)
-            repos_fig = create_top_repos_chart(filtered)
-            heatmap_fig = create_attack_timeline_heatmap(filtered, time_granularity="W", by="Repo/Account")
-            
-            return (risk_fig, severity_fig, trend_fig, severity_week_fig,
-                    source_fig, category_fig, repos_fig, heatmap_fig)
+            built = run_coalesced(f"dashboard_figures:{','.join(stale)}",
+                                  partial(build_dashboard_figures, figures=stale), source_val,
+                                  severity_val, status_val, team_val, repo_val,
+                                  start_date, end_date)
+            built = dict(zip(stale, built))
+            return tuple(built.get(fig_id, no_update) for fig_id in DASHBOARD_FIGURES)
             
         except Exception as e:
+            # Only failures shared by every figure (e.g. loading data) get here
             logger.error(f"Error updating charts: {e}")
-            from plotly import graph_objects as go
             empty_fig = go.Figure()
             empty_fig.update_layout(title="Error loading data")
-            return (empty_fig, empty_fig, empty_fig, empty_fig,
-                    empty_fig, empty_fig, empty_fig, empty_fig)
+            return tuple(empty_fig for _ in DASHBOARD_FIGURES)
+    
+    # Zoom to load more detail on a downsampled trend line
+    @app.callback(
+        Output("trend-chart", "figure", allow_duplicate=True),
+        [Input("trend-chart", "relayoutData")],
+        [State("source-filter", "value"),
+         State("severity-filter", "value"),
+         State("status-filter", "value"),
+         State("team-filter", "value"),
+         State("repo-filter", "value"),
+         State("date-range", "start_date"),
+         State("date-range", "end_date")],
+        prevent_initial_call=True
+    )
+    def refine_trend_chart(relayout_data, source_val, severity_val, status_val, team_val, repo_val,
+                           start_date, end_date):
+        """Re-sample the trend line for the visible date range"""
+        if not relayout_data or not any(key.startswith("xaxis.") for key in relayout_data):
+            raise PreventUpdate
+        
+        selections = get_selections(source_val, severity_val, status_val, team_val, repo_val)
+        timeline = get_rollup_store().query("D", selections)
+        timeline = timeline[in_date_range(timeline["Period"], *resolve_date_range(start_date, end_date))]
+        # Small series are sent in full, the browser already has every point
+        if len(timeline) <= LARGE_CHART_POINT_THRESHOLD:
+            raise PreventUpdate
+        
+        return create_trend_line_chart(None, timeline=timeline,
+                                       x_range=parse_axis_range(relayout_data))
+    
+    # Expand the columnar table payload into DataTable records
+    app.clientside_callback(
+        DECODE_COLUMNAR_JS,
+        Output("findings-table", "data"),
+        Input("findings-table-payload", "data")
+    )
+    
+    # Fetch tool URLs for the table rows on screen only
+    @app.callback(
+        Output("findings-table", "data", allow_duplicate=True),
+        [Input("findings-table", "derived_viewport_indices")],
+        [State("findings-table", "derived_viewport_data"),
+         State("findings-table-version", "data")],
+        prevent_initial_call=True
+    )
+    def load_visible_links(indices, rows, data_version):
+        """Fill the link column of the visible page from the URL side file"""
+        missing = [(i, row["Row_Id"]) for i, row in zip(indices or [], rows or [])
+                   if "View_Link" not in row and row.get("Row_Id") is not None]
+        if not missing:
+            raise PreventUpdate
+        
+        urls = get_tool_urls([row_id for _, row_id in missing], data_version=data_version)
+        patch = Patch()
+        for (i, _), url in zip(missing, urls):
+            patch[i]["View_Link"] = f"[View 🔗]({url})" if url else ""
+        return patch
     
     # Click-to-drill: Update table based on any chart click
     @app.callback(
         [Output("findings-table-container", "children"),
-         Output("selection-info", "children")],
+         Output("selection-info", "children"),
+         Output("export-links", "children")],
         [Input("severity-chart", "clickData"),
          Input("trend-chart", "clickData"),
          Input("severity-week-chart", "clickData"),
@@ -78,64 +350,97 @@ def register_chart_callbacks(app):
          Input("severity-filter", "value"),
          Input("status-filter", "value"),
          Input("team-filter", "value"),
-         Input("repo-filter", "value")]
+         Input("repo-filter", "value"),
+         Input("date-range", "start_date"),
+         Input("date-range", "end_date"),
+         Input("findings-search", "value")]
+        # Not prevented: the layout snapshot only paints the first page, and
+        # the initial call loads the full table after that first paint
     )
     def update_table_on_click(sev_click, trend_click, sev_week_click, 
                              source_click, cat_click, repo_click,
-                             source_val, severity_val, status_val, team_val, repo_val):
+                             source_val, severity_val, status_val, team_val, repo_val,
+                             start_date, end_date, search):
         """Update findings table based on chart clicks"""
         try:
             df = load_security_data()
-            filtered = get_filtered_data(df, source_val, severity_val, 
-                                        status_val, team_val, repo_val)
+            version = df.attrs["data_version"]
+            rows = None
+            if start_date or end_date:
+                rows = get_time_window(df, start_date, end_date)
+            filtered = get_storage_backend().filter(
+                get_selections(source_val, severity_val, status_val, team_val, repo_val),
+                rows=rows
+            )
+            
+            # Free-text search: ranked index hits within the filtered rows
+            scope = ""
+            if search and search.strip():
+                hits = get_search_index().search(search)
+                filtered = filtered.loc[hits[np.isin(hits, filtered.index.to_numpy())]]
+                scope = f' matching "{search.strip()}"'
+            
+            def export_links(drill=None):
+                return create_export_links(export_query(
+                    source_val, severity_val, status_val, team_val, repo_val,
+                    start_date, end_date, search, drill
+                ))
             
             # Determine which chart was clicked
             from dash import callback_context
             if not callback_context.triggered:
-                table = create_findings_table(filtered)
-                return table, f"Showing all {len(filtered)} findings"
+                table = create_findings_table(filtered, version)
+                return table, f"Showing all {len(filtered)} findings{scope}", export_links()
             
             trigger_id = callback_context.triggered[0]["prop_id"].split(".")[0]
             
             # Filter based on clicked element
-            drill_filtered = filtered.copy()
-            info_text = f"Showing all {len(filtered)} findings"
+            drill_filtered = filtered
+            info_text = f"Showing all {len(filtered)} findings{scope}"
+            drill = None
             
             if "severity-chart" in trigger_id and sev_click:
                 severity = sev_click["points"][0]["label"]
                 drill_filtered = filtered[filtered["Severity"] == severity]
+                drill = {"drill_severity": severity}
                 info_text = f"Filtered: {severity} severity ({len(drill_filtered)} findings)"
             
             elif "trend-chart" in trigger_id and trend_click:
                 date = trend_click["points"][0]["x"]
                 drill_filtered = filtered[filtered["Opened_At"].dt.date.astype(str) == date]
+                drill = {"day": str(date)[:10]}
                 info_text = f"Filtered: Date {date} ({len(drill_filtered)} findings)"
             
             elif "severity-week-chart" in trigger_id and sev_week_click:
                 week = sev_week_click["points"][0]["x"]
                 severity = sev_week_click["points"][0]["legendgroup"]
-                drill_filtered = filtered[(filtered["Week_Number"] == week) & 
+                week_start = filtered["Opened_At"].dt.to_period("W").dt.start_time
+                drill_filtered = filtered[(week_start == pd.Timestamp(week)) & 
                                          (filtered["Severity"] == severity)]
-                info_text = f"Filtered: Week {week}, {severity} ({len(drill_filtered)} findings)"
+                drill = {"week": str(week)[:10], "drill_severity": severity}
+                info_text = f"Filtered: Week of {str(week)[:10]}, {severity} ({len(drill_filtered)} findings)"
             
             elif "source-chart" in trigger_id and source_click:
                 source = source_click["points"][0]["x"]
                 drill_filtered = filtered[filtered["Source"] == source]
+                drill = {"drill_source": source}
                 info_text = f"Filtered: Source {source} ({len(drill_filtered)} findings)"
             
             elif "category-chart" in trigger_id and cat_click:
                 category = cat_click["points"][0]["label"]
                 drill_filtered = filtered[filtered["Category"] == category]
+                drill = {"drill_category": category}
                 info_text = f"Filtered: Category {category} ({len(drill_filtered)} findings)"
             
             elif "repos-chart" in trigger_id and repo_click:
                 repo = repo_click["points"][0]["y"]
                 drill_filtered = filtered[filtered["Repo/Account"] == repo]
+                drill = {"drill_repo": repo}
                 info_text = f"Filtered: Repository {repo} ({len(drill_filtered)} findings)"
             
-            table = create_findings_table(drill_filtered)
-            return table, info_text
+            table = create_findings_table(drill_filtered, version)
+            return table, info_text, export_links(drill)
             
         except Exception as e:
             logger.error(f"Error in click-to-drill: {e}")
-            return "Error loading table", "Error"
\ No newline at end of file
+            return "Error loading table", "Error", no_update
\ No newline at end of file
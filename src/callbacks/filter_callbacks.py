@@ -1,40 +1,211 @@
-from dash import Input, Output, State, callback_context
-from src.data.loader import load_security_data, get_filtered_data
-from src.utils.metrics import calculate_kpis, calculate_trend_comparison
+import dash
+import pandas as pd
+from dash import Input, Output, State, ALL, callback_context, html
+from dash.exceptions import PreventUpdate
+from src.data.loader import (
+    load_security_data, get_filtered_data, get_time_window, resolve_date_range, run_coalesced
+)
+from src.data.cube import get_findings_cube, get_selections
+from src.data.changes import is_affected
+from src.data.dedup import counted_findings
+from src.components.filters import create_facet_options
+from config.settings import SLA_WARNING_HOURS, SLA_TOP_K
+from src.data.backlog import get_open_backlog
+from src.data.sla import get_sla_engine
+from src.data.storage import PartitionedBackend, get_storage_backend
+from src.data.sketches import get_mttr_sketches, get_distinct_sketches
+from src.components.tables import create_sla_table
+from src.utils.metrics import calculate_kpis, calculate_trend_comparison, calculate_backlog_trend
+from src.utils.helpers import in_date_range, utc_now_naive
 from src.utils.logger import logger
 
+# KPI card ids, in update_kpis output order
+KPI_CARDS = [
+    "total-findings", "open-findings", "critical-open", "avg-mttr",
+    "mttr-percentiles", "sla-breached", "affected-repos", "distinct-categories",
+    "categories-per-team",
+]
+# Teams listed under the distinct categories card, most categories first
+TOP_TEAMS = 3
+
+def _filter_mask(selections: dict, start_date=None, end_date=None):
+    """Row mask for the row-indexed engines, or None when nothing is filtered"""
+    rows = None
+    if start_date or end_date:
+        rows = get_time_window(load_security_data(), start_date, end_date)
+    if not selections and rows is None:
+        return None
+    return get_findings_cube().row_mask(selections, rows)
+
+def build_kpi_values(source_val=None, severity_val=None, status_val=None,
+                     team_val=None, repo_val=None, start_date=None, end_date=None):
+    """
+    Format every KPI card value for the given filters
+
+    Returns:
+        tuple: Card texts in KPI_CARDS order
+    """
+    selections = get_selections(source_val, severity_val, status_val,
+                                team_val, repo_val)
+    filtered = None
+    if selections or start_date or end_date:
+        # One row per correlation group, so a finding several tools reported counts once
+        filtered = counted_findings(get_filtered_data(load_security_data(), source_val, severity_val,
+                                                      status_val, team_val, repo_val,
+                                                      start_date, end_date))
+    backend = get_storage_backend()
+    if not selections and isinstance(backend, PartitionedBackend):
+        # Without dimension filters the headline counts come from month partition stats
+        kpis = backend.store.summary(start_date, end_date)
+    else:
+        kpis = calculate_kpis(filtered if filtered is not None
+                              else counted_findings(load_security_data()))
+    mask = _filter_mask(selections, start_date, end_date)
+    sla = get_sla_engine().summary(mask, horizon_hours=SLA_WARNING_HOURS)
+    sketches = get_mttr_sketches()
+    if start_date or end_date:
+        # Sketch cells span all time: use the windowed rows directly
+        histogram = sketches.histogram_of(filtered["MTTR_Hours"])
+        repos = str(filtered["Repo/Account"].nunique())
+        categories = str(filtered["Category"].nunique())
+        per_team = filtered.groupby("Assigned_Team", observed=True)["Category"].nunique().to_dict()
+        approx = ""
+    else:
+        histogram = sketches.histogram(selections)
+        repos = f"≈{get_distinct_sketches('Repo/Account').count(selections)}"
+        categories = f"≈{get_distinct_sketches('Category').count(selections)}"
+        per_team = get_distinct_sketches("Category").count_by("team", selections)
+        approx = "≈"
+    percentiles = sketches.quantiles(histogram, [0.5, 0.9, 0.99])
+    top_teams = sorted(per_team.items(), key=lambda item: (-item[1], str(item[0])))[:TOP_TEAMS]
+
+    return (
+        str(kpis["total"]),
+        str(kpis["open"]),
+        str(kpis["critical_open"]),
+        f"{kpis['avg_mttr']:.1f}h",
+        " / ".join("–" if p is None else f"{p:.0f}h" for p in percentiles),
+        f"{sla['breached']} (+{sla['due_soon']} soon)",
+        repos,
+        categories,
+        " · ".join(f"{team} {approx}{count}" for team, count in top_teams) or "–"
+    )
+
+def build_sla_watchlist(source_val=None, severity_val=None, status_val=None,
+                        team_val=None, repo_val=None, start_date=None, end_date=None):
+    """Table (or message) of the open findings closest to breaching their SLA"""
+    selections = get_selections(source_val, severity_val, status_val,
+                                team_val, repo_val)
+    mask = _filter_mask(selections, start_date, end_date)
+    due = get_sla_engine().breaching_within(SLA_WARNING_HOURS, k=SLA_TOP_K, mask=mask)
+    if due.empty:
+        return html.P("No open findings are about to breach their SLA",
+                      style={"color": "#9ca3af", "fontSize": "13px"})
+    return create_sla_table(due)
+
+def build_trend_summary(source_val=None, severity_val=None, status_val=None,
+                        team_val=None, repo_val=None, start_date=None, end_date=None) -> str:
+    """Week-over-week and open backlog summary line for the given filters"""
+    df = load_security_data()
+    filtered = counted_findings(get_filtered_data(df, source_val, severity_val,
+                                                  status_val, team_val, repo_val, start_date, end_date))
+
+    week = calculate_trend_comparison(filtered, "W")
+    arrow = "↑" if week["delta"] > 0 else "↓" if week["delta"] < 0 else "→"
+    selections = get_selections(source_val, severity_val, status_val,
+                                team_val, repo_val)
+    backlog = get_open_backlog(selections)
+    backlog = calculate_backlog_trend(
+        backlog[in_date_range(backlog.index, *resolve_date_range(start_date, end_date))], days=7)
+    backlog_arrow = "↑" if backlog["delta"] > 0 else "↓" if backlog["delta"] < 0 else "→"
+    return (
+        f"Week-over-week: {arrow} {abs(week['delta_pct']):.1f}% "
+        f"({week['current']} vs {week['previous']}) · "
+        f"Open backlog: {backlog['current']} ({backlog_arrow} {abs(backlog['delta'])} "
+        f"vs 7 days earlier, peak {backlog['peak']})"
+    )
+
+# Columns read by the KPI cards, SLA watchlist and trend summary (besides the
+# filter columns), to tell which ones a pushed data change reaches
+KPI_COLUMNS = ["Status", "Severity", "MTTR_Hours", "Opened_At", "Repo/Account", "Category",
+               "Assigned_Team"]
+SLA_WATCHLIST_COLUMNS = ["Status", "Severity", "Opened_At", "Category", "Assigned_Team", "Repo/Account"]
+TREND_SUMMARY_COLUMNS = ["Opened_At", "Status", "MTTR_Hours"]
+
+def _skip_unaffected(change, columns, source_val, severity_val, status_val, team_val, repo_val,
+                     start_date, end_date):
+    """Raise PreventUpdate when a pushed data change does not reach a component"""
+    if callback_context.triggered_id != "data-change":
+        return
+    selections = get_selections(source_val, severity_val, status_val, team_val, repo_val)
+    if not is_affected(change, columns, selections, bool(start_date or end_date)):
+        raise PreventUpdate
+
 def register_filter_callbacks(app):
     """Register filter callbacks"""
 
     @app.callback(
-        [Output("total-findings", "children"),
-         Output("open-findings", "children"),
-         Output("critical-open", "children"),
-         Output("avg-mttr", "children")],
+        [Output(card_id, "children") for card_id in KPI_CARDS],
         [Input("source-filter", "value"),
          Input("severity-filter", "value"),
          Input("status-filter", "value"),
          Input("team-filter", "value"),
          Input("repo-filter", "value"),
-         Input("refresh-interval", "n_intervals")]
+         Input("date-range", "start_date"),
+         Input("date-range", "end_date"),
+         Input("sla-clock", "n_intervals"),
+         Input("data-change", "data")],
+        prevent_initial_call=True
     )
-    def update_kpis(source_val, severity_val, status_val, team_val, repo_val, n):
+    def update_kpis(source_val, severity_val, status_val, team_val, repo_val,
+                    start_date, end_date, n, change):
         """Update KPI cards based on current filters"""
+        _skip_unaffected(change, KPI_COLUMNS, source_val, severity_val, status_val,
+                         team_val, repo_val, start_date, end_date)
         try:
-            df = load_security_data()
-            filtered = get_filtered_data(df, source_val, severity_val,
-                                         status_val, team_val, repo_val)
-            kpis = calculate_kpis(filtered)
-
-            return (
-                str(kpis["total"]),
-                str(kpis["open"]),
-                str(kpis["critical_open"]),
-                f"{kpis['avg_mttr']:.1f}h"
-            )
+            return run_coalesced("kpis", build_kpi_values, source_val, severity_val, status_val,
+                                 team_val, repo_val, start_date, end_date)
         except Exception as e:
             logger.error(f"Error updating KPIs: {e}")
-            return "Error", "Error", "Error", "Error"
+            return tuple("Error" for _ in KPI_CARDS)
+
+    @app.callback(
+        Output("sla-breach-container", "children"),
+        [Input("source-filter", "value"),
+         Input("severity-filter", "value"),
+         Input("status-filter", "value"),
+         Input("team-filter", "value"),
+         Input("repo-filter", "value"),
+         Input("date-range", "start_date"),
+         Input("date-range", "end_date"),
+         Input("sla-clock", "n_intervals"),
+         Input("data-change", "data")],
+        prevent_initial_call=True
+    )
+    def update_sla_watchlist(source_val, severity_val, status_val, team_val, repo_val,
+                             start_date, end_date, n, change):
+        """List the open findings closest to breaching their SLA"""
+        _skip_unaffected(change, SLA_WATCHLIST_COLUMNS, source_val, severity_val, status_val,
+                         team_val, repo_val, start_date, end_date)
+        try:
+            return run_coalesced("sla_watchlist", build_sla_watchlist, source_val, severity_val,
+                                 status_val, team_val, repo_val, start_date, end_date)
+        except Exception as e:
+            logger.error(f"Error updating SLA watchlist: {e}")
+            return html.P("SLA data unavailable")
+
+    # assets/data_changes.js stashes each pushed data-change event on window
+    # and clicks the hidden signal button; copy the event into the store
+    app.clientside_callback(
+        """
+        function(n_clicks) {
+            return window.__dataChange || window.dash_clientside.no_update;
+        }
+        """,
+        Output("data-change", "data"),
+        Input("data-change-signal", "n_clicks"),
+        prevent_initial_call=True
+    )
 
     @app.callback(
         [Output("source-filter", "value"),
@@ -42,7 +213,8 @@ def register_filter_callbacks(app):
          Output("status-filter", "value"),
          Output("team-filter", "value"),
          Output("repo-filter", "value")],
-        [Input("reset-filters-btn", "n_clicks")]
+        [Input("reset-filters-btn", "n_clicks")],
+        prevent_initial_call=True
     )
     def reset_filters(n_clicks):
         """Reset all filters to None"""
@@ -50,6 +222,49 @@ def register_filter_callbacks(app):
             return None, None, None, None, None
         return None, None, None, None, None
 
+    @app.callback(
+        [Output("date-range", "start_date"),
+         Output("date-range", "end_date")],
+        [Input({"type": "date-preset", "days": ALL}, "n_clicks"),
+         Input("reset-filters-btn", "n_clicks")],
+        prevent_initial_call=True
+    )
+    def apply_date_preset(preset_clicks, reset_clicks):
+        """Set the date range to the last N days, or clear it ("All" / reset)"""
+        trigger = callback_context.triggered_id
+        days = trigger.get("days") if isinstance(trigger, dict) else 0
+        if not days:
+            return None, None
+        today = utc_now_naive().normalize()
+        return (today - pd.Timedelta(days=days - 1)).date().isoformat(), today.date().isoformat()
+
+    @app.callback(
+        [Output("source-filter", "options"),
+         Output("severity-filter", "options"),
+         Output("status-filter", "options"),
+         Output("team-filter", "options"),
+         Output("repo-filter", "options")],
+        [Input("source-filter", "value"),
+         Input("severity-filter", "value"),
+         Input("status-filter", "value"),
+         Input("team-filter", "value"),
+         Input("repo-filter", "value")],
+        prevent_initial_call=True
+    )
+    def update_filter_options(source_val, severity_val, status_val, team_val, repo_val):
+        """Narrow each dropdown to values reachable under the other filters"""
+        try:
+            selections = get_selections(source_val, severity_val, status_val,
+                                        team_val, repo_val)
+            facets = get_findings_cube().facet_counts(selections)
+            return tuple(
+                create_facet_options(facets[dim], selections.get(dim))
+                for dim in ("source", "severity", "status", "team", "repo")
+            )
+        except Exception as e:
+            logger.error(f"Error updating filter options: {e}")
+            return dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update
+
     @app.callback(
         Output("trend-summary", "children"),
         [Input("source-filter", "value"),
@@ -57,21 +272,19 @@ def register_filter_callbacks(app):
          Input("status-filter", "value"),
          Input("team-filter", "value"),
          Input("repo-filter", "value"),
-         Input("refresh-interval", "n_intervals")]
+         Input("date-range", "start_date"),
+         Input("date-range", "end_date"),
+         Input("data-change", "data")],
+        prevent_initial_call=True
     )
-    def update_trend_summary(source_val, severity_val, status_val, team_val, repo_val, n):
+    def update_trend_summary(source_val, severity_val, status_val, team_val, repo_val,
+                             start_date, end_date, change):
         """Show week-over-week trend in total findings"""
+        _skip_unaffected(change, TREND_SUMMARY_COLUMNS, source_val, severity_val, status_val,
+                         team_val, repo_val, start_date, end_date)
         try:
-            df = load_security_data()
-            filtered = get_filtered_data(df, source_val, severity_val,
-                                         status_val, team_val, repo_val)
-
-            week = calculate_trend_comparison(filtered, "W")
-            arrow = "↑" if week["delta"] > 0 else "↓" if week["delta"] < 0 else "→"
-            return (
-                f"Week-over-week: {arrow} {abs(week['delta_pct']):.1f}% "
-                f"({week['current']} vs {week['previous']})"
-            )
+            return run_coalesced("trend_summary", build_trend_summary, source_val, severity_val,
+                                 status_val, team_val, repo_val, start_date, end_date)
         except Exception as e:
             logger.error(f"Error updating trend summary: {e}")
             return "Week-over-week: n/a"
\ No newline at end of file
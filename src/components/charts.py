@@ -1,22 +1,33 @@
 """
 Chart components with click-to-drill functionality
 """
+import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+from config.settings import LARGE_CHART_POINT_THRESHOLD, DOWNSAMPLE_TARGET_POINTS
 from config.theme import CYBER_THEME, SEVERITY_COLORS
 from src.utils.metrics import calculate_risk_score
+from src.data.aggregations import GroupByPlan, box_statistics
+from src.data.downsampling import downsample_series, downsample_scatter
+from src.data.rollups import period_starts
 
-def create_severity_pie_chart(df):
-    """Severity distribution pie chart"""
-    if df.empty:
+def create_severity_pie_chart(df, counts=None):
+    """
+    Severity distribution pie chart
+
+    Finding counts per severity can be passed as counts instead of
+    counting df.
+    """
+    if counts is None:
+        counts = df["Severity"].value_counts()
+    if counts.sum() == 0:
         fig = go.Figure()
         fig.add_annotation(text="No data available", x=0.5, y=0.5, showarrow=False)
         fig.update_layout(paper_bgcolor=CYBER_THEME["bg_card"], font_color=CYBER_THEME["text_primary"])
         return fig
     
-    severity_counts = df["Severity"].value_counts()
     severity_order = ["Critical", "High", "Medium", "Low"]
-    severity_counts = severity_counts.reindex(severity_order, fill_value=0)
+    severity_counts = counts.reindex(severity_order, fill_value=0)
     
     fig = px.pie(
         values=severity_counts.values,
@@ -50,28 +61,51 @@ def create_severity_pie_chart(df):
     )
     return fig
 
-def create_trend_line_chart(df):
-    """Timeline trend chart"""
-    if df.empty:
+def create_trend_line_chart(df, x_range=None, timeline=None):
+    """
+    Timeline trend chart
+
+    Above LARGE_CHART_POINT_THRESHOLD days the series is LTTB-downsampled and
+    drawn with WebGL. Passing the zoomed x_range re-samples only that window.
+    A daily rollup (Period, Count) can be passed as timeline instead of
+    grouping df.
+    """
+    if timeline is None and not df.empty:
+        timeline = df.groupby(df["Opened_At"].dt.normalize()).size().reset_index(name="Count")
+        timeline.columns = ["Period", "Count"]
+    
+    if timeline is None or timeline.empty:
         fig = go.Figure()
         fig.add_annotation(text="No data available", x=0.5, y=0.5, showarrow=False)
         fig.update_layout(paper_bgcolor=CYBER_THEME["bg_card"], font_color=CYBER_THEME["text_primary"])
         return fig
     
-    timeline_data = df.groupby(df["Opened_At"].dt.date).size().reset_index(name="Count")
-    timeline_data.columns = ["Date", "Count"]
+    timeline_data = timeline.rename(columns={"Period": "Date"})[["Date", "Count"]]
+    
+    large = len(timeline_data) > LARGE_CHART_POINT_THRESHOLD
+    if large:
+        timeline_data["Date"] = pd.to_datetime(timeline_data["Date"])
+        if x_range is not None:
+            low, high = (pd.Timestamp(v) for v in x_range)
+            timeline_data = timeline_data[timeline_data["Date"].between(low, high)]
+        timeline_data = downsample_series(timeline_data, "Date", "Count", DOWNSAMPLE_TARGET_POINTS)
     
     fig = px.line(
         timeline_data,
         x="Date",
         y="Count",
         title="📈 Findings Trend Over Time",
-        markers=True
+        markers=not large,
+        render_mode="webgl" if large else "auto"
     )
     fig.update_traces(
         line_color=CYBER_THEME["accent"],
         marker=dict(size=8, color=CYBER_THEME["accent"])
     )
+    if large:
+        fig.update_layout(uirevision="trend")
+        if x_range is not None:
+            fig.update_xaxes(range=list(x_range))
     fig.update_layout(
         paper_bgcolor=CYBER_THEME["bg_card"],
         plot_bgcolor=CYBER_THEME["bg_card"],
@@ -84,19 +118,30 @@ def create_trend_line_chart(df):
     )
     return fig
 
-def create_severity_by_week_chart(df):
-    """Stacked bar chart - Severity by Week"""
-    if df.empty:
+def create_severity_by_week_chart(df, weekly=None):
+    """
+    Stacked bar chart - Severity by Week
+
+    Weeks are keyed by their Monday so multi-year data never merges weeks
+    from different years. A weekly rollup (Period, Severity, Count) can be
+    passed instead of grouping df.
+    """
+    if weekly is None and not df.empty:
+        week_start = pd.Series(period_starts(df["Opened_At"])["W"], index=df.index)
+        weekly = df.groupby([week_start, "Severity"]).size().reset_index(name="Count")
+        weekly.columns = ["Period", "Severity", "Count"]
+    
+    if weekly is None or weekly.empty:
         fig = go.Figure()
         fig.add_annotation(text="No data available", x=0.5, y=0.5, showarrow=False)
         fig.update_layout(paper_bgcolor=CYBER_THEME["bg_card"], font_color=CYBER_THEME["text_primary"])
         return fig
     
-    weekly = df.groupby(["Week_Number", "Severity"]).size().reset_index(name="Count")
+    weekly = weekly.rename(columns={"Period": "Week"})
     
     fig = px.bar(
         weekly,
-        x="Week_Number",
+        x="Week",
         y="Count",
         color="Severity",
         title="📊 Severity Distribution by Week",
@@ -107,7 +152,7 @@ def create_severity_by_week_chart(df):
         paper_bgcolor=CYBER_THEME["bg_card"],
         plot_bgcolor=CYBER_THEME["bg_card"],
         font_color=CYBER_THEME["text_primary"],
-        xaxis_title="Week Number",
+        xaxis_title="Week Starting",
         yaxis_title="Count",
         legend_title="Severity",
         margin=dict(t=50, b=50, l=50, r=20),
@@ -115,15 +160,96 @@ def create_severity_by_week_chart(df):
     )
     return fig
 
-def create_source_bar_chart(df):
-    """Source distribution bar chart"""
-    if df.empty:
+def create_backlog_chart(backlog):
+    """Stacked area chart - open findings at the end of each day, by severity"""
+    if backlog is None or backlog.empty:
+        fig = go.Figure()
+        fig.add_annotation(text="No data available", x=0.5, y=0.5, showarrow=False)
+        fig.update_layout(paper_bgcolor=CYBER_THEME["bg_card"], font_color=CYBER_THEME["text_primary"])
+        return fig
+    
+    fig = go.Figure()
+    ordered = [sev for sev in ["Low", "Medium", "High", "Critical"] if sev in backlog.columns]
+    for severity in ordered + [col for col in backlog.columns if col not in ordered]:
+        fig.add_trace(go.Scatter(
+            x=backlog.index,
+            y=backlog[severity],
+            name=str(severity),
+            mode="lines",
+            stackgroup="backlog",
+            line=dict(width=0.5, color=SEVERITY_COLORS.get(severity)),
+            hovertemplate='<b>%{x|%Y-%m-%d}</b><br>Open: %{y}<extra>' + str(severity) + '</extra>'
+        ))
+    fig.update_layout(
+        title="📉 Open Backlog Over Time",
+        paper_bgcolor=CYBER_THEME["bg_card"],
+        plot_bgcolor=CYBER_THEME["bg_card"],
+        font_color=CYBER_THEME["text_primary"],
+        xaxis_title="Date",
+        yaxis_title="Open Findings",
+        legend_title="Severity",
+        hovermode="x unified",
+        margin=dict(t=50, b=50, l=50, r=20),
+        height=400
+    )
+    return fig
+
+def create_mttr_distribution_chart(histograms, bucket_values, percentiles=None):
+    """
+    MTTR distribution per severity from merged quantile sketches
+
+    Args:
+        histograms: {severity: bucket counts}
+        bucket_values: Representative MTTR (hours) of every bucket
+        percentiles: Optional {label: hours} drawn as vertical markers
+    """
+    if not histograms:
         fig = go.Figure()
         fig.add_annotation(text="No data available", x=0.5, y=0.5, showarrow=False)
         fig.update_layout(paper_bgcolor=CYBER_THEME["bg_card"], font_color=CYBER_THEME["text_primary"])
         return fig
     
-    source_counts = df["Source"].value_counts()
+    fig = go.Figure()
+    for severity, counts in histograms.items():
+        used = counts > 0
+        fig.add_trace(go.Scatter(
+            x=bucket_values[used],
+            y=counts[used],
+            name=str(severity),
+            mode="lines+markers",
+            line=dict(color=SEVERITY_COLORS.get(severity), shape="spline"),
+            hovertemplate='MTTR ≈ %{x:.1f}h<br>Findings: %{y}<extra>' + str(severity) + '</extra>'
+        ))
+    for label, value in (percentiles or {}).items():
+        if value is not None:
+            fig.add_vline(x=value, line_dash="dot", line_color=CYBER_THEME["accent"],
+                          annotation_text=f"{label} {value:.0f}h", annotation_position="top")
+    fig.update_layout(
+        title="⏱️ MTTR Distribution",
+        paper_bgcolor=CYBER_THEME["bg_card"],
+        plot_bgcolor=CYBER_THEME["bg_card"],
+        font_color=CYBER_THEME["text_primary"],
+        xaxis_title="MTTR (hours)",
+        yaxis_title="Findings",
+        legend_title="Severity",
+        margin=dict(t=50, b=50, l=50, r=20),
+        height=400
+    )
+    return fig
+
+def create_source_bar_chart(df, counts=None):
+    """
+    Source distribution bar chart
+
+    Finding counts per source, largest first, can be passed as counts
+    instead of counting df.
+    """
+    source_counts = df["Source"].value_counts() if counts is None else counts
+    if source_counts.sum() == 0:
+        fig = go.Figure()
+        fig.add_annotation(text="No data available", x=0.5, y=0.5, showarrow=False)
+        fig.update_layout(paper_bgcolor=CYBER_THEME["bg_card"], font_color=CYBER_THEME["text_primary"])
+        return fig
     
     fig = px.bar(
         x=source_counts.index,
@@ -144,15 +270,22 @@ def create_source_bar_chart(df):
     )
     return fig
 
-def create_category_treemap(df):
-    """Category treemap visualization"""
-    if df.empty:
+def create_category_treemap(df, counts=None):
+    """
+    Category treemap visualization
+
+    Finding counts per (Category, Severity) can be passed as counts instead
+    of grouping df.
+    """
+    if counts is None:
+        counts = df.groupby(["Category", "Severity"], observed=True).size()
+    if counts.sum() == 0:
         fig = go.Figure()
         fig.add_annotation(text="No data available", x=0.5, y=0.5, showarrow=False)
         fig.update_layout(paper_bgcolor=CYBER_THEME["bg_card"], font_color=CYBER_THEME["text_primary"])
         return fig
     
-    cat_counts = df.groupby(["Category", "Severity"]).size().reset_index(name="Count")
+    cat_counts = counts[counts > 0].reset_index(name="Count")
     
     fig = px.treemap(
         cat_counts,
@@ -170,16 +303,20 @@ def create_category_treemap(df):
     )
     return fig
 
-def create_top_repos_chart(df, top_n=10):
-    """Top repositories horizontal bar chart"""
-    if df.empty:
+def create_top_repos_chart(df, top_n=10, counts=None):
+    """
+    Top repositories horizontal bar chart
+
+    Finding counts per repository, largest first, can be passed as counts
+    instead of counting df.
+    """
+    top_repos = (df["Repo/Account"].value_counts() if counts is None else counts).head(top_n)
+    if top_repos.sum() == 0:
         fig = go.Figure()
         fig.add_annotation(text="No data available", x=0.5, y=0.5, showarrow=False)
         fig.update_layout(paper_bgcolor=CYBER_THEME["bg_card"], font_color=CYBER_THEME["text_primary"])
         return fig
     
-    top_repos = df["Repo/Account"].value_counts().head(top_n)
-    
     fig = px.bar(
         x=top_repos.values,
         y=top_repos.index,
@@ -255,18 +392,17 @@ def create_attack_timeline_heatmap(df, time_granularity="W", by="Repo/Account"):
         return fig
 
     try:
-        # Bucket time
+        # Bucket time into a separate Series: df may be the shared dataset
         if time_granularity == "D":
-            df["_bucket"] = df["Opened_At"].dt.date
+            bucket = df["Opened_At"].dt.date
         elif time_granularity == "M":
-            df["_bucket"] = df["Opened_At"].dt.to_period("M").astype(str)
+            bucket = df["Opened_At"].dt.to_period("M").astype(str)
         else:  # week
-            df["_bucket"] = df["Opened_At"].dt.to_period("W").apply(
-                lambda p: p.start_time.date()
-            )
+            bucket = df["Opened_At"].dt.to_period("W").dt.start_time.dt.date
+        bucket = bucket.rename("_bucket")
 
         pivot = (
-            df.groupby([by, "_bucket"])
+            df.groupby([df[by], bucket])
               .size()
               .reset_index(name="Count")
               .pivot(index=by, columns="_bucket", values="Count")
@@ -303,37 +439,89 @@ def create_attack_timeline_heatmap(df, time_granularity="W", by="Repo/Account"):
         fig.update_layout(paper_bgcolor=CYBER_THEME["bg_card"], font_color=CYBER_THEME["text_primary"])
         return fig
 
-def create_custom_chart(df, x_col, y_col, chart_type, color_col=None):
-    """Create custom chart based on user selection"""
-    if df.empty:
+def _create_box_from_stats(stats, x_col, y_col, color_col=None):
+    """Box plot drawn from precomputed quartiles and fences"""
+    fig = go.Figure()
+    if color_col and color_col != "None" and color_col in stats.columns:
+        groups = list(stats.groupby(color_col, sort=True))
+    else:
+        groups = [(None, stats)]
+
+    palette = px.colors.qualitative.Plotly
+    for i, (name, group) in enumerate(groups):
+        color = SEVERITY_COLORS.get(name) if color_col == "Severity" else None
+        fig.add_trace(go.Box(
+            name=str(name) if name is not None else y_col,
+            x=group[x_col].astype(str).tolist(),
+            q1=group["q1"], median=group["median"], q3=group["q3"],
+            lowerfence=group["lowerfence"], upperfence=group["upperfence"],
+            mean=group["mean"],
+            marker_color=color or palette[i % len(palette)],
+            showlegend=name is not None,
+        ))
+    fig.update_layout(boxmode="group", xaxis_title=x_col, yaxis_title=y_col)
+    return fig
+
+def create_custom_chart(df, x_col, y_col, chart_type, color_col=None, agg="sum",
+                        x_range=None, y_range=None, plan=None):
+    """
+    Create custom chart based on user selection
+
+    Numeric y columns are aggregated server-side (see AGGREGATIONS) and box
+    plots are drawn from precomputed statistics, so figure size depends on the
+    number of groups rather than the number of findings. Large scatter plots
+    are thinned per pixel and drawn with WebGL; x_range/y_range re-sample a
+    zoomed window. A shared GroupByPlan lets several charts reuse groupings;
+    with a plan, df may be None and is only read for scatter and box charts.
+    """
+    plan = plan or GroupByPlan(df)
+    if plan.empty:
         fig = go.Figure()
         fig.add_annotation(text="No data available", x=0.5, y=0.5, showarrow=False)
         fig.update_layout(paper_bgcolor=CYBER_THEME["bg_card"], font_color=CYBER_THEME["text_primary"])
         return fig
     
+    color = color_col if color_col and color_col != "None" else None
+    
     if chart_type == "bar":
         if y_col == "count":
-            data = df[x_col].value_counts().reset_index()
+            data = plan.counts(x_col).reset_index()
             data.columns = [x_col, "Count"]
-            fig = px.bar(data, x=x_col, y="Count", color=color_col if color_col and color_col != "None" else None)
+            fig = px.bar(data, x=x_col, y="Count", color=color)
         else:
-            fig = px.bar(df, x=x_col, y=y_col, color=color_col if color_col and color_col != "None" else None)
+            data = plan.aggregate(x_col, y_col, agg, color)
+            fig = px.bar(data, x=x_col, y=y_col, color=color if color in data.columns else None)
     
     elif chart_type == "line":
         if y_col == "count":
-            data = df.groupby(x_col).size().reset_index(name="Count")
+            data = plan.counts(x_col).sort_index().reset_index(name="Count")
             fig = px.line(data, x=x_col, y="Count", markers=True)
         else:
-            fig = px.line(df, x=x_col, y=y_col, markers=True)
+            data = plan.aggregate(x_col, y_col, agg)
+            fig = px.line(data, x=x_col, y=y_col, markers=True)
     
     elif chart_type == "scatter":
-        fig = px.scatter(df, x=x_col, y=y_col, color=color_col if color_col and color_col != "None" else None)
+        df = plan.df
+        large = len(df) > LARGE_CHART_POINT_THRESHOLD
+        data = df
+        if large:
+            data = downsample_scatter(df, x_col, y_col, color, x_range, y_range,
+                                      max_points=LARGE_CHART_POINT_THRESHOLD)
+        fig = px.scatter(data, x=x_col, y=y_col, color=color,
+                         render_mode="webgl" if large else "auto")
+        if large:
+            fig.update_layout(uirevision="scatter")
+            if x_range is not None:
+                fig.update_xaxes(range=list(x_range))
+            if y_range is not None:
+                fig.update_yaxes(range=list(y_range))
     
     elif chart_type == "box":
-        fig = px.box(df, x=x_col, y=y_col, color=color_col if color_col and color_col != "None" else None)
+        stats = box_statistics(plan.df, x_col, y_col, color, plan=plan)
+        fig = _create_box_from_stats(stats, x_col, y_col, color)
     
     else:  # pie
-        data = df[x_col].value_counts()
+        data = plan.counts(x_col)
         fig = px.pie(values=data.values, names=data.index)
     
     fig.update_layout(
@@ -343,4 +531,4 @@ def create_custom_chart(df, x_col, y_col, chart_type, color_col=None):
         margin=dict(t=50, b=50, l=50, r=20),
         height=400
     )
-    return fig
\ No newline at end of file
+    return fig
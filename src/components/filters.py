@@ -29,6 +29,24 @@ def create_dropdown_filter(filter_id: str, label: str, options: list,
         )
     ], className="filter-container", style={"marginBottom": "16px"})
 
+def create_facet_options(counts: dict, selected: list = None) -> list:
+    """
+    Build dropdown options labelled with live finding counts
+
+    Args:
+        counts: Ordered mapping of value to count under the other filters
+        selected: Currently selected values, kept even when their count is 0
+
+    Returns:
+        list: Dropdown options
+    """
+    options = [{"label": f"{value} ({count})", "value": value}
+               for value, count in counts.items()]
+    for value in selected or []:
+        if value not in counts:
+            options.append({"label": f"{value} (0)", "value": value})
+    return options
+
 def create_filter_section(filter_options: dict) -> html.Div:
     """
     Create the complete filter section with all dropdowns
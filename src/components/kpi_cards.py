@@ -3,7 +3,8 @@ KPI Card UI components
 """
 from dash import html
 
-def create_kpi_card(title: str, value: str, trend: str = None, card_id: str = None) -> html.Div:
+def create_kpi_card(title: str, value: str, trend: str = None, card_id: str = None,
+                    trend_id: str = None) -> html.Div:
     """
     Create a KPI card component
 
@@ -12,6 +13,7 @@ def create_kpi_card(title: str, value: str, trend: str = None, card_id: str = No
         value: Main KPI value to display
         trend: Optional trend indicator
         card_id: Optional HTML id for the card
+        trend_id: Optional HTML id for the trend line (always rendered when set)
 
     Returns:
         html.Div: KPI card component
@@ -21,7 +23,9 @@ def create_kpi_card(title: str, value: str, trend: str = None, card_id: str = No
         html.Div(value, className="kpi-value", id=card_id)
     ]
 
-    if trend:
+    if trend_id:
+        children.append(html.Div(trend, className="kpi-trend", id=trend_id))
+    elif trend:
         children.append(html.Div(trend, className="kpi-trend"))
 
     return html.Div(children, className="kpi-card")
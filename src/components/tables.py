@@ -1,22 +1,49 @@
 """
 Table components
 """
-from dash import dash_table
+from dash import dash_table, dcc, html
 from config.theme import CYBER_THEME
+from src.utils.transport import encode_columnar
+from src.data.export import EXPORT_FORMATS
 
-def create_findings_table(df):
-    """Create interactive findings data table"""
+# Rows per findings table page
+FINDINGS_PAGE_SIZE = 20
+
+def create_findings_table(df, data_version: str = None):
+    """
+    Create interactive findings data table
+
+    Args:
+        df: Findings to list, indexed by row position in the loaded dataset
+        data_version: Load the row positions belong to, used to resolve links
+    """
     
     display_columns = [
         "Source", "Category", "Severity", "Status", 
-        "Assigned_Team", "Repo/Account", "Opened_At", "MTTR_Hours"
+        "Assigned_Team", "Repo/Account", "Opened_At", "MTTR_Hours",
+        "Correlated_Sources"
     ]
+    display_columns = [col for col in display_columns if col in df.columns]
     
+    # Rows travel column-oriented and are expanded into records in the browser.
+    # Row_Id (hidden) lets the link column be filled for visible rows only;
+    # Row_Ids are positions in the load identified by data_version.
+    payload = encode_columnar(df[display_columns].assign(Row_Id=df.index))
+    return html.Div([
+        dcc.Store(id="findings-table-payload", data=payload),
+        dcc.Store(id="findings-table-version", data=data_version),
+        _findings_data_table(display_columns)
+    ])
+
+def _findings_data_table(display_columns):
+    """Findings DataTable shell; data is filled in client-side"""
+    columns = [{"name": col, "id": col} for col in display_columns]
+    columns.append({"name": "Link", "id": "View_Link", "presentation": "markdown"})
     return dash_table.DataTable(
         id="findings-table",
-        columns=[{"name": col, "id": col} for col in display_columns],
-        data=df[display_columns].to_dict("records"),
-        page_size=20,
+        columns=columns,
+        data=[],
+        page_size=FINDINGS_PAGE_SIZE,
         filter_action="native",
         sort_action="native",
         style_table={"overflowX": "auto"},
@@ -43,4 +70,53 @@ def create_findings_table(df):
             }
         ]
     )
- 
\ No newline at end of file
+ 
+
+def create_export_links(query=""):
+    """Download links for the current table selection, one per export format"""
+    
+    links = [html.Span("⬇ Export:", style={"color": CYBER_THEME["text_muted"], "marginRight": "8px"})]
+    for fmt in EXPORT_FORMATS:
+        links.append(html.A(
+            fmt.upper(),
+            href=f"/export/findings.{fmt}?{query}" if query else f"/export/findings.{fmt}",
+            download=f"findings.{fmt}",
+            style={"color": CYBER_THEME["accent"], "marginRight": "12px", "fontSize": "13px"}
+        ))
+    return links
+
+
+def create_sla_table(df):
+    """Create compact table of open findings closest to breaching their SLA"""
+    
+    display_columns = [
+        "Severity", "Category", "Assigned_Team", "Repo/Account",
+        "Opened_At", "Age_Hours", "Hours_Remaining"
+    ]
+    display_columns = [col for col in display_columns if col in df.columns]
+    
+    return dash_table.DataTable(
+        id="sla-breach-table",
+        columns=[{"name": col, "id": col} for col in display_columns],
+        data=df[display_columns].to_dict("records"),
+        page_size=10,
+        style_table={"overflowX": "auto"},
+        style_cell={
+            "backgroundColor": CYBER_THEME["bg_card"],
+            "color": CYBER_THEME["text_primary"],
+            "border": f"1px solid {CYBER_THEME['border_glow']}",
+            "textAlign": "left",
+            "padding": "8px"
+        },
+        style_header={
+            "backgroundColor": CYBER_THEME["bg_main"],
+            "fontWeight": "bold",
+            "border": f"1px solid {CYBER_THEME['border_glow']}"
+        },
+        style_data_conditional=[
+            {
+                "if": {"filter_query": "{Hours_Remaining} < 4"},
+                "backgroundColor": "rgba(239, 68, 68, 0.1)",
+            }
+        ]
+    )
@@ -0,0 +1,141 @@
+"""
+Server-side aggregations for the custom chart builder
+"""
+import pandas as pd
+
+# Builder aggregate name -> label shown in the UI
+AGGREGATIONS = {
+    "sum": "Sum",
+    "mean": "Mean",
+    "median": "Median",
+    "p95": "95th Percentile",
+}
+
+
+def _group_keys(x_col: str, color_col: str = None) -> list:
+    """Grouping columns for a chart, skipping a color equal to the x axis"""
+    keys = [x_col]
+    if color_col and color_col != "None" and color_col != x_col:
+        keys.append(color_col)
+    return keys
+
+
+class GroupByPlan:
+    """
+    Shared groupings for rendering several builder charts over one frame
+
+    Charts grouping by the same columns reuse one pandas GroupBy (so the keys
+    are factorized once), and identical aggregates are computed only once.
+
+    Args:
+        df: Filtered findings DataFrame all charts are drawn from
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._groupbys = {}
+        self._results = {}
+
+    def groupby(self, keys: list):
+        """GroupBy over keys, created on first use"""
+        key = tuple(keys)
+        if key not in self._groupbys:
+            self._groupbys[key] = self.df.groupby(list(keys), observed=True)
+        return self._groupbys[key]
+
+    def memo(self, name: str, keys: list, compute):
+        """Return compute() cached under (name, keys)"""
+        key = (name, tuple(keys))
+        if key not in self._results:
+            self._results[key] = compute()
+        return self._results[key]
+
+    def counts(self, x_col: str) -> pd.Series:
+        """Finding count per x value, largest first"""
+        return self.memo("count", [x_col],
+                         lambda: self.groupby([x_col]).size().sort_values(ascending=False))
+
+    def aggregate(self, x_col: str, y_col: str, agg: str = "sum", color_col: str = None) -> pd.DataFrame:
+        """aggregate_by over the plan's frame"""
+        return aggregate_by(self.df, x_col, y_col, agg, color_col, plan=self)
+
+    @property
+    def empty(self) -> bool:
+        """Whether there are no findings to chart"""
+        return self.df.empty
+
+
+def aggregate_by(df: pd.DataFrame, x_col: str, y_col: str, agg: str = "sum",
+                 color_col: str = None, plan: GroupByPlan = None) -> pd.DataFrame:
+    """
+    Reduce a numeric column to one value per x (and color) group
+
+    Args:
+        df: Filtered findings DataFrame
+        x_col: Grouping column for the x axis
+        y_col: Numeric column to aggregate
+        agg: One of AGGREGATIONS
+        color_col: Optional second grouping column
+        plan: Optional GroupByPlan shared with other charts over df
+
+    Returns:
+        pd.DataFrame: One row per group with the aggregate in y_col
+    """
+    plan = plan or GroupByPlan(df)
+    keys = _group_keys(x_col, color_col)
+
+    def compute():
+        grouped = plan.groupby(keys)[y_col]
+        if agg == "p95":
+            result = grouped.quantile(0.95)
+        elif agg in ("mean", "median"):
+            result = grouped.agg(agg)
+        else:
+            result = grouped.sum()
+        return result.reset_index().sort_values(x_col)
+
+    return plan.memo(f"{agg}:{y_col}", keys, compute)
+
+
+def box_statistics(df: pd.DataFrame, x_col: str, y_col: str,
+                   color_col: str = None, plan: GroupByPlan = None) -> pd.DataFrame:
+    """
+    Precompute box-plot statistics per group
+
+    Whiskers follow the Tukey convention: the most extreme values still
+    within 1.5 IQR of the quartiles.
+
+    Args:
+        df: Filtered findings DataFrame
+        x_col: Grouping column for the x axis
+        y_col: Numeric column to summarise
+        color_col: Optional second grouping column
+        plan: Optional GroupByPlan shared with other charts over df
+
+    Returns:
+        pd.DataFrame: One row per group with q1, median, q3, lowerfence,
+        upperfence, mean and count columns
+    """
+    keys = _group_keys(x_col, color_col)
+    if plan is not None:
+        return plan.memo(f"box:{y_col}", keys,
+                         lambda: box_statistics(df, x_col, y_col, color_col))
+
+    data = df[keys + [y_col]].dropna(subset=[y_col])
+    grouped = data.groupby(keys, observed=True)[y_col]
+
+    stats = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+    stats.columns = ["q1", "median", "q3"]
+    stats["mean"] = grouped.mean()
+    stats["count"] = grouped.size()
+
+    iqr = stats["q3"] - stats["q1"]
+    bounds = pd.DataFrame({"lo": stats["q1"] - 1.5 * iqr, "hi": stats["q3"] + 1.5 * iqr})
+    joined = data.join(bounds, on=keys)
+    values = joined[y_col]
+    inside = joined[(values >= joined["lo"]) & (values <= joined["hi"])]
+    inside_grouped = inside.groupby(keys, observed=True)[y_col]
+    stats["lowerfence"] = inside_grouped.min()
+    stats["upperfence"] = inside_grouped.max()
+
+    return stats.reset_index().sort_values(x_col)
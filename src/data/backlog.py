@@ -0,0 +1,152 @@
+"""
+Open backlog over time
+"""
+import numpy as np
+import pandas as pd
+from config.settings import DATA_PATH
+from src.data.cube import get_findings_cube
+from src.data.dedup import CANONICAL_COLUMN
+from src.data.loader import dataset_cached, get_filter_signature, load_security_data
+from src.utils.cache import LRUCache
+from src.utils.helpers import utc_now_naive
+from src.utils.logger import logger
+
+# Statuses of findings that have not been closed yet
+OPEN_STATUSES = ["Open", "In Progress"]
+# Columns the backlog can be split by
+BACKLOG_GROUPS = ["Severity", "Assigned_Team"]
+
+
+class BacklogEngine:
+    """
+    Daily count of open findings, derived from open and close events
+
+    A finding opens on the day of Opened_At and closes on the day of
+    Opened_At + MTTR_Hours. Findings whose status is still open never close
+    within the series. The count at the end of day d is the running sum of
+    +1 (open) and -1 (close) events up to d. Events are bucketed by day, so
+    one query costs O(findings + days x groups). After the last event the
+    count no longer changes, so the series is carried forward to today. A
+    correlation group counts once, through its canonical row.
+
+    Args:
+        df: Findings DataFrame with Opened_At, MTTR_Hours and Status
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.data_version = df.attrs.get("data_version")
+        self._df = df
+        self._codes = {}
+        self.counted = (df[CANONICAL_COLUMN].to_numpy(dtype=bool) if CANONICAL_COLUMN in df.columns
+                        else np.ones(len(df), dtype=bool))
+        if df.empty:
+            self.dates = pd.DatetimeIndex([])
+            self.open_day = self.close_day = np.zeros(0, dtype=np.int64)
+            return
+
+        opened = df["Opened_At"].to_numpy(dtype="datetime64[D]")
+        closed = (df["Opened_At"] + pd.to_timedelta(df["MTTR_Hours"], unit="h")).to_numpy(
+            dtype="datetime64[D]")
+        still_open = df["Status"].isin(OPEN_STATUSES).to_numpy()
+        # A closed finding without MTTR has no known close day: never count it
+        closed = np.where(np.isnat(closed) & ~still_open, opened, closed)
+
+        start = opened.min()
+        end = max(opened.max(), closed[~still_open].max() if (~still_open).any() else opened.max())
+        n_days = int((end - start).astype(np.int64)) + 1
+        self.dates = pd.date_range(pd.Timestamp(start), periods=n_days, freq="D")
+
+        self.open_day = (opened - start).astype(np.int64)
+        self.close_day = (closed - start).astype(np.int64)
+        # Still open: the close event falls one past the last day and is dropped
+        self.close_day[still_open] = n_days
+
+    @property
+    def n_days(self) -> int:
+        return len(self.dates)
+
+    def _group_codes(self, by: str):
+        """Integer codes and labels of a grouping column, factorized once"""
+        if by not in self._codes:
+            codes, labels = pd.factorize(self._df[by], sort=True)
+            self._codes[by] = (codes, list(labels))
+        return self._codes[by]
+
+    def daily_open(self, mask: np.ndarray = None, by: str = None, today=None) -> pd.DataFrame:
+        """
+        Open findings at the end of each day
+
+        Args:
+            mask: Optional boolean row mask selecting the findings to count
+            by: Optional column from BACKLOG_GROUPS to split the count by
+            today: Last day of the series, at least (default: today, UTC)
+
+        Returns:
+            pd.DataFrame: Indexed by date, one column per group (or "Open")
+        """
+        open_day, close_day = self.open_day, self.close_day
+        if by:
+            codes, labels = self._group_codes(by)
+        else:
+            codes, labels = np.zeros(len(open_day), dtype=np.int64), ["Open"]
+        # Rows with a missing group value are left out of a split backlog
+        valid = (codes >= 0) & self.counted
+        if mask is not None:
+            valid &= mask
+        open_day, close_day, codes = open_day[valid], close_day[valid], codes[valid]
+
+        width = self.n_days + 1
+        size = len(labels) * width
+        deltas = (np.bincount(codes * width + open_day, minlength=size)
+                  - np.bincount(codes * width + close_day, minlength=size))
+        counts = np.cumsum(deltas.reshape(len(labels), width), axis=1)[:, :self.n_days]
+        backlog = pd.DataFrame(counts.T, index=self.dates.rename("Date"), columns=labels)
+        today = pd.Timestamp(today if today is not None else utc_now_naive()).normalize()
+        if self.n_days and today > self.dates[-1]:
+            # No events after the last day: the last count holds until today
+            backlog = backlog.reindex(pd.date_range(self.dates[0], today, freq="D", name="Date"),
+                                      method="ffill")
+        return backlog
+
+
+@dataset_cached()
+def get_backlog_engine(filepath: str = DATA_PATH) -> BacklogEngine:
+    """
+    Build (once per data version) the backlog engine for the cached dataset
+
+    Args:
+        filepath: Path to CSV file
+
+    Returns:
+        BacklogEngine: Engine aligned with load_security_data(filepath)
+    """
+    engine = BacklogEngine(load_security_data(filepath))
+    logger.info(f"Built backlog engine over {engine.n_days} days")
+    return engine
+
+
+# (data version, filter signature, by, today) -> daily open counts
+_backlog_cache = LRUCache(maxsize=64)
+
+
+def get_open_backlog(selections: dict, by: str = None, filepath: str = DATA_PATH) -> pd.DataFrame:
+    """
+    Daily open backlog under the active filters, cached per data version
+
+    Args:
+        selections: Mapping of dimension name to selected values
+        by: Optional column from BACKLOG_GROUPS to split the count by
+        filepath: Path to CSV file
+
+    Returns:
+        pd.DataFrame: See BacklogEngine.daily_open
+    """
+    engine = get_backlog_engine(filepath)
+    today = utc_now_naive().normalize()
+    key = (engine.data_version, get_filter_signature(**selections), by, today)
+    backlog = _backlog_cache.get(key)
+    if backlog is None:
+        mask = get_findings_cube(filepath).row_mask(selections) if selections else None
+        backlog = engine.daily_open(mask, by, today)
+        _backlog_cache.set(key, backlog)
+    return backlog
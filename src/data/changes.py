@@ -0,0 +1,219 @@
+"""
+Dataset change notifications, pushed to browsers over Server-Sent Events
+"""
+import json
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from flask import Response, request, stream_with_context
+from config.settings import SSE_KEEPALIVE_SECONDS, SSE_MAX_STREAMS, SSE_STREAM_SECONDS
+from src.data.cube import FILTER_DIMENSIONS
+from src.data.loader import get_data_version
+from src.utils.logger import logger
+
+# Dimension reported when findings were added or removed: affects everything
+ROWS = "rows"
+
+
+def changed_dimensions(old: pd.DataFrame, new: pd.DataFrame) -> list:
+    """
+    Columns whose values differ between two loads of the dataset
+
+    Findings are matched by Finding_Key. If any finding was added or removed
+    the answer is [ROWS]; otherwise it lists the columns that changed (for
+    example ["Status", "MTTR_Hours"] when findings were closed).
+
+    Args:
+        old: Previously loaded findings
+        new: Newly loaded findings
+
+    Returns:
+        list: Changed column names, or [ROWS]
+    """
+    old_keys, new_keys = old["Finding_Key"].to_numpy(), new["Finding_Key"].to_numpy()
+    if len(old_keys) != len(new_keys):
+        return [ROWS]
+    if np.array_equal(old_keys, new_keys):
+        order = np.arange(len(new_keys))
+    else:
+        order = pd.Index(new_keys).get_indexer(old_keys)
+        if (order < 0).any():
+            return [ROWS]
+    return [col for col in old.columns if col in new.columns and col != "Finding_Key"
+            and not old[col].reset_index(drop=True).equals(new[col].iloc[order].reset_index(drop=True))]
+
+
+def is_affected(change: dict, columns, selections: dict = None, windowed: bool = False) -> bool:
+    """
+    Whether a component must refresh after a data change
+
+    Args:
+        change: Change event ({"version": ..., "dimensions": [...]}); an
+            event without dimensions counts as [ROWS], an empty list as no change
+        columns: Columns the component reads
+        selections: Active filter selections; filtered columns affect everything
+        windowed: A date range is active (Opened_At then affects everything)
+
+    Returns:
+        bool: True if any changed dimension reaches the component
+    """
+    change = change or {}
+    dimensions = set(change["dimensions"] if "dimensions" in change else [ROWS])
+    if ROWS in dimensions:
+        return True
+    reached = set(columns) | {FILTER_DIMENSIONS[dim] for dim in (selections or {})}
+    if windowed:
+        reached.add("Opened_At")
+    return bool(dimensions & reached)
+
+
+class ChangeFeed:
+    """
+    Recent dataset versions and what changed, for clients to wait on
+
+    Subscribers block on a condition variable between events, so an idle
+    connection costs a sleeping thread and a periodic keep-alive, not a
+    recomputation.
+
+    Args:
+        history: Number of past events kept for reconnecting clients
+    """
+
+    def __init__(self, history: int = 64):
+        self._events = deque(maxlen=history)
+        self._cond = threading.Condition()
+        self._seq = 0
+
+    def publish(self, version: str, dimensions: list) -> dict:
+        """
+        Announce a new dataset version
+
+        Args:
+            version: New data version
+            dimensions: Changed columns (see changed_dimensions)
+
+        Returns:
+            dict: The event sent to clients
+        """
+        event = {"version": version, "dimensions": list(dimensions)}
+        with self._cond:
+            self._seq += 1
+            self._events.append((self._seq, event))
+            self._cond.notify_all()
+        logger.info(f"Data changed to {version}: {', '.join(dimensions) or 'no columns'}")
+        return event
+
+    @property
+    def seq(self) -> int:
+        """Sequence number of the latest event"""
+        with self._cond:
+            return self._seq
+
+    def since(self, version: str) -> list:
+        """
+        Union of the changes after a version a client has seen
+
+        Args:
+            version: Data version the client last rendered
+
+        Returns:
+            list: Changed dimensions ([ROWS] when the version is unknown)
+        """
+        with self._cond:
+            versions = [event["version"] for _, event in self._events]
+            if version not in versions:
+                return [ROWS]
+            later = [event for _, event in list(self._events)[versions.index(version) + 1:]]
+        return sorted({dim for event in later for dim in event["dimensions"]})
+
+    def wait(self, after: int, timeout: float) -> list:
+        """
+        Events published after a sequence number, waiting up to timeout
+
+        Args:
+            after: Last sequence number seen
+            timeout: Seconds to wait for a new event
+
+        Returns:
+            list: (seq, event) pairs; empty on timeout
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > after, timeout)
+            return [(seq, event) for seq, event in self._events if seq > after]
+
+
+@lru_cache(maxsize=1)
+def get_change_feed() -> ChangeFeed:
+    """Process-wide change feed"""
+    return ChangeFeed()
+
+
+def publish_data_change(old: pd.DataFrame, new: pd.DataFrame) -> dict:
+    """
+    Tell connected clients that the dataset was reloaded
+
+    Args:
+        old: Findings before the reload
+        new: Findings after the reload
+
+    Returns:
+        dict: The published event
+    """
+    return get_change_feed().publish(new.attrs["data_version"], changed_dimensions(old, new))
+
+
+def _sse(event: dict) -> str:
+    """One Server-Sent Event; its id is the data version"""
+    return f"id: {event['version']}\nevent: data-change\ndata: {json.dumps(event)}\n\n"
+
+
+def register_change_stream(server):
+    """
+    Add GET /events/data-changes, a Server-Sent Events stream of data changes
+
+    A client passes the version it rendered (?version=, or Last-Event-ID
+    when the browser reconnects) and is sent the changes it missed at once,
+    then one event per reload.
+
+    Each open stream holds a server thread, so a worker serves at most
+    SSE_MAX_STREAMS of them (others get 503 and retry later), and a stream
+    ends after SSE_STREAM_SECONDS; the browser then reconnects and catches
+    up through Last-Event-ID. Streams of closed tabs are thereby released
+    even when no write ever fails.
+
+    Args:
+        server: Flask app (Dash's app.server)
+    """
+    streams = threading.BoundedSemaphore(SSE_MAX_STREAMS)
+
+    @server.route("/events/data-changes")
+    def data_change_stream():
+        feed = get_change_feed()
+        known = request.headers.get("Last-Event-ID") or request.args.get("version")
+        after = feed.seq
+        current = get_data_version()
+
+        def stream():
+            yield f"retry: {int(SSE_KEEPALIVE_SECONDS * 1000)}\n\n"
+            if known and known != current:
+                yield _sse({"version": current, "dimensions": feed.since(known)})
+            last = after
+            deadline = time.monotonic() + SSE_STREAM_SECONDS
+            while time.monotonic() < deadline:
+                events = feed.wait(last, max(0.0, min(SSE_KEEPALIVE_SECONDS, deadline - time.monotonic())))
+                if not events:
+                    yield ": keep-alive\n\n"
+                for last, event in events:
+                    yield _sse(event)
+
+        if not streams.acquire(blocking=False):
+            return Response("Too many open event streams\n", status=503, mimetype="text/plain",
+                            headers={"Retry-After": str(max(1, round(SSE_KEEPALIVE_SECONDS)))})
+        response = Response(stream_with_context(stream()), mimetype="text/event-stream",
+                            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+        # Called by the WSGI server once the stream ends or the client is gone
+        response.call_on_close(streams.release)
+        return response
@@ -0,0 +1,215 @@
+"""
+Pre-aggregated filter cube for faceted filtering
+"""
+import numpy as np
+import pandas as pd
+from functools import cached_property
+from config.settings import DATA_PATH
+from src.data.dedup import CANONICAL_COLUMN
+from src.data.loader import dataset_cached, load_security_data
+from src.utils.helpers import get_severity_order
+from src.utils.logger import logger
+
+# Filter argument name -> DataFrame column, in dropdown order
+FILTER_DIMENSIONS = {
+    "source": "Source",
+    "severity": "Severity",
+    "status": "Status",
+    "team": "Assigned_Team",
+    "repo": "Repo/Account",
+}
+
+
+def _encode_dimension(series: pd.Series, order: list = None):
+    """
+    Dictionary-encode a dimension column into integer codes
+
+    Missing values get the extra code ``len(categories)`` so they never match
+    a selection but still land in a cube cell.
+
+    Args:
+        series: Column to encode
+        order: Optional preferred ordering of categories
+
+    Returns:
+        tuple: (codes as int32 array, list of categories)
+    """
+    present = series.dropna().unique().tolist()
+    if order:
+        categories = [v for v in order if v in present]
+        categories += sorted(v for v in present if v not in order)
+    else:
+        categories = sorted(present)
+    codes = pd.Categorical(series, categories=categories).codes.astype(np.int32)
+    codes[codes < 0] = len(categories)
+    return codes, categories
+
+
+class FindingsCube:
+    """
+    Count cube over the five filter dimensions.
+
+    Every finding is mapped to one cell (a unique combination of
+    source/severity/status/team/repo). Filter masks and facet counts are then
+    evaluated over cells instead of rows, so their cost depends on the number
+    of distinct combinations rather than on the number of findings.
+
+    Cell counts take one row per correlation group (see counted_findings);
+    ``counted`` marks those rows, while row masks cover every row.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.dimensions = list(FILTER_DIMENSIONS)
+        self.categories = {}
+        self.lookup = {}
+        row_codes = []
+        for dim, column in FILTER_DIMENSIONS.items():
+            order = get_severity_order() if dim == "severity" else None
+            codes, categories = _encode_dimension(df[column], order)
+            self.categories[dim] = categories
+            self.lookup[dim] = {value: i for i, value in enumerate(categories)}
+            row_codes.append(codes)
+
+        # Mixed-radix key: one int64 per row identifying its cell
+        radices = [len(self.categories[dim]) + 1 for dim in self.dimensions]
+        key = np.zeros(len(df), dtype=np.int64)
+        for codes, radix in zip(row_codes, radices):
+            key = key * radix + codes
+
+        cell_keys, self.row_cell = np.unique(key, return_inverse=True)
+        self.row_cell = self.row_cell.astype(np.int64).ravel()
+        if CANONICAL_COLUMN in df.columns:
+            self.counted = df[CANONICAL_COLUMN].to_numpy(dtype=bool)
+        else:
+            self.counted = np.ones(len(df), dtype=bool)
+        self.cell_counts = np.bincount(self.row_cell[self.counted],
+                                       minlength=len(cell_keys)).astype(np.int64)
+
+        # Decode cell keys back into one code column per dimension
+        self.cell_codes = {}
+        for dim, radix in zip(reversed(self.dimensions), reversed(radices)):
+            cell_keys, codes = np.divmod(cell_keys, radix)
+            self.cell_codes[dim] = codes
+
+        logger.info(f"Built filter cube: {len(self.cell_counts)} cells over {len(df)} findings")
+
+    @property
+    def n_cells(self) -> int:
+        return len(self.cell_counts)
+
+    @cached_property
+    def marginals(self) -> dict:
+        """Unfiltered counts per value of every dimension"""
+        return {dim: self._count_by(dim) for dim in self.dimensions}
+
+    def _count_by(self, dim: str, mask: np.ndarray = None) -> np.ndarray:
+        """Finding counts per category code of one dimension over masked cells"""
+        codes, weights = self.cell_codes[dim], self.cell_counts
+        if mask is not None:
+            codes, weights = codes[mask], weights[mask]
+        n = len(self.categories[dim])
+        return np.bincount(codes, weights=weights, minlength=n + 1)[:n]
+
+    def _allowed(self, dim: str, selected) -> np.ndarray:
+        """Boolean lookup table over the codes of one dimension"""
+        allowed = np.zeros(len(self.categories[dim]) + 1, dtype=bool)
+        codes = [self.lookup[dim][v] for v in selected if v in self.lookup[dim]]
+        allowed[codes] = True
+        return allowed
+
+    def cell_mask(self, selections: dict, exclude: str = None) -> np.ndarray:
+        """
+        Boolean mask over cells matching the active selections
+
+        Args:
+            selections: Mapping of dimension name to list of selected values
+            exclude: Optional dimension to ignore (used for facet counts)
+
+        Returns:
+            np.ndarray: Boolean mask of length n_cells
+        """
+        mask = np.ones(self.n_cells, dtype=bool)
+        for dim in self.dimensions:
+            selected = selections.get(dim)
+            if dim == exclude or not selected:
+                continue
+            mask &= self._allowed(dim, selected)[self.cell_codes[dim]]
+        return mask
+
+    def row_mask(self, selections: dict, rows: slice = None) -> np.ndarray:
+        """
+        Boolean mask over rows matching the active selections
+
+        Args:
+            selections: Mapping of dimension name to list of selected values
+            rows: Optional contiguous row range (e.g. a time window); rows
+                outside it are False and are never looked at
+
+        Returns:
+            np.ndarray: Boolean mask aligned with the source DataFrame
+        """
+        if rows is None:
+            return self.cell_mask(selections)[self.row_cell]
+        mask = np.zeros(len(self.row_cell), dtype=bool)
+        mask[rows] = self.cell_mask(selections)[self.row_cell[rows]]
+        return mask
+
+    def facet_counts(self, selections: dict) -> dict:
+        """
+        Count findings per value of every dimension under the other filters
+
+        Each dimension is counted with its own selection ignored, so a
+        dropdown keeps listing the alternatives the user could still pick.
+
+        Args:
+            selections: Mapping of dimension name to list of selected values
+
+        Returns:
+            dict: {dimension: {value: count}} for values with count > 0
+        """
+        # One mask per active dimension, combined leaving each one out in turn
+        dim_masks = {
+            dim: self._allowed(dim, selections[dim])[self.cell_codes[dim]]
+            for dim in self.dimensions if selections.get(dim)
+        }
+
+        facets = {}
+        for dim in self.dimensions:
+            others = [m for d, m in dim_masks.items() if d != dim]
+            if others:
+                mask = np.logical_and.reduce(others)
+                counts = self._count_by(dim, mask)
+            else:
+                counts = self.marginals[dim]
+            facets[dim] = {
+                value: int(count)
+                for value, count in zip(self.categories[dim], counts)
+                if count > 0
+            }
+        return facets
+
+
+def get_selections(source=None, severity=None, status=None, team=None, repo=None) -> dict:
+    """
+    Bundle filter dropdown values into a selections mapping
+
+    Returns:
+        dict: Mapping of dimension name to selected values (empty lists dropped)
+    """
+    raw = {"source": source, "severity": severity, "status": status,
+           "team": team, "repo": repo}
+    return {dim: list(values) for dim, values in raw.items() if values}
+
+
+@dataset_cached()
+def get_findings_cube(filepath: str = DATA_PATH) -> FindingsCube:
+    """
+    Build (once per data version) the filter cube for the cached dataset
+
+    Args:
+        filepath: Path to CSV file
+
+    Returns:
+        FindingsCube: Cube aligned with load_security_data(filepath)
+    """
+    return FindingsCube(load_security_data(filepath))
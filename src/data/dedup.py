@@ -0,0 +1,274 @@
+"""
+Finding deduplication and cross-source correlation
+"""
+import numpy as np
+import pandas as pd
+from src.utils.logger import logger
+
+# Normalized columns identifying one finding for exact deduplication. Only a
+# tool URL tells findings apart, so rows without one are never duplicates.
+FINDING_KEY = ["Source", "Repo/Account", "Category", "tool_url"]
+# Columns a cross-tool match must agree on (the blocking key)
+CORRELATION_BLOCK = ["Repo/Account", "Category"]
+# Columns holding a precomputed FINDING_KEY hash (see add_finding_hashes)
+HASH_COLUMNS = ["Finding_Hash", "Has_URL"]
+# Column marking the one row counted per correlation group (see counted_findings)
+CANONICAL_COLUMN = "Is_Canonical"
+
+
+def normalize_text(series: pd.Series) -> pd.Series:
+    """Case- and whitespace-insensitive form of a text column"""
+    return series.fillna("").astype(str).str.strip().str.lower()
+
+
+def normalize_url(series: pd.Series) -> pd.Series:
+    """Tool URL without surrounding whitespace, query string, fragment or trailing slashes"""
+    urls = series.fillna("").astype(str).str.strip()
+    # Cheap literal checks first; the regex only runs on URLs that need it
+    dirty = (urls.str.contains("?", regex=False) | urls.str.contains("#", regex=False)
+             | urls.str.endswith("/"))
+    if dirty.any():
+        urls = urls.copy()
+        urls[dirty] = urls[dirty].str.replace(r"[?#].*$", "", regex=True).str.rstrip("/")
+    return urls
+
+
+def _normalized_hashes(series: pd.Series) -> np.ndarray:
+    """
+    uint64 hash of each row's normalized value
+
+    Values are normalized and hashed once per distinct value, so the hashes
+    agree across chunks and across loads.
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    normalize = normalize_url if series.name == "tool_url" else normalize_text
+    return pd.util.hash_array(normalize(pd.Series(uniques, dtype=object)).to_numpy(dtype=object))[codes]
+
+
+# Hash of a missing or blank tool URL
+_NO_URL = pd.util.hash_array(np.array([""], dtype=object))[0]
+
+
+def _normalized_key(df: pd.DataFrame, columns: list) -> np.ndarray:
+    """uint64 hash of the normalized values of columns, per row"""
+    hashes = pd.DataFrame({col: _normalized_hashes(df[col]) for col in columns if col in df.columns})
+    return pd.util.hash_pandas_object(hashes, index=False).to_numpy()
+
+
+def _finding_key(df: pd.DataFrame):
+    """
+    Normalized FINDING_KEY hash per row, and whether the row has a tool URL
+
+    Returns:
+        tuple: (uint64 key per row, boolean mask of rows with a tool URL)
+    """
+    if HASH_COLUMNS[0] in df.columns:
+        return df[HASH_COLUMNS[0]].to_numpy(), df[HASH_COLUMNS[1]].to_numpy()
+    key = _normalized_key(df, FINDING_KEY)
+    if "tool_url" not in df.columns:
+        return key, np.zeros(len(df), dtype=bool)
+    return key, _normalized_hashes(df["tool_url"]) != _NO_URL
+
+
+def add_finding_hashes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Attach the FINDING_KEY hash of each row as HASH_COLUMNS
+
+    Deduplication and finding_keys reuse the columns instead of normalizing
+    and hashing the text again, so rows kept between loads are hashed once.
+
+    Args:
+        df: Findings DataFrame
+
+    Returns:
+        pd.DataFrame: df with the HASH_COLUMNS added
+    """
+    key, has_url = _finding_key(df)
+    return df.assign(**dict(zip(HASH_COLUMNS, (key, has_url))))
+
+
+def find_exact_duplicates(df: pd.DataFrame) -> np.ndarray:
+    """
+    Rows repeating an earlier finding's normalized key
+
+    Rows without a tool URL are never flagged: nothing distinguishes two
+    different findings of the same source, repo and category in that case.
+
+    Args:
+        df: Findings DataFrame
+
+    Returns:
+        np.ndarray: Boolean mask, True for every occurrence after the first
+    """
+    key, has_url = _finding_key(df)
+    return pd.Series(key).duplicated(keep="first").to_numpy() & has_url
+
+
+def finding_keys(df: pd.DataFrame) -> np.ndarray:
+    """
+    Stable 64-bit identity per finding
+
+    A finding with a tool URL is identified by its normalized FINDING_KEY,
+    which is unique once duplicates are dropped. One without a URL adds its
+    Opened_At and its occurrence number among otherwise identical rows, so
+    distinct findings never share a key.
+
+    Args:
+        df: Deduplicated findings with parsed Opened_At
+
+    Returns:
+        np.ndarray: uint64 key per row
+    """
+    key, has_url = _finding_key(df)
+    if has_url.all():
+        return key
+    rows = np.flatnonzero(~has_url)
+    extra = pd.DataFrame({
+        "key": key[rows],
+        "opened": df["Opened_At"].to_numpy(dtype="datetime64[ns]")[rows].astype(np.int64),
+    })
+    extra["occurrence"] = extra.groupby(["key", "opened"]).cumcount().to_numpy()
+    key = key.copy()
+    key[rows] = pd.util.hash_pandas_object(extra, index=False).to_numpy()
+    return key
+
+
+def correlate_findings(df: pd.DataFrame, window_hours: float) -> np.ndarray:
+    """
+    Group findings that different tools reported for the same issue
+
+    Rows are blocked on the normalized CORRELATION_BLOCK columns and sorted by
+    Opened_At. Within a block, findings less than window_hours apart form a
+    run. Inside a run the n-th finding of each source is paired with the n-th
+    finding of every other source. A pair only counts if all its members fall
+    inside one window. Cost is one sort plus linear passes; no pairwise
+    comparison.
+
+    Args:
+        df: Findings DataFrame
+        window_hours: Maximum spread of Opened_At within a correlated group
+
+    Returns:
+        np.ndarray: Correlation group id per row, -1 for uncorrelated rows
+    """
+    n = len(df)
+    if n == 0:
+        return np.full(0, -1, dtype=np.int64)
+
+    block = pd.factorize(_normalized_key(df, CORRELATION_BLOCK))[0]
+    opened = df["Opened_At"].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    order = np.lexsort((opened, block))
+
+    sorted_block, sorted_time = block[order], opened[order]
+    window = int(window_hours * 3600 * 1e9)
+    new_run = np.ones(n, dtype=bool)
+    new_run[1:] = (sorted_block[1:] != sorted_block[:-1]) | (np.diff(sorted_time) > window)
+    run = np.cumsum(new_run)
+
+    sources = pd.factorize(df["Source"].to_numpy()[order])[0]
+    rank = pd.DataFrame({"run": run, "source": sources}).groupby(["run", "source"]).cumcount()
+    pairs = pd.DataFrame({"run": run, "rank": rank.to_numpy(), "time": sorted_time})
+    grouped = pairs.groupby(["run", "rank"], sort=False)
+    group = grouped.ngroup().to_numpy()
+    size = grouped["time"].transform("size").to_numpy()
+    spread = (grouped["time"].transform("max") - grouped["time"].transform("min")).to_numpy()
+
+    correlated = (size > 1) & (spread <= window)
+    result = np.full(n, -1, dtype=np.int64)
+    result[order[correlated]] = group[correlated]
+    return result
+
+
+def canonical_rows(df: pd.DataFrame, correlation: np.ndarray) -> np.ndarray:
+    """
+    Rows standing for their correlation group in counts
+
+    Args:
+        df: Findings DataFrame with parsed Opened_At
+        correlation: Group id per row from correlate_findings
+
+    Returns:
+        np.ndarray: Boolean mask, True for uncorrelated rows and for the
+        earliest-opened member of each group (the first in row order on ties)
+    """
+    canonical = correlation < 0
+    linked = np.flatnonzero(~canonical)
+    if len(linked) > 0:
+        opened = df["Opened_At"].to_numpy(dtype="datetime64[ns]")[linked]
+        order = np.lexsort((linked, opened, correlation[linked]))
+        group = correlation[linked][order]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = group[1:] != group[:-1]
+        canonical[linked[order[first]]] = True
+    return canonical
+
+
+def counted_findings(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    View of the findings that counts each correlation group once
+
+    KPIs, the risk score and chart counts use this view; tables and exports
+    keep every row, with the group links for drill-down.
+
+    Args:
+        df: Findings DataFrame, possibly without CANONICAL_COLUMN
+
+    Returns:
+        pd.DataFrame: The canonical rows of df (df itself when all are)
+    """
+    if CANONICAL_COLUMN not in df.columns:
+        return df
+    canonical = df[CANONICAL_COLUMN].to_numpy(dtype=bool)
+    return df if canonical.all() else df[canonical]
+
+
+def deduplicate_findings(df: pd.DataFrame, correlate: bool = True,
+                         window_hours: float = 24):
+    """
+    Build the deduplicated view of the findings
+
+    Exact duplicates (same normalized source, repo/account, category and
+    non-empty tool URL) are dropped. With correlate=True, findings that
+    different tools reported for the same issue are linked, not merged:
+    every member keeps its row and gets the group's Correlation_Id and
+    Correlated_Sources. The earliest-opened member of each group (and every
+    uncorrelated row) is flagged in CANONICAL_COLUMN, so counts can take one
+    row per group (see counted_findings).
+
+    Args:
+        df: Validated findings DataFrame
+        correlate: Whether to link cross-source matches
+        window_hours: Correlation window, see correlate_findings
+
+    Returns:
+        tuple: (deduplicated view, dropped duplicates with a Reason column)
+    """
+    exact = find_exact_duplicates(df)
+    duplicates = df[exact].assign(Reason="DUPLICATE")
+    view = df[~exact] if exact.any() else df
+
+    correlation = np.full(len(view), -1, dtype=np.int64)
+    if correlate:
+        correlation = correlate_findings(view, window_hours)
+
+    view = view.assign(Correlation_Id=correlation, Correlated_Sources="",
+                       **{CANONICAL_COLUMN: canonical_rows(view, correlation)})
+    linked = np.flatnonzero(correlation >= 0)
+    if len(linked) > 0:
+        groups, group_idx = np.unique(correlation[linked], return_inverse=True)
+        # Sources per group as a bitmask, then one label per distinct mask
+        source_codes, source_names = pd.factorize(view["Source"].to_numpy()[linked])
+        masks = np.zeros(len(groups), dtype=np.int64)
+        np.bitwise_or.at(masks, group_idx, np.left_shift(1, source_codes).astype(np.int64))
+        labels = {
+            int(mask): ", ".join(sorted(str(name) for i, name in enumerate(source_names) if mask >> i & 1))
+            for mask in np.unique(masks)
+        }
+        view.iloc[linked, view.columns.get_loc("Correlated_Sources")] = [
+            labels[int(mask)] for mask in masks[group_idx]
+        ]
+        logger.info(f"Linked {len(linked)} findings into {len(groups)} cross-source groups")
+
+    if len(duplicates) > 0:
+        logger.info(f"Deduplication dropped {len(duplicates)} duplicate findings")
+    return view, duplicates
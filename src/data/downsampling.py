@@ -0,0 +1,163 @@
+"""
+Server-side downsampling for large scatter and line charts
+"""
+import numpy as np
+import pandas as pd
+
+
+def _as_float(values) -> np.ndarray:
+    """Numeric view of numeric or datetime values (datetimes as ns, NaT as NaN)"""
+    values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        stamps = values.to_numpy(dtype="datetime64[ns]")
+        result = stamps.astype(np.int64).astype(float)
+        result[np.isnat(stamps)] = np.nan
+        return result
+    return values.to_numpy(dtype=float)
+
+
+def _pixel_bins(values: np.ndarray, n_bins: int) -> np.ndarray:
+    """Map values linearly onto n_bins integer pixel positions"""
+    span = values.max() - values.min()
+    if span == 0:
+        return np.zeros(len(values), dtype=np.int64)
+    return ((values - values.min()) / span * (n_bins - 1)).astype(np.int64)
+
+
+def parse_axis_range(relayout_data: dict, axis: str = "xaxis"):
+    """
+    Extract a zoomed axis range from a Plotly relayoutData payload
+
+    Args:
+        relayout_data: relayoutData from a dcc.Graph
+        axis: Axis name, e.g. "xaxis" or "yaxis"
+
+    Returns:
+        tuple or None: (low, high) as sent by the browser, None when the axis
+        is autoscaled or was not touched
+    """
+    if not relayout_data or relayout_data.get(f"{axis}.autorange"):
+        return None
+    if f"{axis}.range[0]" in relayout_data:
+        return relayout_data[f"{axis}.range[0]"], relayout_data[f"{axis}.range[1]"]
+    if f"{axis}.range" in relayout_data:
+        low, high = relayout_data[f"{axis}.range"]
+        return low, high
+    return None
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets point selection
+
+    Keeps the first and last points and, for every bucket in between, the
+    point forming the largest triangle with the previously selected point and
+    the average of the next bucket.
+
+    Args:
+        x: Sorted numeric x values
+        y: Numeric y values
+        n_out: Number of points to keep
+
+    Returns:
+        np.ndarray: Indices of the selected points, in order
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    prev = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        area = np.abs(
+            (x[prev] - avg_x) * (y[start:end] - y[prev])
+            - (x[prev] - x[start:end]) * (avg_y - y[prev])
+        )
+        prev = start + int(area.argmax())
+        selected[i + 1] = prev
+
+    return selected
+
+
+def downsample_series(df: pd.DataFrame, x_col: str, y_col: str, n_out: int) -> pd.DataFrame:
+    """
+    Downsample a time series with LTTB, preserving its visual shape
+
+    Args:
+        df: Series data sorted by x_col
+        x_col: Numeric or datetime x column
+        y_col: Numeric y column
+        n_out: Target number of points
+
+    Returns:
+        pd.DataFrame: Subset of df with at most n_out rows
+    """
+    if len(df) <= n_out:
+        return df
+    idx = lttb_indices(_as_float(df[x_col]), df[y_col].to_numpy(dtype=float), n_out)
+    return df.iloc[idx]
+
+
+def downsample_scatter(df: pd.DataFrame, x_col: str, y_col: str, color_col: str = None,
+                       x_range=None, y_range=None, max_points: int = None,
+                       pixels: tuple = (200, 100)) -> pd.DataFrame:
+    """
+    Thin a scatter plot to one point per grid cell (per color group)
+
+    The plot area is divided into a grid of a few screen pixels per cell;
+    points falling in the same cell are indistinguishable, so only the first
+    one per (color, x cell, y cell) is kept. Passing the
+    currently visible ranges re-bins only that window, which is what gives
+    zoomed views their extra detail.
+
+    Args:
+        df: Filtered findings DataFrame
+        x_col: X column (numeric, datetime or categorical)
+        y_col: Numeric y column
+        color_col: Optional color grouping column
+        x_range: Optional visible (low, high) x range
+        y_range: Optional visible (low, high) y range
+        max_points: Return every visible point when there are at most this many
+        pixels: Grid resolution as (width, height)
+
+    Returns:
+        pd.DataFrame: Subset of df to plot
+    """
+    x_datetime = pd.api.types.is_datetime64_any_dtype(df[x_col])
+    x_numeric = x_datetime or pd.api.types.is_numeric_dtype(df[x_col])
+    mask = np.ones(len(df), dtype=bool)
+
+    if x_numeric:
+        x = _as_float(df[x_col])
+        if x_range is not None:
+            bounds = [pd.Timestamp(v) for v in x_range] if x_datetime else list(x_range)
+            low, high = _as_float(bounds)
+            mask &= (x >= low) & (x <= high)
+    else:
+        x = pd.factorize(df[x_col])[0].astype(float)
+
+    y = df[y_col].to_numpy(dtype=float)
+    if y_range is not None:
+        mask &= (y >= float(y_range[0])) & (y <= float(y_range[1]))
+    mask &= ~np.isnan(x) & ~np.isnan(y)
+
+    positions = np.flatnonzero(mask)
+    if max_points is not None and len(positions) <= max_points:
+        return df.iloc[positions]
+    x, y = x[positions], y[positions]
+
+    key = _pixel_bins(x, pixels[0]) * pixels[1] + _pixel_bins(y, pixels[1])
+    if color_col and color_col != "None" and color_col in df.columns:
+        colors = pd.factorize(df[color_col].iloc[positions])[0].astype(np.int64)
+        key = key * (colors.max() + 2) + colors + 1
+
+    _, first = np.unique(key, return_index=True)
+    return df.iloc[positions[np.sort(first)]]
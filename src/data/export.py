@@ -0,0 +1,217 @@
+"""
+Streaming export of the filtered (or drilled) findings
+"""
+import importlib.util
+from urllib.parse import urlencode
+import numpy as np
+import pandas as pd
+from flask import Response, abort, request, stream_with_context
+from config.settings import DATA_PATH, EXPORT_CHUNK_ROWS
+from src.data.cube import get_findings_cube, get_selections
+from src.data.loader import load_security_data, get_time_window, get_tool_urls, get_search_index
+from src.utils.logger import logger
+
+# Export format -> (MIME type, needs pyarrow)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", False),
+    "ndjson": ("application/x-ndjson", False),
+    "parquet": ("application/vnd.apache.parquet", True),
+}
+
+# Internal columns left out of exports (tool_url is added from the side file)
+EXCLUDED_COLUMNS = ["Correlation_Id", "Finding_Key", "Is_Canonical"]
+
+# Filter query parameters, in get_selections order
+FILTER_PARAMS = ["source", "severity", "status", "team", "repo"]
+
+# Drill-down query parameters: equality on a column, or a day / week of Opened_At
+DRILL_COLUMNS = {"drill_severity": "Severity", "drill_source": "Source",
+                 "drill_category": "Category", "drill_repo": "Repo/Account"}
+
+
+def export_query(source=None, severity=None, status=None, team=None, repo=None,
+                 start_date=None, end_date=None, search=None, drill: dict = None) -> str:
+    """
+    Query string describing a selection, for the export endpoint
+
+    Args:
+        source, severity, status, team, repo: Filter dropdown values
+        start_date: First day of the Opened_At range
+        end_date: Last day of the Opened_At range
+        search: Free-text search query
+        drill: Drill-down parameters (drill_* keys, "day" or "week")
+
+    Returns:
+        str: URL-encoded query (without "?")
+    """
+    params = {name: list(values) for name, values in
+              zip(FILTER_PARAMS, [source, severity, status, team, repo]) if values}
+    params.update({"start_date": start_date, "end_date": end_date,
+                   "search": (search or "").strip()})
+    params.update(drill or {})
+    return urlencode({k: v for k, v in params.items() if v}, doseq=True)
+
+
+def export_mask(args, filepath: str = DATA_PATH) -> np.ndarray:
+    """
+    Boolean row mask of the selection described by export query arguments
+
+    Filters and dates are resolved with the filter cube and the sorted
+    Opened_At index, and the search with the inverted index, so no part of
+    the frame is copied; column drills are applied per chunk when streaming.
+
+    Args:
+        args: Query arguments (a werkzeug MultiDict or equivalent)
+        filepath: Path to CSV file
+
+    Returns:
+        np.ndarray: Boolean mask over load_security_data(filepath)
+    """
+    df = load_security_data(filepath)
+    rows = get_time_window(df, args.get("start_date"), args.get("end_date"))
+    day = args.get("day") or args.get("week")
+    if day:
+        last = pd.Timestamp(day) + pd.Timedelta(days=6 if args.get("week") else 0)
+        drilled = get_time_window(df, day, last.strftime("%Y-%m-%d"))
+        rows = slice(max(rows.start, drilled.start), max(rows.start, min(rows.stop, drilled.stop)))
+    selections = get_selections(*[args.getlist(name) for name in FILTER_PARAMS])
+    mask = get_findings_cube(filepath).row_mask(selections, rows)
+    search = (args.get("search") or "").strip()
+    if search:
+        hits = get_search_index(filepath).search(search, mask)
+        mask = np.zeros(len(mask), dtype=bool)
+        mask[hits] = True
+    return mask
+
+
+def iter_export_frames(mask: np.ndarray, drill: dict = None, chunk_rows: int = EXPORT_CHUNK_ROWS,
+                       filepath: str = DATA_PATH):
+    """
+    Matching rows in row order, one bounded DataFrame at a time
+
+    The mask is walked in windows of chunk_rows consecutive positions; only
+    the matches of one window are materialized, so memory stays flat however
+    many rows match.
+
+    Args:
+        mask: Boolean row mask (see export_mask)
+        drill: Optional {column: value} equality filters
+        chunk_rows: Positions scanned per chunk
+        filepath: Path to CSV file
+
+    Yields:
+        pd.DataFrame: Export columns plus tool_url for one chunk (a single
+        empty frame when nothing matches, so headers are still written)
+    """
+    df = load_security_data(filepath)
+    columns = [col for col in df.columns if col not in EXCLUDED_COLUMNS]
+    positions = df.columns.get_indexer(columns)
+    emitted = False
+    for start in range(0, len(mask), chunk_rows):
+        idx = np.flatnonzero(mask[start:start + chunk_rows]) + start
+        if len(idx) == 0:
+            continue
+        frame = df.iloc[idx, positions]
+        for col, value in (drill or {}).items():
+            frame = frame[frame[col] == value]
+        if len(frame):
+            emitted = True
+            yield frame.assign(tool_url=get_tool_urls(frame.index, filepath, ascending=True))
+    if not emitted:
+        yield df.iloc[:0, positions].assign(tool_url=pd.Series(dtype=object))
+
+
+def _encode_csv(frames):
+    """CSV text, with the header on the first chunk only"""
+    header = True
+    for frame in frames:
+        yield frame.to_csv(index=False, header=header)
+        header = False
+
+
+def _encode_ndjson(frames):
+    """One JSON object per line"""
+    for frame in frames:
+        if len(frame):
+            yield frame.to_json(orient="records", lines=True, date_format="iso")
+
+
+class _ParquetSink:
+    """Write-only file object that hands written bytes back to a generator"""
+
+    def __init__(self):
+        self.closed = False
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _encode_parquet(frames):
+    """Parquet file with one row group per chunk, streamed as it is written"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink, writer = _ParquetSink(), None
+    for frame in frames:
+        if writer is None:
+            schema = pa.Schema.from_pandas(frame, preserve_index=False)
+            # Text columns that happen to be empty in the first chunk are still text
+            schema = pa.schema([field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+                                for field in schema])
+            writer = pq.ParquetWriter(sink, schema)
+        writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+        yield sink.drain()
+    if writer is not None:
+        writer.close()
+    yield sink.drain()
+
+
+_ENCODERS = {"csv": _encode_csv, "ndjson": _encode_ndjson, "parquet": _encode_parquet}
+
+
+def register_export_routes(server):
+    """
+    Add GET /export/findings.<fmt> to the Flask server
+
+    The query string is the one built by export_query; the response is
+    streamed chunk by chunk (CSV, NDJSON, or Parquet when pyarrow is
+    installed).
+
+    Args:
+        server: Flask app (Dash's app.server)
+    """
+    @server.route("/export/findings.<fmt>")
+    def export_findings(fmt):
+        if fmt not in EXPORT_FORMATS:
+            abort(404)
+        mimetype, needs_pyarrow = EXPORT_FORMATS[fmt]
+        if needs_pyarrow and importlib.util.find_spec("pyarrow") is None:
+            return Response("Parquet export needs the pyarrow package", status=501,
+                            mimetype="text/plain")
+        args = request.args
+        mask = export_mask(args)
+        drill = {col: args[name] for name, col in DRILL_COLUMNS.items() if args.get(name)}
+        logger.info(f"Exporting up to {int(mask.sum())} findings as {fmt}")
+        body = _ENCODERS[fmt](iter_export_frames(mask, drill))
+        return Response(
+            stream_with_context(body), mimetype=mimetype,
+            headers={"Content-Disposition": f"attachment; filename=findings.{fmt}"}
+        )
@@ -1,33 +1,361 @@
 """
 Data loading and caching functionality
 """
+import contextvars
+import glob
+import hashlib
+import json
+import os
+import threading
+import numpy as np
 import pandas as pd
 from functools import lru_cache
-from config.settings import DATA_PATH
+from typing import NamedTuple
+from config.settings import (
+    DATA_PATH,
+    DATA_SHARD_DIRS,
+    INCREMENTAL_INGEST,
+    PREVIEW_SAMPLE_ROWS,
+    LOAD_CHUNK_ROWS,
+    QUARANTINE_PATH,
+    DEDUP_CROSS_SOURCE,
+    CORRELATION_WINDOW_HOURS,
+    URL_STORE_DIR,
+    COALESCE_REQUESTS,
+    COALESCE_DIR,
+    COALESCE_WAIT_SECONDS,
+    COALESCE_TTL_SECONDS
+)
+from src.data.validator import (
+    REQUIRED_COLUMNS, check_required_columns, validate_chunk
+)
+from src.data.dedup import HASH_COLUMNS, add_finding_hashes, deduplicate_findings, finding_keys
+from src.data.url_store import write_url_store, prune_url_stores
+from src.data.search import build_search_index
+from src.utils.cache import LRUCache, SingleFlight, normalized_lru_cache
 from src.utils.logger import logger
 
-@lru_cache(maxsize=1)
+# Filtered frames are views of the cached dataset; with copy-on-write (always
+# on from pandas 3) writing to one copies it instead of reaching the cache
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+# Columns read from the CSV; anything else in the file is never parsed
+LOADED_COLUMNS = REQUIRED_COLUMNS + ["tool_url"]
+
+# Bytes before the end of a read file remembered to recognise an append
+_TAIL_BYTES = 4096
+
+class _Dataset(NamedTuple):
+    """Everything one load produces; installed, and pinned by requests, as a unit"""
+    df: pd.DataFrame
+    quarantine: pd.DataFrame
+    index: object  # SearchIndex
+
+class _Source(NamedTuple):
+    """Validated rows of one data file and how far the file was read"""
+    signature: tuple  # (inode, size, mtime ns) when read
+    offset: int  # bytes parsed
+    tail: bytes  # last bytes parsed
+    names: list  # header columns
+    clean: list  # clean chunks, with HASH_COLUMNS
+    quarantine: list  # quarantined chunks
+
+# File path -> its current _Dataset; one is kept, and a reload replaces the
+# whole dict in one assignment
+_datasets = {}
+# Serializes loads and reloads; reentrant so that preparing a reload may load
+# other files
+_reload_lock = threading.RLock()
+# Datasets the current request has read (see register_dataset_pinning)
+_pinned = contextvars.ContextVar("pinned_datasets", default=None)
+# File path -> {data file: _Source} from the most recent load
+_sources = {}
+# (file path, data version) -> tool URL side file, for the current and the
+# previous load (tables rendered before a reload still resolve their links)
+_url_stores = LRUCache(maxsize=2)
+
+def data_files(filepath: str = DATA_PATH) -> list:
+    """
+    Files making up a dataset: the file itself, then its shards
+
+    Shards are the *.csv files of DATA_SHARD_DIRS (in name order) and belong
+    to DATA_PATH only.
+
+    Args:
+        filepath: Path to CSV file
+
+    Returns:
+        list: File paths in load order
+    """
+    files = [filepath]
+    if os.path.abspath(filepath) == os.path.abspath(DATA_PATH):
+        for directory in DATA_SHARD_DIRS:
+            files.extend(sorted(glob.glob(os.path.join(glob.escape(directory), "*.csv"))))
+    return files
+
+def _read_source(path: str, previous: _Source = None) -> _Source:
+    """
+    Validated rows of one data file, reusing an earlier read where possible
+
+    An unchanged file is not read again. When the file only grew (same
+    inode, and the bytes read before are still in place), just the new
+    lines are parsed; anything else is read in full.
+
+    Args:
+        path: CSV file
+        previous: Result of the last read of path, if any
+
+    Returns:
+        _Source: Clean rows (with HASH_COLUMNS) and quarantined rows, indexed
+        by data row number
+    """
+    with open(path, "rb") as f:
+        stat = os.fstat(f.fileno())
+        signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        if previous is not None and previous.signature == signature:
+            return previous
+        appended = (previous is not None and stat.st_ino == previous.signature[0]
+                    and stat.st_size > previous.offset and previous.tail.endswith(b"\n"))
+        if appended:
+            f.seek(previous.offset - len(previous.tail))
+            appended = f.read(len(previous.tail)) == previous.tail
+
+        if appended:
+            names, clean, quarantine = previous.names, list(previous.clean), list(previous.quarantine)
+            first_row = sum(len(part) for part in clean + quarantine)
+            reader = pd.read_csv(f, chunksize=LOAD_CHUNK_ROWS, header=None, names=names,
+                                 usecols=lambda col: col in LOADED_COLUMNS)
+        else:
+            f.seek(0)
+            names = pd.read_csv(f, nrows=0).columns.tolist()
+            f.seek(0)
+            clean, quarantine, first_row = [], [], 0
+            reader = pd.read_csv(f, chunksize=LOAD_CHUNK_ROWS,
+                                 usecols=lambda col: col in LOADED_COLUMNS)
+        with reader:
+            for chunk in reader:
+                missing = check_required_columns(chunk.columns)
+                if missing:
+                    raise ValueError(f"Missing required columns in {path}: {missing}")
+                chunk.index = chunk.index + first_row
+                rows, quarantined = validate_chunk(chunk)
+                clean.append(add_finding_hashes(rows))
+                quarantine.append(quarantined)
+
+        offset = f.tell()
+        f.seek(max(0, offset - _TAIL_BYTES))
+        tail = f.read(offset - f.tell())
+    if appended:
+        logger.info(f"Read {offset - previous.offset} appended bytes of {path}")
+    return _Source(signature, offset, tail, names, clean, quarantine)
+
+def _read_validated(filepath: str) -> tuple:
+    """
+    Read the dataset's files in chunks, quarantining rows that fail validation
+
+    Files read by the previous load are reused as far as they are unchanged
+    (see _read_source). Exact duplicates are then dropped into the same side
+    table and cross-source matches are linked (see deduplicate_findings).
+
+    Args:
+        filepath: Path to CSV file
+
+    Returns:
+        tuple: (clean findings with Opened_At and MTTR_Hours parsed, sorted
+        by Opened_At; withheld rows with a Reason column; {file: _Source})
+    """
+    previous = _sources.get(filepath, {}) if INCREMENTAL_INGEST else {}
+    sources = {path: _read_source(path, previous.get(path)) for path in data_files(filepath)}
+    sharded = len(sources) > 1
+
+    clean_chunks, quarantine_chunks, lines, files = [], [], [], []
+    for path, source in sources.items():
+        clean_chunks.extend(source.clean)
+        lines.extend(part.index.to_numpy() for part in source.clean)
+        files.extend(np.full(len(part), path, dtype=object) for part in source.clean)
+        quarantine_chunks.extend(part.assign(File=path) if sharded else part
+                                 for part in source.quarantine)
+    if not clean_chunks:
+        raise ValueError(f"No findings in {filepath}")
+    # Duplicates can span chunks and files, so they are found once over all
+    # clean rows
+    df, duplicates = deduplicate_findings(pd.concat(clean_chunks, ignore_index=True),
+                                          DEDUP_CROSS_SOURCE, CORRELATION_WINDOW_HOURS)
+    duplicates = duplicates.drop(columns=HASH_COLUMNS).assign(
+        Line=np.concatenate(lines)[duplicates.index] + 2)
+    if sharded:
+        duplicates["File"] = np.concatenate(files)[duplicates.index]
+    # Chronological row order: a date window is a contiguous row range
+    df = df.sort_values("Opened_At", kind="stable", na_position="last", ignore_index=True)
+    quarantine = pd.concat(quarantine_chunks + [duplicates], ignore_index=True)
+
+    if len(quarantine) > 0:
+        counts = quarantine["Reason"].value_counts().to_dict()
+        logger.warning(f"Withheld {len(quarantine)} rows from {filepath}: {counts}")
+        if QUARANTINE_PATH:
+            quarantine.to_csv(QUARANTINE_PATH, index=False)
+    return df, quarantine, sources
+
+def _freeze(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Read-only snapshot of a loaded DataFrame, shared by all requests
+
+    Every NumPy-backed column gets its own read-only buffer, so an in-place
+    write to the cached frame raises instead of racing other callbacks.
+    Slices and column selections of the snapshot are views; under
+    copy-on-write, writing to them copies first. Extension columns (e.g.
+    Arrow-backed strings) are kept as-is.
+
+    Args:
+        df: Freshly loaded findings
+
+    Returns:
+        pd.DataFrame: Snapshot with the same columns, index and attrs
+    """
+    columns = {}
+    for col in df.columns:
+        if isinstance(df[col].dtype, np.dtype):
+            values = df[col].to_numpy(copy=True)
+            values.flags.writeable = False
+            columns[col] = values
+        else:
+            columns[col] = df[col].array
+    frozen = pd.DataFrame(columns, index=df.index, copy=False)
+    frozen.attrs.update(df.attrs)
+    return frozen
+
+def get_quarantine(filepath: str = DATA_PATH) -> pd.DataFrame:
+    """
+    Rows rejected by validation during the last load of filepath
+
+    Args:
+        filepath: Path to CSV file
+
+    Returns:
+        pd.DataFrame: Raw rows with Reason (and Line, when known) columns;
+        with shards, a File column names the file of each row
+    """
+    return _current(filepath).quarantine
+
 def load_security_data(filepath: str = DATA_PATH) -> pd.DataFrame:
     """
     Load and preprocess security findings data with caching
 
+    The first call reads the file; later calls return the same read-only
+    frame until reload_security_data replaces it. Within a request (see
+    register_dataset_pinning) every call returns the frame the first one did.
+
     Args:
         filepath: Path to CSV file
 
     Returns:
         pd.DataFrame: Processed security findings
     """
+    return _current(filepath).df
+
+def _current(filepath: str) -> _Dataset:
+    """The dataset pinned by the running request, else the installed one (loaded if needed)"""
+    pinned = _pinned.get()
+    if pinned is not None and filepath in pinned:
+        return pinned[filepath]
+    dataset = _datasets.get(filepath)
+    if dataset is None:
+        with _reload_lock:
+            dataset = _datasets.get(filepath)
+            if dataset is None:
+                dataset = _install(filepath, _ingest(filepath))
+    if pinned is not None:
+        pinned[filepath] = dataset
+    return dataset
+
+def reload_security_data(filepath: str = DATA_PATH, prepare=None) -> pd.DataFrame:
+    """
+    Re-read filepath and make it the cached dataset
+
+    The files are parsed and indexed while requests keep being served from
+    the previous load. prepare then runs against the new load, before any
+    request can see it, to build what is derived from it (caches keyed by
+    data version, see dataset_cached). The frame, quarantine, search index
+    and URL store are finally swapped in with a single assignment. If the
+    read or prepare fails the previous load stays in place.
+
+    Args:
+        filepath: Path to CSV file
+        prepare: Optional function with no arguments; inside it,
+            load_security_data(filepath) returns the new load
+
+    Returns:
+        pd.DataFrame: Newly loaded findings
+    """
+    with _reload_lock:
+        dataset = _ingest(filepath)
+        if prepare is not None:
+            contextvars.copy_context().run(_run_pinned, {filepath: dataset}, prepare)
+        _install(filepath, dataset)
+    return dataset.df
+
+def _run_pinned(pinned: dict, fn):
+    """Call fn with the datasets in pinned (run inside a copied context)"""
+    _pinned.set(pinned)
+    return fn()
+
+def register_dataset_pinning(server):
+    """
+    Keep each request on one data version
+
+    The first dataset a request reads is pinned for the rest of it, so a
+    reload installed mid-request cannot pair rows of one load with a cube,
+    index or store of the next.
+
+    Args:
+        server: Flask app (Dash's app.server)
+    """
+    @server.before_request
+    def _pin_datasets():
+        _pinned.set({})
+
+    @server.teardown_request
+    def _unpin_datasets(error=None):
+        _pinned.set(None)
+
+def _ingest(filepath: str) -> _Dataset:
+    """
+    Read, validate and index filepath without touching the cache
+
+    The URL store is written and registered under the new data version,
+    which no request asks for until the dataset is installed.
+
+    Returns:
+        _Dataset: Frozen findings, quarantine and search index
+    """
     try:
         logger.info(f"Loading data from {filepath}")
-        df = pd.read_csv(filepath, parse_dates=["Opened_At"])
+        df, quarantine, sources = _read_validated(filepath)
         # Basic preprocessing
         df["Week_Number"] = df["Opened_At"].dt.isocalendar().week.astype(int)
-        df["View_Link"] = df["tool_url"].apply(
-            lambda u: f"[View 🔗]({u})" if isinstance(u, str) and u else ""
-        )
+        _, size, mtime_ns = sources[filepath].signature
+        version = f"{mtime_ns:x}-{size:x}-{len(df):x}"
+        if len(sources) > 1:
+            shards = repr([(path, source.signature) for path, source in sources.items()][1:])
+            version += "-" + hashlib.blake2b(shards.encode(), digest_size=4).hexdigest()
+        df.attrs["data_version"] = version
+
+        # Stable identity of each finding (includes tool_url, hashed before
+        # the URLs leave the frame)
+        df["Finding_Key"] = finding_keys(df)
+        df = df.drop(columns=HASH_COLUMNS)
+
+        # URLs are only needed for the few rows on screen: move them to disk
+        urls = df.pop("tool_url") if "tool_url" in df.columns else pd.Series("", index=df.index)
+        index = build_search_index(df, urls)
+        frozen = _freeze(df)
+        store = write_url_store(urls, URL_STORE_DIR, os.path.basename(filepath), version)
+        _url_stores.set((filepath, version), store)
+        _sources[filepath] = sources
 
         logger.info(f"Successfully loaded {len(df)} findings from {df['Source'].nunique()} sources")
-        return df
+        return _Dataset(frozen, quarantine, index)
 
     except FileNotFoundError:
         logger.error(f"Data file not found: {filepath}")
@@ -36,34 +364,205 @@ def load_security_data(filepath: str = DATA_PATH) -> pd.DataFrame:
         logger.error(f"Error loading data: {e}")
         raise
 
+def _install(filepath: str, dataset: _Dataset) -> _Dataset:
+    """Make a load the current dataset (caller holds _reload_lock)"""
+    global _datasets
+    _datasets = {filepath: dataset}
+    # Side files no worker has open any more (older loads, other processes)
+    prune_url_stores(URL_STORE_DIR, os.path.basename(filepath))
+    return dataset
+
+def get_tool_urls(rows, filepath: str = DATA_PATH, ascending: bool = False,
+                  data_version: str = None) -> list:
+    """
+    Tool URLs of some findings, read from the side file
+
+    Args:
+        rows: Row positions (index labels) in load_security_data(filepath)
+        filepath: Path to CSV file
+        ascending: rows are sorted, distinct and close together; read them
+            with one contiguous read
+        data_version: Load the row positions refer to (default: the current
+            one); the previous load is still resolvable after a reload
+
+    Returns:
+        list: URL per row ("" when unknown, or the load is no longer kept)
+    """
+    df = load_security_data(filepath)
+    store = _url_stores.get((filepath, data_version or df.attrs["data_version"]))
+    if store is None:
+        return [""] * len(rows)
+    if ascending:
+        return store.get_block(np.asarray(rows, dtype=np.int64))
+    return store.get(rows)
+
+def get_search_index(filepath: str = DATA_PATH):
+    """
+    Full-text search index of the loaded findings (built at load time)
+
+    Args:
+        filepath: Path to CSV file
+
+    Returns:
+        SearchIndex: Index whose row ids are positions in load_security_data(filepath)
+    """
+    return _current(filepath).index
+
+def dataset_cached(maxsize: int = 2):
+    """
+    normalized_lru_cache for structures derived from a dataset
+
+    The data version of the wrapped function's filepath argument is part of
+    the key, so a reload needs no invalidation: the new version gets its own
+    entry, built while the reload is prepared. The default maxsize keeps the
+    current and the next version side by side.
+
+    Args:
+        maxsize: Maximum number of entries kept
+
+    Returns:
+        Decorator; the wrapped function must take a filepath argument
+    """
+    return normalized_lru_cache(maxsize, version=lambda args: get_data_version(args["filepath"]))
+
+@dataset_cached()
+def load_sample_data(filepath: str = DATA_PATH, n_rows: int = PREVIEW_SAMPLE_ROWS) -> pd.DataFrame:
+    """
+    Fixed uniform random sample of the dataset for fast previews
+
+    Args:
+        filepath: Path to CSV file
+        n_rows: Maximum number of rows in the sample
+
+    Returns:
+        pd.DataFrame: Sample of load_security_data(filepath), in original order
+    """
+    df = load_security_data(filepath)
+    if len(df) <= n_rows:
+        return df
+    return df.sample(n=n_rows, random_state=0).sort_index()
+
+def get_data_version(filepath: str = DATA_PATH) -> str:
+    """
+    Identify the currently loaded dataset
+
+    Args:
+        filepath: Path to CSV file
+
+    Returns:
+        str: Version string that changes whenever the data is reloaded from a
+        modified file
+    """
+    return load_security_data(filepath).attrs["data_version"]
+
+def get_filter_signature(source=None, severity=None, status=None,
+                         team=None, repo=None, start_date=None, end_date=None) -> str:
+    """
+    Stable, order-insensitive fingerprint of the filter selections
+
+    Returns:
+        str: Short hex digest usable as a cache key
+    """
+    selections = {"source": source, "severity": severity, "status": status,
+                  "team": team, "repo": repo}
+    canonical = {k: sorted(map(str, v)) for k, v in selections.items() if v}
+    if start_date or end_date:
+        canonical["dates"] = [str(start_date or ""), str(end_date or "")]
+    payload = json.dumps(canonical, sort_keys=True).encode()
+    return hashlib.blake2b(payload, digest_size=8).hexdigest()
+
+@lru_cache(maxsize=1)
+def get_single_flight() -> SingleFlight:
+    """Request coalescer shared by the dashboard callbacks (see COALESCE_DIR)"""
+    return SingleFlight(COALESCE_DIR or None, COALESCE_WAIT_SECONDS, COALESCE_TTL_SECONDS)
+
+def run_coalesced(name: str, fn, *filters):
+    """
+    Run a dashboard computation, sharing it with identical concurrent requests
+
+    Requests are identical when they have the same name, filter signature
+    and data version; while one is computing, the others wait for its
+    result instead of repeating the work.
+
+    Args:
+        name: Name of the computation (e.g. the callback)
+        fn: Function of the filter values
+        *filters: source, severity, status, team, repo, start_date, end_date
+
+    Returns:
+        fn(*filters)
+    """
+    if not COALESCE_REQUESTS:
+        return fn(*filters)
+    key = (name, get_filter_signature(*filters), get_data_version())
+    return get_single_flight().do(key, fn, *filters)
+
+def resolve_date_range(start_date=None, end_date=None) -> tuple:
+    """
+    Half-open time bounds of a date picker selection
+
+    Args:
+        start_date: First day included (date string), or None for no bound
+        end_date: Last day included (date string), or None for no bound
+
+    Returns:
+        tuple: (start, end) Timestamps, end exclusive; None when unbounded
+    """
+    start = pd.Timestamp(start_date).normalize() if start_date else None
+    end = pd.Timestamp(end_date).normalize() + pd.Timedelta(days=1) if end_date else None
+    return start, end
+
+def get_time_window(df: pd.DataFrame, start_date=None, end_date=None) -> slice:
+    """
+    Row range of the findings opened within a date range
+
+    df must be sorted by Opened_At (as load_security_data is), so the range
+    is found with two binary searches instead of a full-column comparison.
+
+    Args:
+        df: Findings DataFrame sorted by Opened_At
+        start_date: First day included, or None
+        end_date: Last day included, or None
+
+    Returns:
+        slice: Positional row range, usable with df.iloc and row masks
+    """
+    start, end = resolve_date_range(start_date, end_date)
+    opened = df["Opened_At"].to_numpy(dtype="datetime64[ns]")
+    lo = 0 if start is None else int(np.searchsorted(opened, start.to_datetime64(), side="left"))
+    hi = len(df) if end is None else int(np.searchsorted(opened, end.to_datetime64(), side="left"))
+    return slice(lo, max(lo, hi))
+
 def get_filtered_data(df: pd.DataFrame, source=None, severity=None, 
-                      status=None, team=None, repo=None) -> pd.DataFrame:
+                      status=None, team=None, repo=None,
+                      start_date=None, end_date=None) -> pd.DataFrame:
     """
     Apply filters to the dataset
 
     Args:
-        df: Source DataFrame
+        df: Source DataFrame (sorted by Opened_At when dates are given)
         source: List of sources to filter by
         severity: List of severity levels to filter by
         status: List of status values to filter by
         team: List of teams to filter by
         repo: List of repositories to filter by
+        start_date: First day of the Opened_At range
+        end_date: Last day of the Opened_At range
 
     Returns:
-        pd.DataFrame: Filtered DataFrame
+        pd.DataFrame: Filtered DataFrame; with no filters, a view of df
+        (copy-on-write, so callers may still modify it)
     """
-    filtered = df.copy()
-
-    if source and len(source) > 0:
-        filtered = filtered[filtered["Source"].isin(source)]
-    if severity and len(severity) > 0:
-        filtered = filtered[filtered["Severity"].isin(severity)]
-    if status and len(status) > 0:
-        filtered = filtered[filtered["Status"].isin(status)]
-    if team and len(team) > 0:
-        filtered = filtered[filtered["Assigned_Team"].isin(team)]
-    if repo and len(repo) > 0:
-        filtered = filtered[filtered["Repo/Account"].isin(repo)]
+    # The date window is a slice (a view); the filters are combined into one
+    # mask and selected once, so at most one copy of the matching rows is made
+    window = df.iloc[get_time_window(df, start_date, end_date)] if start_date or end_date else df
+    mask = None
+    for values, column in [(source, "Source"), (severity, "Severity"), (status, "Status"),
+                           (team, "Assigned_Team"), (repo, "Repo/Account")]:
+        if values and len(values) > 0:
+            matches = window[column].isin(values).to_numpy()
+            mask = matches if mask is None else mask & matches
+    filtered = window if mask is None else window[mask]
 
     logger.debug(f"Filtered data: {len(filtered)} of {len(df)} findings")
     return filtered
@@ -0,0 +1,436 @@
+"""
+Month-partitioned findings with partition pruning and stats
+"""
+import glob
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+import numpy as np
+import pandas as pd
+from config.settings import DATA_PATH, PARTITION_DIR, PARTITION_HOT_MONTHS, PARTITION_CACHE_SIZE
+from src.data.backlog import OPEN_STATUSES
+from src.data.dedup import CANONICAL_COLUMN, counted_findings
+from src.data.loader import dataset_cached, load_security_data, resolve_date_range
+from src.utils.cache import LRUCache
+from src.utils.helpers import get_severity_order
+from src.utils.logger import logger
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: partition directories of old versions are left in place
+    fcntl = None
+
+# Per-partition stats kept by PartitionStore, besides Severity_<severity>
+# counts and the Start_Row/Stop_Row range. Counts take one row per
+# correlation group (see counted_findings).
+STATS_COLUMNS = ["Rows", "Min_Opened", "Max_Opened", "Open", "Critical_Open",
+                 "MTTR_Sum", "MTTR_Count"]
+
+
+def _write_partition(frame: pd.DataFrame, path: str):
+    """
+    Write one partition as a columnar .npz file (no pickled objects)
+
+    Numbers are stored as-is, datetimes as int64 nanoseconds and text as
+    int32 dictionary codes plus a fixed-width array of distinct values.
+    """
+    arrays = {"index": frame.index.to_numpy(dtype=np.int64)}
+    for i, col in enumerate(frame.columns):
+        values = frame[col]
+        if pd.api.types.is_datetime64_any_dtype(values):
+            arrays[f"c{i}"] = values.to_numpy(dtype="datetime64[ns]").view(np.int64)
+        elif pd.api.types.is_numeric_dtype(values):
+            arrays[f"c{i}"] = values.to_numpy()
+        else:
+            codes, uniques = pd.factorize(values)
+            arrays[f"c{i}"] = codes.astype(np.int32)
+            arrays[f"c{i}_values"] = np.asarray(uniques, dtype=str)
+    np.savez(path, **arrays)
+
+
+def _read_partition(path: str, schema: list, columns: list = None) -> pd.DataFrame:
+    """
+    Read (some columns of) a partition written by _write_partition
+
+    Args:
+        path: Partition file
+        schema: (column, dtype) pairs of the partitioned frame
+        columns: Optional subset of columns; others are never decompressed
+
+    Returns:
+        pd.DataFrame: Partition rows, indexed by row position in the full frame
+    """
+    data = {}
+    with np.load(path, allow_pickle=False) as npz:
+        for i, (col, dtype) in enumerate(schema):
+            if columns is not None and col not in columns:
+                continue
+            raw = npz[f"c{i}"]
+            if pd.api.types.is_datetime64_any_dtype(dtype):
+                data[col] = raw.view("datetime64[ns]")
+            elif f"c{i}_values" in npz.files:
+                values = npz[f"c{i}_values"].astype(object)
+                decoded = values[np.maximum(raw, 0)] if len(values) else np.full(len(raw), None)
+                decoded[raw < 0] = None
+                data[col] = pd.Series(decoded).astype(dtype).to_numpy()
+            else:
+                data[col] = raw
+        index = npz["index"]
+    frame = pd.DataFrame(data, index=index)
+    return frame.astype({col: dtype for col, dtype in schema if col in data})
+
+
+def _month_stats(part: pd.DataFrame) -> dict:
+    """Stats of one month's rows (see PartitionStore)"""
+    counted = counted_findings(part)
+    is_open = counted["Status"].isin(OPEN_STATUSES)
+    mttr = pd.to_numeric(counted["MTTR_Hours"], errors="coerce")
+    severity = counted["Severity"].value_counts()
+    stats = {
+        "Rows": len(counted), "Min_Opened": part["Opened_At"].iloc[0],
+        "Max_Opened": part["Opened_At"].iloc[-1], "Open": int(is_open.sum()),
+        "Critical_Open": int((is_open & (counted["Severity"] == "Critical")).sum()),
+        "MTTR_Sum": mttr.sum(), "MTTR_Count": int(mttr.notna().sum()),
+    }
+    stats.update({f"Severity_{sev}": int(severity.get(sev, 0)) for sev in get_severity_order()})
+    return stats
+
+
+def month_slices(df: pd.DataFrame):
+    """
+    Split a frame sorted by Opened_At into its months, one at a time
+
+    Rows are in time order, so every month is one contiguous row range found
+    by binary search; no per-row month column is built.
+
+    Args:
+        df: Findings DataFrame sorted by Opened_At (see load_security_data)
+
+    Yields:
+        tuple: (month period, first row position, rows of that month)
+    """
+    opened = df["Opened_At"].to_numpy(dtype="datetime64[ns]")
+    # Rows without Opened_At sort last and belong to no month
+    valid = len(opened) - int(np.isnat(opened).sum())
+    if valid == 0:
+        return
+    months = pd.period_range(pd.Timestamp(opened[0]).to_period("M"),
+                             pd.Timestamp(opened[valid - 1]).to_period("M"), freq="M")
+    bounds = np.searchsorted(opened[:valid], months[1:].start_time.to_numpy(dtype="datetime64[ns]"))
+    starts, stops = np.append(0, bounds), np.append(bounds, valid)
+    for period, start, stop in zip(months, starts.tolist(), stops.tolist()):
+        if stop > start:
+            yield period, start, df.iloc[start:stop]
+
+
+def _lock_directory(path: str):
+    """
+    Open a directory under a shared flock, marking it in use
+
+    Returns:
+        int: Directory file descriptor, or None if the directory does not
+        exist (or was pruned while waiting for the lock)
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except FileNotFoundError:
+        return None
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_SH)
+    try:
+        if os.path.samestat(os.fstat(fd), os.stat(path)):
+            return fd
+    except FileNotFoundError:
+        pass
+    os.close(fd)
+    return None
+
+
+def prune_partition_dirs(directory: str, name: str) -> int:
+    """
+    Remove partition directories of name that no PartitionStore in any process uses
+
+    Args:
+        directory: Directory holding the partition directories (PARTITION_DIR)
+        name: Base name of the source data file
+
+    Returns:
+        int: Number of directories removed (always 0 without flock)
+    """
+    if fcntl is None:
+        return 0
+    removed = 0
+    for stale in glob.glob(os.path.join(directory, f"{glob.escape(name)}.*")):
+        try:
+            fd = os.open(stale, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            shutil.rmtree(stale)
+            removed += 1
+        except BlockingIOError:
+            continue  # still in use
+        except OSError as e:
+            logger.warning(f"Could not remove stale partitions {stale}: {e}")
+        finally:
+            os.close(fd)
+    return removed
+
+
+class PartitionStore:
+    """
+    Findings split into one partition per month of Opened_At
+
+    Each partition is a columnar file on disk. The newest ``hot_months``
+    partitions stay in memory; older ones are read on demand, only for the
+    columns asked for, and kept in an LRU of ``cache_size`` partitions. Every
+    partition also carries stats (row range, min/max Opened_At, counts per
+    severity, open counts, MTTR sum), so reads outside a date window are
+    pruned and some KPIs are answered from stats alone.
+
+    The directory stays open, under a shared flock, for as long as the store
+    exists, which marks it as in use for prune_partition_dirs in every
+    worker process.
+
+    Args:
+        directory: Directory holding the partition files
+        fd: Open descriptor of directory, locked by _lock_directory
+        stats: One row per partition (see ingest), indexed by month
+        schema: (column, dtype) pairs of the partitioned frame
+        hot: Partitions pinned in memory, by month
+        cache_size: Number of cold partitions kept in memory
+    """
+
+    def __init__(self, directory: str, fd: int, stats: pd.DataFrame, schema: list,
+                 hot: dict, cache_size: int = 6):
+        self.directory = directory
+        self.stats = stats
+        self.schema = schema
+        self._hot = hot
+        self._cold = LRUCache(maxsize=cache_size)
+        self._cold_lock = threading.Lock()
+        self.reads = 0
+        weakref.finalize(self, os.close, fd)
+
+    def __len__(self):
+        return len(self.stats)
+
+    @classmethod
+    def ingest(cls, months, schema: list, directory: str, fd: int, write: bool = True,
+               hot_months: int = 3, cache_size: int = 6) -> "PartitionStore":
+        """
+        Write month partitions one month at a time, collecting their stats
+
+        Args:
+            months: (month, first row position, rows) per month in time
+                order, e.g. month_slices(df)
+            schema: (column, dtype) pairs of the partitioned frame
+            directory: Locked directory for the partition files
+            fd: Descriptor locking directory
+            write: False when directory already holds these partitions
+            hot_months: Newest partitions kept in memory
+            cache_size: Cold partitions kept in memory after a read
+
+        Returns:
+            PartitionStore: Store over the partitions
+        """
+        periods, rows, hot = [], [], {}
+        for period, start, part in months:
+            if write:
+                _write_partition(part, os.path.join(directory, f"{period}.npz"))
+            periods.append(period)
+            rows.append({**_month_stats(part), "Start_Row": start, "Stop_Row": start + len(part)})
+            hot[period] = part
+            if len(hot) > hot_months:
+                del hot[periods[-hot_months - 1]]
+        severity_columns = [f"Severity_{sev}" for sev in get_severity_order()]
+        stats = pd.DataFrame(rows, index=pd.PeriodIndex(periods, freq="M", name="Month"),
+                             columns=STATS_COLUMNS + severity_columns + ["Start_Row", "Stop_Row"])
+        return cls(directory, fd, stats, schema, hot, cache_size)
+
+    def _load(self, period, columns: list = None) -> pd.DataFrame:
+        """
+        (Some columns of) one partition, from memory when hot or cached
+
+        Columns not cached yet are read from disk and added to the partition's
+        cache entry; the others are never read.
+        """
+        part = self._hot.get(period)
+        if part is None:
+            with self._cold_lock:
+                part = self._cold.get(period)
+                missing = [col for col, _ in self.schema if (columns is None or col in columns)
+                           and (part is None or col not in part.columns)]
+                if missing:
+                    read = _read_partition(os.path.join(self.directory, f"{period}.npz"),
+                                           self.schema, missing)
+                    part = read if part is None else pd.concat([part, read], axis=1)
+                    part = part[[col for col, _ in self.schema if col in part.columns]]
+                    self._cold.set(period, part)
+                    self.reads += 1
+        return part if columns is None else part[columns]
+
+    def prune(self, start=None, end=None, rows: slice = None) -> pd.DataFrame:
+        """
+        Stats of the partitions overlapping a time window and/or row range
+
+        Args:
+            start: Inclusive lower time bound, or None
+            end: Exclusive upper time bound, or None
+            rows: Optional row range in the full frame
+
+        Returns:
+            pd.DataFrame: Matching rows of stats
+        """
+        keep = np.ones(len(self.stats), dtype=bool)
+        if start is not None:
+            keep &= (self.stats["Max_Opened"] >= start).to_numpy()
+        if end is not None:
+            keep &= (self.stats["Min_Opened"] < end).to_numpy()
+        if rows is not None:
+            keep &= (self.stats["Stop_Row"] > (rows.start or 0)).to_numpy()
+            if rows.stop is not None:
+                keep &= (self.stats["Start_Row"] < rows.stop).to_numpy()
+        return self.stats[keep]
+
+    def _read(self, stats: pd.DataFrame, start=None, end=None, columns: list = None,
+              rows: slice = None) -> pd.DataFrame:
+        """Rows of the given partitions, trimmed to a time window and row range"""
+        parts = []
+        needed = None if columns is None else list(dict.fromkeys(list(columns) + ["Opened_At"]))
+        for period, part_stats in stats.iterrows():
+            part = self._load(period, needed)
+            # Only the partitions at the edges of the window need trimming
+            lo, hi = 0, len(part)
+            opened = part["Opened_At"].to_numpy(dtype="datetime64[ns]")
+            if start is not None and part_stats["Min_Opened"] < start:
+                lo = int(np.searchsorted(opened, start.to_datetime64(), side="left"))
+            if end is not None and part_stats["Max_Opened"] >= end:
+                hi = int(np.searchsorted(opened, end.to_datetime64(), side="left"))
+            if rows is not None:
+                lo = max(lo, (rows.start or 0) - int(part_stats["Start_Row"]))
+                if rows.stop is not None:
+                    hi = min(hi, rows.stop - int(part_stats["Start_Row"]))
+            part = part.iloc[lo:max(lo, hi)]
+            parts.append(part if columns is None else part[columns])
+        if not parts:
+            return pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in self.schema
+                                 if columns is None or col in columns})
+        return pd.concat(parts)
+
+    def scan(self, start_date=None, end_date=None, columns: list = None,
+             rows: slice = None) -> pd.DataFrame:
+        """
+        Rows opened within a date range, reading only overlapping partitions
+
+        Args:
+            start_date: First day included, or None
+            end_date: Last day included, or None
+            columns: Optional subset of columns
+            rows: Optional row range in the full frame
+
+        Returns:
+            pd.DataFrame: Matching rows, indexed by row position
+        """
+        start, end = resolve_date_range(start_date, end_date)
+        return self._read(self.prune(start, end, rows), start, end, columns, rows)
+
+    def summary(self, start_date=None, end_date=None) -> dict:
+        """
+        Headline KPIs over a date range, from partition stats where possible
+
+        Partitions entirely inside the range are answered from their stats;
+        only the (at most two) partitions cut by the range edges are read.
+
+        Args:
+            start_date: First day included, or None
+            end_date: Last day included, or None
+
+        Returns:
+            dict: total, open, critical_open, avg_mttr and severity counts
+        """
+        start, end = resolve_date_range(start_date, end_date)
+        stats = self.prune(start, end)
+        inside = np.ones(len(stats), dtype=bool)
+        if start is not None:
+            inside &= (stats["Min_Opened"] >= start).to_numpy()
+        if end is not None:
+            inside &= (stats["Max_Opened"] < end).to_numpy()
+
+        severity_columns = [f"Severity_{sev}" for sev in get_severity_order()]
+        totals = stats[inside][["Rows", "Open", "Critical_Open", "MTTR_Sum", "MTTR_Count"]
+                               + severity_columns].sum()
+        if not inside.all():
+            edge_rows = counted_findings(self._read(
+                stats[~inside], start, end,
+                columns=["Status", "Severity", "MTTR_Hours"]
+                + [col for col, _ in self.schema if col == CANONICAL_COLUMN]))
+            is_open = edge_rows["Status"].isin(OPEN_STATUSES)
+            mttr = pd.to_numeric(edge_rows["MTTR_Hours"], errors="coerce")
+            totals["Rows"] += len(edge_rows)
+            totals["Open"] += is_open.sum()
+            totals["Critical_Open"] += (is_open & (edge_rows["Severity"] == "Critical")).sum()
+            totals["MTTR_Sum"] += mttr.sum()
+            totals["MTTR_Count"] += mttr.notna().sum()
+            for sev, count in edge_rows["Severity"].value_counts().items():
+                if f"Severity_{sev}" in totals:
+                    totals[f"Severity_{sev}"] += count
+
+        return {
+            "total": int(totals["Rows"]),
+            "open": int(totals["Open"]),
+            "critical_open": int(totals["Critical_Open"]),
+            "avg_mttr": totals["MTTR_Sum"] / totals["MTTR_Count"] if totals["MTTR_Count"] else 0,
+            "severity": {sev: int(totals[f"Severity_{sev}"]) for sev in get_severity_order()},
+        }
+
+
+@dataset_cached()
+def get_partition_store(filepath: str = DATA_PATH) -> PartitionStore:
+    """
+    Build (once per data version) the month partitions of the cached dataset
+
+    Partitions live under PARTITION_DIR in a directory per data version. A
+    complete directory left by another worker (or an earlier run) is reused
+    as is. Otherwise months are written one at a time into a private
+    temporary directory, which is renamed into place when complete. Only
+    directories of older versions that no process still uses are removed.
+
+    Args:
+        filepath: Path to CSV file
+
+    Returns:
+        PartitionStore: Partitions of load_security_data(filepath)
+    """
+    df = load_security_data(filepath)
+    name = os.path.basename(filepath)
+    directory = os.path.join(PARTITION_DIR, f"{name}.{df.attrs['data_version']}")
+    schema = [(col, df[col].dtype) for col in df.columns]
+    options = {"hot_months": PARTITION_HOT_MONTHS, "cache_size": PARTITION_CACHE_SIZE}
+
+    fd = _lock_directory(directory)
+    if fd is not None:
+        store = PartitionStore.ingest(month_slices(df), schema, directory, fd, write=False, **options)
+        logger.info(f"Reusing {len(store)} month partitions in {directory}")
+    else:
+        os.makedirs(PARTITION_DIR, exist_ok=True)
+        while fd is None:
+            # Locked before anything is written, so pruning never takes it
+            tmp = tempfile.mkdtemp(dir=PARTITION_DIR, prefix=f"{name}.{df.attrs['data_version']}.",
+                                   suffix=".tmp")
+            fd = _lock_directory(tmp)
+        store = PartitionStore.ingest(month_slices(df), schema, tmp, fd, **options)
+        try:
+            os.rename(tmp, directory)
+            store.directory = directory
+        except OSError:
+            # Another worker published this version first; its files are the
+            # same, but keep reading the private copy until this store is dropped
+            logger.info(f"{directory} already exists; reading partitions from {tmp}")
+        logger.info(f"Wrote {len(store)} month partitions to {store.directory} "
+                    f"({len(store._hot)} kept in memory)")
+    prune_partition_dirs(PARTITION_DIR, name)
+    return store
@@ -0,0 +1,239 @@
+"""
+Time-series rollups of finding counts for trend charts
+"""
+import threading
+import numpy as np
+import pandas as pd
+from config.settings import DATA_PATH, LOAD_CHUNK_ROWS
+from src.data.cube import FILTER_DIMENSIONS
+from src.data.dedup import counted_findings
+from src.data.loader import load_security_data
+from src.utils.cache import LRUCache
+from src.utils.logger import logger
+
+# Rollup frequency -> description
+ROLLUP_FREQUENCIES = {"D": "daily", "W": "weekly", "M": "monthly"}
+
+
+def period_starts(opened: pd.Series) -> dict:
+    """
+    Start date of the day, ISO week (Monday) and month of each timestamp
+
+    Weeks are identified by their Monday, so the same week number in
+    different years never shares a bucket.
+
+    Args:
+        opened: Datetime column
+
+    Returns:
+        dict: {freq: datetime64[D] array} for every ROLLUP_FREQUENCIES key
+    """
+    days = opened.to_numpy(dtype="datetime64[D]")
+    # 1970-01-01 was a Thursday: (days + 3) % 7 is the weekday with Monday = 0
+    weekday = (days.astype(np.int64) + 3) % 7
+    return {
+        "D": days,
+        "W": days - weekday.astype("timedelta64[D]"),
+        "M": days.astype("datetime64[M]").astype("datetime64[D]"),
+    }
+
+
+def _month_keys(periods: np.ndarray) -> np.ndarray:
+    """int64 month number of each date (NaT keeps its own key)"""
+    return periods.astype("datetime64[M]").view(np.int64)
+
+
+def _touches(periods: np.ndarray, freq: str, months: np.ndarray) -> np.ndarray:
+    """Whether each period (given by its start) overlaps one of months"""
+    touched = np.isin(_month_keys(periods), months)
+    if freq == "W":
+        # A week can end in the month after the one it starts in
+        touched |= np.isin(_month_keys(periods + np.timedelta64(6, "D")), months)
+    return touched
+
+
+class RollupStore:
+    """
+    Finding counts per (filter dimensions, period) at several granularities
+
+    The store is updated chunk by chunk. Trend queries filter and sum a few
+    thousand rollup cells instead of grouping raw findings. A correlation
+    group is counted once (see counted_findings).
+
+    A digest of every month's counted rows is kept, so the store of a
+    reloaded dataset is derived from this one (see merge): only periods
+    overlapping a changed month are counted again.
+    """
+
+    def __init__(self):
+        self.columns = list(FILTER_DIMENSIONS.values())
+        self.tables = {freq: None for freq in ROLLUP_FREQUENCIES}
+        self.digests = {}
+
+    def month_digests(self, df: pd.DataFrame) -> dict:
+        """
+        Order-insensitive fingerprint of each month's counted rows
+
+        Args:
+            df: Findings DataFrame
+
+        Returns:
+            dict: {month key: (row count, wrapping sum of row hashes)}
+        """
+        counted = counted_findings(df)
+        if counted.empty:
+            return {}
+        hashes = pd.util.hash_pandas_object(counted[self.columns + ["Opened_At"]],
+                                            index=False).to_numpy()
+        months, inverse = np.unique(_month_keys(counted["Opened_At"].to_numpy(dtype="datetime64[D]")),
+                                    return_inverse=True)
+        sums = np.zeros(len(months), dtype=np.uint64)
+        np.add.at(sums, inverse, hashes)
+        counts = np.bincount(inverse, minlength=len(months))
+        return {int(m): (int(c), int(h)) for m, c, h in zip(months, counts, sums)}
+
+    def _add(self, freq: str, keys: pd.DataFrame, periods: np.ndarray):
+        """Add counted rows (their filter columns and period starts) to one rollup"""
+        counts = keys.assign(Period=periods).groupby(
+            self.columns + ["Period"], observed=True, dropna=False
+        ).size()
+        current = self.tables[freq]
+        if current is None:
+            self.tables[freq] = counts
+        else:
+            self.tables[freq] = current.add(counts, fill_value=0).astype(np.int64)
+
+    def update(self, chunk: pd.DataFrame):
+        """
+        Add a chunk of findings to every rollup
+
+        Args:
+            chunk: Findings with the filter dimension columns and Opened_At
+        """
+        chunk = counted_findings(chunk)
+        if chunk.empty:
+            return
+        keys = chunk[self.columns]
+        for freq, periods in period_starts(chunk["Opened_At"]).items():
+            self._add(freq, keys, periods)
+
+    def merge(self, df: pd.DataFrame, chunk_rows: int = LOAD_CHUNK_ROWS) -> "RollupStore":
+        """
+        Rollups of a reloaded dataset, reusing this store's unchanged months
+
+        Months whose digest differs (or that appear or disappear) are dirty.
+        Every period overlapping a dirty month is dropped and counted again
+        from df. The other periods are kept as they are.
+
+        Args:
+            df: The new findings DataFrame
+            chunk_rows: Rows per incremental update
+
+        Returns:
+            RollupStore: New store over df; this one is left unchanged
+        """
+        store = RollupStore()
+        store.digests = store.month_digests(df)
+        dirty = np.array([month for month in store.digests.keys() | self.digests.keys()
+                          if store.digests.get(month) != self.digests.get(month)], dtype=np.int64)
+
+        counted = counted_findings(df)
+        keys = counted[self.columns]
+        recounted = 0
+        for freq, periods in period_starts(counted["Opened_At"]).items():
+            table = self.tables[freq]
+            if table is not None:
+                kept = table[~_touches(table.index.get_level_values("Period").to_numpy(
+                    dtype="datetime64[D]"), freq, dirty)]
+                store.tables[freq] = kept if len(kept) else None
+            rows = np.flatnonzero(_touches(periods, freq, dirty))
+            recounted = max(recounted, len(rows))
+            for start in range(0, len(rows), chunk_rows):
+                part = rows[start:start + chunk_rows]
+                store._add(freq, keys.iloc[part], periods[part])
+        logger.info(f"Trend rollups updated: {len(dirty)} changed months, "
+                    f"{recounted} of {len(counted)} findings recounted")
+        return store
+
+    def query(self, freq: str, selections: dict = None, by: str = None) -> pd.DataFrame:
+        """
+        Counts per period under the given filter selections
+
+        Args:
+            freq: One of ROLLUP_FREQUENCIES
+            selections: Mapping of dimension name to selected values
+            by: Optional column to split counts by (e.g. "Severity")
+
+        Returns:
+            pd.DataFrame: Period[, by], Count columns sorted by period
+        """
+        keys = ["Period"] + ([by] if by else [])
+        table = self.tables[freq]
+        if table is None:
+            return pd.DataFrame(columns=keys + ["Count"])
+
+        mask = np.ones(len(table), dtype=bool)
+        for dim, values in (selections or {}).items():
+            if values:
+                mask &= table.index.get_level_values(FILTER_DIMENSIONS[dim]).isin(values)
+
+        result = table[mask].groupby(level=keys, observed=True).sum()
+        return result.reset_index(name="Count").sort_values(keys)
+
+    @property
+    def n_cells(self) -> dict:
+        return {freq: 0 if table is None else len(table) for freq, table in self.tables.items()}
+
+
+def build_rollups(df: pd.DataFrame, chunk_rows: int = LOAD_CHUNK_ROWS,
+                  previous: RollupStore = None) -> RollupStore:
+    """
+    Build a rollup store over a DataFrame, one chunk at a time
+
+    Args:
+        df: Findings DataFrame
+        chunk_rows: Rows per incremental update
+        previous: Store over an earlier version of the data, whose unchanged
+            months are reused (see RollupStore.merge)
+
+    Returns:
+        RollupStore: Populated store
+    """
+    if previous is not None:
+        return previous.merge(df, chunk_rows)
+    store = RollupStore()
+    for start in range(0, len(df), chunk_rows):
+        store.update(df.iloc[start:start + chunk_rows])
+    store.digests = store.month_digests(df)
+    logger.info(f"Built trend rollups: {store.n_cells} cells over {len(df)} findings")
+    return store
+
+
+# (file path, data version) -> store, for the current and the next version
+_stores = LRUCache(maxsize=2)
+# File path -> store of the most recently built version, the base for the next
+_latest = {}
+_stores_lock = threading.Lock()
+
+
+def get_rollup_store(filepath: str = DATA_PATH) -> RollupStore:
+    """
+    Rollup store for the cached dataset, derived from the previous version's
+
+    Args:
+        filepath: Path to CSV file
+
+    Returns:
+        RollupStore: Rollups of load_security_data(filepath)
+    """
+    df = load_security_data(filepath)
+    key = (filepath, df.attrs.get("data_version"))
+    store = _stores.get(key)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(key)
+            if store is None:
+                store = build_rollups(df, previous=_latest.get(filepath))
+                _stores.set(key, store)
+                _latest[filepath] = store
+    return store
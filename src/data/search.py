@@ -0,0 +1,186 @@
+"""
+Inverted token index for free-text search over findings
+"""
+import string
+import threading
+import numpy as np
+import pandas as pd
+from src.utils.logger import logger
+
+# Columns whose tokens are indexed, besides the tool URL
+SEARCH_COLUMNS = ["Category", "Repo/Account", "Assigned_Team"]
+
+# ASCII punctuation and whitespace separate tokens; \x01 marks a value boundary
+_SEPARATORS = str.maketrans({c: " " for c in string.punctuation + string.whitespace})
+_BOUNDARY = "\x01"
+
+
+def tokenize(text: str) -> list:
+    """Lower-case tokens of a search query (or any text)"""
+    return (text or "").lower().translate(_SEPARATORS).split()
+
+
+def _postings(values: pd.Series, first_row: int):
+    """
+    (token, row id) pairs of one column, as parallel arrays
+
+    Distinct values are tokenized once, all together: they are joined into
+    one string and split in a single pass, which is far faster than one
+    split per value.
+    """
+    codes, uniques = pd.factorize(values)
+    joined = f" {_BOUNDARY} ".join(pd.Index(uniques).astype(str).tolist())
+    tokens = np.array(tokenize(joined), dtype=object)
+    boundary = tokens == _BOUNDARY
+    value_of_token = np.cumsum(boundary)[~boundary]
+    tokens = tokens[~boundary]
+
+    # Expand (value, token) pairs into (row, token) pairs: rows grouped by value
+    by_value = np.argsort(codes, kind="stable")
+    value_starts = np.searchsorted(codes[by_value], np.arange(len(uniques) + 1))
+    lengths = np.diff(value_starts)[value_of_token]
+    first = np.repeat(value_starts[value_of_token] - (np.cumsum(lengths) - lengths), lengths)
+    rows = by_value[first + np.arange(lengths.sum())]
+    return np.repeat(tokens, lengths), rows.astype(np.int64) + first_row
+
+
+class _Segment:
+    """
+    Immutable postings for a batch of rows, in CSR layout
+
+    Attributes:
+        vocab: Sorted distinct tokens
+        offsets: Start of each token's postings in rows (plus the end)
+        rows: Row ids, sorted and distinct within each token
+    """
+
+    def __init__(self, words: np.ndarray, rows: np.ndarray):
+        token_codes, vocab = pd.factorize(words)
+        # Sort the (much smaller) vocabulary rather than every posting's token
+        vocab = np.asarray(vocab, dtype=str)
+        order = np.argsort(vocab, kind="stable")
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        self.vocab = vocab[order]
+        # One int64 key per posting; unique() sorts by (token, row) and drops
+        # rows matching a token in several columns
+        width = int(rows.max()) + 1 if len(rows) else 1
+        keys = np.sort(rank[token_codes] * width + rows)
+        keys = keys[np.append(True, keys[1:] != keys[:-1])] if len(keys) else keys
+        token_codes, self.rows = np.divmod(keys, width)
+        self.offsets = np.searchsorted(token_codes, np.arange(len(self.vocab) + 1))
+
+    def lookup(self, token: str, prefix: bool) -> np.ndarray:
+        """Rows containing token (or any token starting with it)"""
+        lo = np.searchsorted(self.vocab, token, side="left")
+        hi = (np.searchsorted(self.vocab, token + "\uffff", side="left") if prefix
+              else lo + int(lo < len(self.vocab) and self.vocab[lo] == token))
+        return self.rows[self.offsets[lo]:self.offsets[hi]]
+
+
+class SearchIndex:
+    """
+    Inverted index from tokens to row ids
+
+    Category, Repo/Account, Assigned_Team and tool_url are split into
+    lower-case alphanumeric tokens. Rows are added in batches (segments), so
+    appended findings are indexed without rebuilding; segments are merged
+    once there are more than ``max_segments``. A query token matches
+    indexed tokens by prefix, and multi-token queries intersect the posting
+    lists.
+
+    Args:
+        max_segments: Segments kept before they are merged into one
+    """
+
+    def __init__(self, max_segments: int = 8):
+        self.max_segments = max_segments
+        self._segments = []
+        self._lock = threading.Lock()
+        self.n_rows = 0
+
+    def add(self, df: pd.DataFrame, urls: pd.Series = None, first_row: int = None):
+        """
+        Index a batch of findings
+
+        Args:
+            df: Findings with the SEARCH_COLUMNS
+            urls: Tool URLs aligned with df (optional)
+            first_row: Row id of df's first row (defaults to the next unused id)
+        """
+        first_row = self.n_rows if first_row is None else first_row
+        columns = [df[col] for col in SEARCH_COLUMNS if col in df.columns]
+        if urls is not None:
+            columns.append(urls)
+        batch = [_postings(values.reset_index(drop=True), first_row) for values in columns]
+        words = np.concatenate([w for w, _ in batch]) if batch else np.array([], dtype=object)
+        rows = np.concatenate([r for _, r in batch]) if batch else np.array([], dtype=np.int64)
+        with self._lock:
+            self._segments.append(_Segment(words, rows))
+            if len(self._segments) > self.max_segments:
+                self._merge()
+            self.n_rows = max(self.n_rows, first_row + len(df))
+
+    def _merge(self):
+        """Replace all segments by a single one"""
+        words = np.concatenate([np.repeat(s.vocab, np.diff(s.offsets)).astype(object)
+                                for s in self._segments])
+        rows = np.concatenate([s.rows for s in self._segments])
+        self._segments = [_Segment(words, rows)]
+
+    def _matches(self, token: str, prefix: bool) -> np.ndarray:
+        """Boolean row mask of findings matching one token, across segments"""
+        with self._lock:
+            segments, n_rows = list(self._segments), self.n_rows
+        hit = np.zeros(n_rows, dtype=bool)
+        for segment in segments:
+            hit[segment.lookup(token, prefix)] = True
+        return hit
+
+    def search(self, query: str, mask: np.ndarray = None, limit: int = None) -> np.ndarray:
+        """
+        Ranked row ids of findings matching every query token
+
+        Posting lists are intersected by counting hits per row. Rows matching
+        more query tokens exactly (not just by prefix) rank first; ties are
+        broken newest first.
+
+        Args:
+            query: Free text, e.g. "s3 bucket" or a repository fragment
+            mask: Optional boolean row mask (the active dimension filters)
+            limit: Maximum number of row ids returned
+
+        Returns:
+            np.ndarray: Row ids, best match first
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return np.array([], dtype=np.int64)
+        matched = np.ones(self.n_rows, dtype=bool)
+        for token in tokens:
+            matched &= self._matches(token, prefix=True)
+        if mask is not None:
+            matched &= mask[:self.n_rows]
+        candidates = np.flatnonzero(matched)
+        score = np.zeros(len(candidates), dtype=np.int64)
+        for token in tokens:
+            score += self._matches(token, prefix=False)[candidates]
+        ranked = candidates[np.lexsort((-candidates, -score))]
+        return ranked if limit is None else ranked[:limit]
+
+
+def build_search_index(df: pd.DataFrame, urls: pd.Series = None) -> SearchIndex:
+    """
+    Index a loaded dataset
+
+    Args:
+        df: Findings DataFrame (row positions become row ids)
+        urls: Tool URLs in row order
+
+    Returns:
+        SearchIndex: Index over df
+    """
+    index = SearchIndex()
+    index.add(df, urls, first_row=0)
+    logger.info(f"Built search index over {index.n_rows} findings")
+    return index
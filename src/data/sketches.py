@@ -0,0 +1,290 @@
+"""
+Mergeable per-cell sketches over the filter cube
+"""
+import numpy as np
+import pandas as pd
+from config.settings import DATA_PATH, MTTR_SKETCH_ACCURACY, HLL_PRECISION
+from src.data.cube import FindingsCube, get_findings_cube
+from src.data.loader import dataset_cached, load_security_data
+from src.utils.logger import logger
+
+# Values below this (in hours) share the zero bucket
+_MIN_INDEXABLE = 1e-2
+
+
+class QuantileSketches:
+    """
+    Log-bucketed quantile sketch of a numeric column per cube cell
+
+    Each value lands in bucket ceil(log_gamma(x)) with
+    gamma = (1 + accuracy) / (1 - accuracy). Every estimated quantile is then
+    within a relative error of ``accuracy`` of the exact value at that rank
+    (the DDSketch bound). Sketches merge by adding bucket counts, so any
+    filter combination is answered by summing the selected cells' buckets.
+    Counts are stored sparsely as (cell, bucket) entries, and a query costs
+    one pass over those entries rather than over the findings. Like the cube's
+    cell counts, only one row per correlation group is sketched.
+
+    Args:
+        cube: Filter cube the rows are mapped through
+        values: Column aligned with the cube's rows (e.g. MTTR_Hours)
+        accuracy: Relative error bound, e.g. 0.02 for 2%
+    """
+
+    def __init__(self, cube: FindingsCube, values: pd.Series, accuracy: float = 0.02):
+        self.cube = cube
+        self.accuracy = accuracy
+        self.log_gamma = np.log((1 + accuracy) / (1 - accuracy))
+
+        x = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float)
+        valid = ~np.isnan(x) & (x >= 0) & cube.counted
+        x, cells = x[valid], cube.row_cell[valid]
+
+        # Bucket 0 holds near-zero values; the rest span only the indices seen
+        positive = x >= _MIN_INDEXABLE
+        index = np.zeros(len(x), dtype=np.int64)
+        index[positive] = np.ceil(np.log(x[positive]) / self.log_gamma).astype(np.int64)
+        self.offset = int(index[positive].min()) - 1 if positive.any() else 0
+        index[positive] -= self.offset
+        self.width = int(index.max()) + 1 if len(index) else 1
+
+        # Sparse (cell, bucket) -> count entries; most cells use few buckets
+        entries, self.entry_count = np.unique(cells * self.width + index, return_counts=True)
+        self.entry_cell, self.entry_bucket = np.divmod(entries, self.width)
+
+    @property
+    def n_entries(self) -> int:
+        return len(self.entry_count)
+
+    @property
+    def bucket_values(self) -> np.ndarray:
+        """Representative value of every bucket (0 for the zero bucket)"""
+        gamma = np.exp(self.log_gamma)
+        exponents = np.arange(self.width) + self.offset
+        values = 2 * np.exp(exponents * self.log_gamma) / (gamma + 1)
+        values[0] = 0.0
+        return values
+
+    def histogram(self, selections: dict = None) -> np.ndarray:
+        """Merged bucket counts over the cells matching selections"""
+        bucket, count = self.entry_bucket, self.entry_count
+        if selections:
+            selected = self.cube.cell_mask(selections)[self.entry_cell]
+            bucket, count = bucket[selected], count[selected]
+        return np.bincount(bucket, weights=count, minlength=self.width).astype(np.int64)
+
+    def histogram_of(self, values: pd.Series) -> np.ndarray:
+        """
+        Bucket counts of raw values on this sketch's buckets
+
+        Used where cells cannot answer the query, e.g. findings inside a
+        time window; the cost is one pass over the given values.
+
+        Args:
+            values: Values from the sketched column (e.g. a filtered MTTR_Hours)
+
+        Returns:
+            np.ndarray: Bucket counts, compatible with quantiles()
+        """
+        x = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float)
+        x = x[~np.isnan(x) & (x >= 0)]
+        positive = x >= _MIN_INDEXABLE
+        index = np.zeros(len(x), dtype=np.int64)
+        index[positive] = np.clip(np.ceil(np.log(x[positive]) / self.log_gamma).astype(np.int64)
+                                  - self.offset, 1, self.width - 1)
+        return np.bincount(index, minlength=self.width).astype(np.int64)
+
+    def histogram_by(self, dim: str, selections: dict = None) -> dict:
+        """
+        Merged bucket counts per value of one dimension
+
+        Args:
+            dim: Dimension name (see FILTER_DIMENSIONS)
+            selections: Mapping of dimension name to selected values
+
+        Returns:
+            dict: {value: bucket counts} for values with at least one finding
+        """
+        selected = self.cube.cell_mask(selections or {})[self.entry_cell]
+        codes = self.cube.cell_codes[dim][self.entry_cell[selected]]
+        n_values = len(self.cube.categories[dim]) + 1
+        merged = np.bincount(codes * self.width + self.entry_bucket[selected],
+                             weights=self.entry_count[selected],
+                             minlength=n_values * self.width
+                             ).astype(np.int64).reshape(n_values, self.width)
+        return {
+            value: merged[i]
+            for i, value in enumerate(self.cube.categories[dim])
+            if merged[i].any()
+        }
+
+    def quantiles(self, histogram: np.ndarray, qs) -> list:
+        """
+        Estimate quantiles from merged bucket counts
+
+        Args:
+            histogram: Bucket counts from histogram() or histogram_by()
+            qs: Quantiles in [0, 1]
+
+        Returns:
+            list: Estimated value per quantile (None when there is no data)
+        """
+        total = histogram.sum()
+        if total == 0:
+            return [None for _ in qs]
+        cumulative = np.cumsum(histogram)
+        ranks = np.floor(np.asarray(qs) * (total - 1))
+        buckets = np.searchsorted(cumulative, ranks, side="right")
+        return self.bucket_values[buckets].tolist()
+
+
+@dataset_cached()
+def get_mttr_sketches(filepath: str = DATA_PATH) -> QuantileSketches:
+    """
+    Build (once per data version) the MTTR quantile sketches for the cached dataset
+
+    Args:
+        filepath: Path to CSV file
+
+    Returns:
+        QuantileSketches: MTTR_Hours sketches per filter cube cell
+    """
+    sketches = QuantileSketches(get_findings_cube(filepath),
+                                load_security_data(filepath)["MTTR_Hours"],
+                                MTTR_SKETCH_ACCURACY)
+    logger.info(f"Built MTTR sketches: {sketches.n_entries} entries, {sketches.width} buckets "
+                f"over {sketches.cube.n_cells} cells")
+    return sketches
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    """Exact bit length of uint64 values (0 for 0)"""
+    high, low = values >> np.uint64(32), values & np.uint64(0xFFFFFFFF)
+    # frexp is exact for integers below 2**53, so split into 32-bit halves
+    high_bits = np.frexp(high.astype(np.float64))[1]
+    low_bits = np.frexp(low.astype(np.float64))[1]
+    return np.where(high > 0, high_bits + 32, low_bits).astype(np.uint8)
+
+
+class DistinctSketches:
+    """
+    HyperLogLog sketch of a column's distinct values per cube cell
+
+    A value's 64-bit hash picks one of m = 2^precision registers with its top
+    bits. The register keeps the longest run of leading zeros seen in the
+    remaining bits. Sketches union by taking the register-wise maximum, so
+    the distinct count under any filter combination is estimated from the
+    selected cells alone, without touching the findings.
+
+    The relative standard error is 1.04 / sqrt(m): about 1.6% for the default
+    precision 12, and within three times that for 99.7% of queries. Small
+    counts fall back to linear counting and are near-exact.
+
+    Args:
+        cube: Filter cube the rows are mapped through
+        values: Column aligned with the cube's rows (e.g. Category)
+        precision: Number of register index bits, 4-16
+    """
+
+    def __init__(self, cube: FindingsCube, values: pd.Series, precision: int = 12):
+        self.cube = cube
+        self.precision = precision
+        self.m = 1 << precision
+
+        valid = values.notna().to_numpy()
+        hashes = pd.util.hash_pandas_object(values[valid].astype(str), index=False,
+                                            categorize=True).to_numpy()
+        cells = cube.row_cell[valid]
+        register = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+        remainder = hashes & np.uint64((1 << (64 - precision)) - 1)
+        rank = (64 - precision + 1) - _bit_length(remainder)
+
+        # Sparse (cell, register) -> max rank entries
+        key = cells * self.m + register
+        order = np.lexsort((rank, key))
+        key, rank = key[order], rank[order]
+        last = np.ones(len(key), dtype=bool)
+        last[:-1] = key[1:] != key[:-1]
+        self.entry_cell, self.entry_register = np.divmod(key[last], self.m)
+        self.entry_rank = rank[last]
+
+    @property
+    def n_entries(self) -> int:
+        return len(self.entry_rank)
+
+    def _estimate(self, harmonic, zeros):
+        """
+        HyperLogLog estimate (with small-range correction)
+
+        Args:
+            harmonic: Sum of 2^-register over all m registers
+            zeros: Number of registers still at zero
+        """
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / harmonic
+        linear = m * np.log(m / np.maximum(zeros, 1))
+        return np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+
+    def count(self, selections: dict = None) -> int:
+        """Estimated distinct values over the cells matching selections"""
+        register, rank = self.entry_register, self.entry_rank
+        if selections:
+            selected = self.cube.cell_mask(selections)[self.entry_cell]
+            register, rank = register[selected], rank[selected]
+        registers = np.zeros(self.m, dtype=np.uint8)
+        np.maximum.at(registers, register, rank)
+        harmonic = np.exp2(-registers.astype(np.float64)).sum()
+        return int(round(float(self._estimate(harmonic, np.count_nonzero(registers == 0)))))
+
+    def count_by(self, dim: str, selections: dict = None) -> dict:
+        """
+        Estimated distinct values per value of one dimension
+
+        Args:
+            dim: Dimension name (see FILTER_DIMENSIONS)
+            selections: Mapping of dimension name to selected values
+
+        Returns:
+            dict: {value: estimated distinct count} for values with findings
+        """
+        selected = self.cube.cell_mask(selections or {})[self.entry_cell]
+        codes = self.cube.cell_codes[dim][self.entry_cell[selected]]
+        # Union per value over the selected entries only: registers are kept
+        # sparse, so memory follows the entries, not values x m
+        key = codes.astype(np.int64) * self.m + self.entry_register[selected]
+        rank = self.entry_rank[selected]
+        order = np.lexsort((rank, key))
+        key, rank = key[order], rank[order]
+        last = np.ones(len(key), dtype=bool)
+        last[:-1] = key[1:] != key[:-1]
+        groups, group = np.unique(key[last] // self.m, return_inverse=True)
+        filled = np.bincount(group, minlength=len(groups))
+        # Registers never set are zero and add 2^0 each to the harmonic sum
+        harmonic = (np.bincount(group, weights=np.exp2(-rank[last].astype(np.float64)),
+                                minlength=len(groups)) + (self.m - filled))
+        estimates = self._estimate(harmonic, self.m - filled)
+        categories = self.cube.categories[dim]
+        return {
+            categories[code]: int(round(float(estimate)))
+            for code, estimate in zip(groups, estimates)
+            if code < len(categories)
+        }
+
+
+@dataset_cached(maxsize=8)
+def get_distinct_sketches(column: str, filepath: str = DATA_PATH) -> DistinctSketches:
+    """
+    Build (once per data version) the HyperLogLog sketches of a column for the cached dataset
+
+    Args:
+        column: Column whose distinct values are counted
+        filepath: Path to CSV file
+
+    Returns:
+        DistinctSketches: Sketches per filter cube cell
+    """
+    sketches = DistinctSketches(get_findings_cube(filepath),
+                                load_security_data(filepath)[column], HLL_PRECISION)
+    logger.info(f"Built distinct-count sketches for {column}: {sketches.n_entries} entries")
+    return sketches
@@ -0,0 +1,209 @@
+"""
+SLA breach tracking for open findings
+"""
+import threading
+import numpy as np
+import pandas as pd
+from config.settings import DATA_PATH
+from src.data.backlog import OPEN_STATUSES
+from src.data.dedup import CANONICAL_COLUMN, finding_keys
+from src.data.loader import load_security_data
+from src.utils.cache import LRUCache
+from src.utils.helpers import calculate_ages_hours, get_sla_hours, utc_now_naive
+from src.utils.logger import logger
+
+_HOUR_NS = 3600 * 10**9
+
+
+def _open_deadlines(df: pd.DataFrame, sort: bool = True):
+    """
+    SLA deadlines of the open findings in df
+
+    A correlation group is tracked through its canonical row only, so a
+    breach is counted once however many tools reported it.
+
+    Args:
+        df: Findings DataFrame
+        sort: Whether to order the result by deadline, earliest first
+
+    Returns:
+        tuple: (deadline ns, finding key, row position) arrays
+    """
+    sla = df["Severity"].map(get_sla_hours()).to_numpy(dtype=float)
+    tracked = (df["Status"].isin(OPEN_STATUSES).to_numpy() & ~np.isnan(sla)
+               & df["Opened_At"].notna().to_numpy())
+    if CANONICAL_COLUMN in df.columns:
+        tracked &= df[CANONICAL_COLUMN].to_numpy(dtype=bool)
+    rows = np.flatnonzero(tracked)
+    opened = df["Opened_At"].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    deadline = opened[rows] + (sla[rows] * _HOUR_NS).astype(np.int64)
+    if sort:
+        order = np.argsort(deadline, kind="stable")
+        deadline, rows = deadline[order], rows[order]
+    open_rows = df.iloc[rows]
+    keys = (open_rows["Finding_Key"].to_numpy() if "Finding_Key" in df.columns
+            else finding_keys(open_rows))
+    return deadline, keys, rows
+
+
+class SLAEngine:
+    """
+    Open findings kept sorted by SLA deadline (Opened_At + SLA hours)
+
+    Deadlines do not move as time passes, so the index never needs
+    re-sorting. "Breached" is the prefix before now and "breaching within N
+    hours" is the slice up to now + N. Both are found with a binary search.
+    An engine never changes. The engine of a new dataset version is built
+    from the previous one: only newly opened findings are sorted, and
+    findings no longer open are dropped.
+
+    Args:
+        df: Findings DataFrame with Opened_At, Severity and Status
+        previous: Engine over an earlier version of the data, whose index
+            is reused
+    """
+
+    def __init__(self, df: pd.DataFrame, previous: "SLAEngine" = None):
+        # (df, data version, deadline, keys, rows)
+        if previous is None:
+            self._state = (df, df.attrs.get("data_version")) + _open_deadlines(df)
+        else:
+            self._state = previous._merge(df)
+
+    @property
+    def df(self) -> pd.DataFrame:
+        return self._state[0]
+
+    @property
+    def data_version(self) -> str:
+        return self._state[1]
+
+    def __len__(self):
+        return len(self._state[2])
+
+    def _merge(self, df: pd.DataFrame) -> tuple:
+        """
+        This index brought up to date with a reloaded dataset
+
+        Args:
+            df: The new findings DataFrame
+
+        Returns:
+            tuple: State of the engine over df
+        """
+        _, _, old_deadline, old_keys, _ = self._state
+        deadline, keys, rows = _open_deadlines(df, sort=False)
+
+        # Keep still-open findings with an unchanged deadline in their
+        # current order, re-pointed at df; everything else is (re)inserted
+        still_open = pd.Index(keys).get_indexer(old_keys)
+        kept = still_open >= 0
+        kept[kept] = deadline[still_open[kept]] == old_deadline[kept]
+        is_new = np.ones(len(keys), dtype=bool)
+        is_new[still_open[kept]] = False
+        kept_rows = rows[still_open[kept]]
+        old_deadline, old_keys = old_deadline[kept], old_keys[kept]
+
+        # Sort only the newly opened findings, then merge them into the index
+        new = np.flatnonzero(is_new)
+        new = new[np.argsort(deadline[new], kind="stable")]
+        positions = np.searchsorted(old_deadline, deadline[new], side="right")
+        state = (
+            df, df.attrs.get("data_version"),
+            np.insert(old_deadline, positions, deadline[new]),
+            np.insert(old_keys, positions, keys[new]),
+            np.insert(kept_rows, positions, rows[new]),
+        )
+        logger.info(f"SLA index updated: +{int(is_new.sum())} inserted, "
+                    f"-{int((~kept).sum())} removed, {len(state[2])} open")
+        return state
+
+    @staticmethod
+    def _bounds(deadline: np.ndarray, now, horizon_hours: float = 0):
+        """Index slice boundaries for breached and due-within-horizon findings"""
+        now_ns = pd.Timestamp(now).value
+        breached = np.searchsorted(deadline, now_ns, side="right")
+        due = np.searchsorted(deadline, now_ns + int(horizon_hours * _HOUR_NS), side="right")
+        return breached, due
+
+    def summary(self, mask: np.ndarray = None, horizon_hours: float = 24, now=None) -> dict:
+        """
+        Count open, breached and soon-breaching findings
+
+        Args:
+            mask: Optional boolean row mask over df (the active filters)
+            horizon_hours: "Breaching soon" look-ahead
+            now: Reference time (defaults to the current UTC time)
+
+        Returns:
+            dict: open, breached and due_soon counts
+        """
+        _, _, deadline, _, rows = self._state
+        breached, due = self._bounds(deadline, now or utc_now_naive(), horizon_hours)
+        selected = np.ones(len(rows), dtype=bool) if mask is None else mask[rows]
+        return {
+            "open": int(selected.sum()),
+            "breached": int(selected[:breached].sum()),
+            "due_soon": int(selected[breached:due].sum()),
+        }
+
+    def breaching_within(self, horizon_hours: float, k: int = 10,
+                         mask: np.ndarray = None, now=None) -> pd.DataFrame:
+        """
+        Top-K open findings closest to breaching within the horizon
+
+        Args:
+            horizon_hours: Look-ahead in hours
+            k: Maximum number of findings returned
+            mask: Optional boolean row mask over df (the active filters)
+            now: Reference time (defaults to the current UTC time)
+
+        Returns:
+            pd.DataFrame: Findings ordered by deadline, with Age_Hours and
+            Hours_Remaining columns
+        """
+        now = now or utc_now_naive()
+        df, _, deadline, _, rows = self._state
+        breached, due = self._bounds(deadline, now, horizon_hours)
+        rows, deadline = rows[breached:due], deadline[breached:due]
+        if mask is not None:
+            keep = mask[rows]
+            rows, deadline = rows[keep], deadline[keep]
+        top = df.iloc[rows[:k]]
+        return top.assign(
+            Age_Hours=calculate_ages_hours(top["Opened_At"], now).round(1),
+            Hours_Remaining=((deadline[:k] - pd.Timestamp(now).value) / _HOUR_NS).round(1)
+        )
+
+
+# (file path, data version) -> engine, for the current and the next version
+_engines = LRUCache(maxsize=2)
+# File path -> engine of the most recently built version, the base for the next
+_latest = {}
+_engines_lock = threading.Lock()
+
+
+def get_sla_engine(filepath: str = DATA_PATH) -> SLAEngine:
+    """
+    SLA engine for the cached dataset, derived from the previous version's
+
+    Args:
+        filepath: Path to CSV file
+
+    Returns:
+        SLAEngine: Engine aligned with load_security_data(filepath)
+    """
+    df = load_security_data(filepath)
+    key = (filepath, df.attrs.get("data_version"))
+    engine = _engines.get(key)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(key)
+            if engine is None:
+                previous = _latest.get(filepath)
+                engine = SLAEngine(df, previous)
+                if previous is None:
+                    logger.info(f"Built SLA index over {len(engine)} open findings")
+                _engines.set(key, engine)
+                _latest[filepath] = engine
+    return engine
@@ -0,0 +1,553 @@
+"""
+Pluggable storage backends for filtered queries
+"""
+import contextvars
+import glob
+import os
+import sqlite3
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from contextlib import closing
+import numpy as np
+import pandas as pd
+from config.settings import DATA_PATH, STORAGE_BACKEND, SQLITE_PATH
+from src.data.aggregations import AGGREGATIONS, GroupByPlan, _group_keys, aggregate_by
+from src.data.cube import FILTER_DIMENSIONS, get_findings_cube
+from src.data.dedup import CANONICAL_COLUMN
+from src.data.loader import load_security_data
+from src.data.partitions import PartitionStore, get_partition_store
+from src.utils.cache import LRUCache
+from src.utils.logger import logger
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: stores of old versions are left in place
+    fcntl = None
+
+# Columns indexed in SQL stores: the filter dimensions plus the time axis
+INDEXED_COLUMNS = list(FILTER_DIMENSIONS.values()) + ["Opened_At"]
+
+
+class StorageBackend(ABC):
+    """
+    Read interface shared by every storage backend
+
+    Results are pandas objects indexed by the finding's row position in
+    load_security_data(), whatever the backend keeps underneath. Counts and
+    aggregates take one row per correlation group (see counted_findings).
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def filter(self, selections: dict, columns: list = None, rows: slice = None,
+               counted: bool = False) -> pd.DataFrame:
+        """
+        Findings matching the filter selections
+
+        Args:
+            selections: Mapping of dimension name to selected values
+            columns: Optional subset of columns to return
+            rows: Optional row range (a time window, see get_time_window)
+            counted: Keep only one row per correlation group, as counts do
+
+        Returns:
+            pd.DataFrame: Matching findings
+        """
+
+    @abstractmethod
+    def count_by(self, column, selections: dict = None, rows: slice = None) -> pd.Series:
+        """
+        Number of matching findings per value of a column, largest first
+
+        Args:
+            column: Grouping column, or a list of columns
+            selections: Mapping of dimension name to selected values
+            rows: Optional row range (a time window)
+
+        Returns:
+            pd.Series: Count per value (per combination for several columns);
+            values without findings are left out
+        """
+
+    @abstractmethod
+    def aggregate(self, x_col: str, y_col: str, agg: str = "sum", selections: dict = None,
+                  color_col: str = None, rows: slice = None) -> pd.DataFrame:
+        """
+        Aggregate a numeric column per x (and color) group
+
+        Args:
+            x_col: Grouping column
+            y_col: Numeric column to aggregate
+            agg: One of AGGREGATIONS
+            selections: Mapping of dimension name to selected values
+            color_col: Optional second grouping column
+            rows: Optional row range (a time window)
+
+        Returns:
+            pd.DataFrame: One row per group, aggregate in y_col, sorted by x_col
+        """
+
+
+def _count_values(frame: pd.DataFrame, column) -> pd.Series:
+    """count_by over an already filtered frame"""
+    columns = [column] if isinstance(column, str) else list(column)
+    counts = frame.groupby(columns, observed=True).size().sort_values(ascending=False, kind="stable")
+    return counts[counts > 0].rename("count")
+
+
+class PandasBackend(StorageBackend):
+    """
+    In-memory DataFrame backend (the default)
+
+    Filters are evaluated through the filter cube, so a query touches cells
+    and a boolean row mask instead of five isin() passes.
+
+    Args:
+        df: Findings DataFrame
+        cube: Filter cube aligned with df
+    """
+
+    name = "pandas"
+
+    def __init__(self, df: pd.DataFrame, cube):
+        self.df = df
+        self.cube = cube
+
+    def filter(self, selections: dict, columns: list = None, rows: slice = None,
+               counted: bool = False) -> pd.DataFrame:
+        frame = self.df if columns is None else self.df[columns]
+        rows = rows or slice(None)
+        frame = frame.iloc[rows]
+        mask = None
+        if selections:
+            mask = self.cube.cell_mask(selections)[self.cube.row_cell[rows]]
+        if counted and not self.cube.counted.all():
+            mask = self.cube.counted[rows] if mask is None else mask & self.cube.counted[rows]
+        return frame if mask is None else frame[mask]
+
+    def count_by(self, column, selections: dict = None, rows: slice = None) -> pd.Series:
+        columns = [column] if isinstance(column, str) else list(column)
+        return _count_values(self.filter(selections or {}, columns, rows, counted=True), column)
+
+    def aggregate(self, x_col: str, y_col: str, agg: str = "sum", selections: dict = None,
+                  color_col: str = None, rows: slice = None) -> pd.DataFrame:
+        keys = _group_keys(x_col, color_col)
+        frame = self.filter(selections or {}, list(dict.fromkeys(keys + [y_col])), rows, counted=True)
+        return aggregate_by(frame, x_col, y_col, agg, color_col)
+
+
+class PartitionedBackend(StorageBackend):
+    """
+    Month-partitioned backend
+
+    A row range (time window) only reads the partitions it overlaps; cold
+    partitions come from disk through the store's LRU.
+
+    Args:
+        store: Month partitions of the findings
+    """
+
+    name = "partitioned"
+
+    def __init__(self, store: PartitionStore):
+        self.store = store
+
+    def filter(self, selections: dict, columns: list = None, rows: slice = None,
+               counted: bool = False) -> pd.DataFrame:
+        active = {FILTER_DIMENSIONS[dim]: values for dim, values in (selections or {}).items() if values}
+        counted = counted and any(col == CANONICAL_COLUMN for col, _ in self.store.schema)
+        needed = None if columns is None else list(dict.fromkeys(
+            list(columns) + list(active) + ([CANONICAL_COLUMN] if counted else [])))
+        frame = self.store.scan(columns=needed, rows=rows)
+        for column, values in active.items():
+            frame = frame[frame[column].isin(values)]
+        if counted:
+            frame = frame[frame[CANONICAL_COLUMN].to_numpy(dtype=bool)]
+        return frame if columns is None else frame[columns]
+
+    def count_by(self, column, selections: dict = None, rows: slice = None) -> pd.Series:
+        columns = [column] if isinstance(column, str) else list(column)
+        return _count_values(self.filter(selections, columns, rows, counted=True), column)
+
+    def aggregate(self, x_col: str, y_col: str, agg: str = "sum", selections: dict = None,
+                  color_col: str = None, rows: slice = None) -> pd.DataFrame:
+        keys = _group_keys(x_col, color_col)
+        frame = self.filter(selections, list(dict.fromkeys(keys + [y_col])), rows, counted=True)
+        return aggregate_by(frame, x_col, y_col, agg, color_col)
+
+
+def _quote(column: str) -> str:
+    """SQL identifier for a column name"""
+    return '"' + column.replace('"', '""') + '"'
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Embedded, file-based SQL backend (stdlib sqlite3)
+
+    Findings live in one table with an index on every filter dimension and on
+    Opened_At (stored as epoch milliseconds). Filters become WHERE ... IN
+    clauses and sum/mean aggregations become GROUP BY queries. Median and
+    p95 have no SQLite aggregate: the filtered (x, color, y) projection is
+    fetched and reduced with pandas. Each call opens its own read-only
+    connection, so the backend is safe to share between threads.
+
+    The file is held open under a shared flock while the backend exists,
+    which marks it as in use for prune_sqlite_stores in every process.
+
+    Args:
+        path: SQLite database file built by SQLiteBackend.build
+    """
+
+    name = "sqlite"
+    TABLE = "findings"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_SH)
+        with self._connect() as conn:
+            info = conn.execute(f"PRAGMA table_info({self.TABLE})").fetchall()
+            self.columns = [row[1] for row in info if row[1] != "row_id"]
+            meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+        self.data_version = meta.get("data_version")
+        self.datetime_columns = [c for c in meta.get("datetime_columns", "").split(",") if c]
+        self.uint64_columns = [c for c in meta.get("uint64_columns", "").split(",") if c]
+        self.bool_columns = [c for c in meta.get("bool_columns", "").split(",") if c]
+
+    def _connect(self):
+        return sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, path: str, chunk_rows: int = 200000) -> "SQLiteBackend":
+        """
+        Write findings to a new SQLite file and index it
+
+        The file is written under a unique temporary name and renamed into
+        place, so concurrent builders never share a file and readers never
+        see a partial store.
+
+        Args:
+            df: Findings DataFrame (row positions become row_id)
+            path: Destination database file (replaced if present)
+            chunk_rows: Rows per insert batch
+
+        Returns:
+            SQLiteBackend: Backend reading from path
+        """
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+        try:
+            # Held until the backend has its own lock, so pruning never takes it
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_SH)
+            try:
+                cls._write(df, tmp_path, chunk_rows)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+            logger.info(f"Built SQLite store {path} with {len(df)} findings")
+            return cls(path)
+        finally:
+            os.close(fd)
+
+    @classmethod
+    def _write(cls, df: pd.DataFrame, path: str, chunk_rows: int):
+        """Write and index the findings table and its meta table in path"""
+        datetime_columns = [c for c in df.columns if pd.api.types.is_datetime64_any_dtype(df[c])]
+        uint64_columns = [c for c in df.columns if df[c].dtype == np.uint64]
+        bool_columns = [c for c in df.columns if df[c].dtype == bool]
+        with closing(sqlite3.connect(path)) as conn, conn:
+            conn.execute("PRAGMA journal_mode=OFF")
+            conn.execute("PRAGMA synchronous=OFF")
+            for start in range(0, len(df), chunk_rows):
+                chunk = df.iloc[start:start + chunk_rows]
+                encoded = {}
+                for col in chunk.columns:
+                    values = chunk[col]
+                    if col in datetime_columns:
+                        values = values.to_numpy(dtype="datetime64[ms]").astype(np.int64)
+                        values = pd.Series(values, index=chunk.index).where(chunk[col].notna())
+                    elif col in uint64_columns:
+                        values = values.to_numpy().view(np.int64)
+                    encoded[col] = values
+                pd.DataFrame(encoded, index=pd.RangeIndex(start, start + len(chunk), name="row_id")).to_sql(
+                    cls.TABLE, conn, if_exists="append" if start else "replace", index=True
+                )
+            for col in INDEXED_COLUMNS:
+                if col in df.columns:
+                    name = "idx_" + "".join(ch if ch.isalnum() else "_" for ch in col)
+                    conn.execute(f"CREATE INDEX {name} ON {cls.TABLE} ({_quote(col)})")
+            conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+            conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ("data_version", str(df.attrs.get("data_version", ""))),
+                ("datetime_columns", ",".join(datetime_columns)),
+                ("uint64_columns", ",".join(uint64_columns)),
+                ("bool_columns", ",".join(bool_columns)),
+            ])
+
+    def _check(self, *columns):
+        for col in columns:
+            if col not in self.columns:
+                raise ValueError(f"Unknown column: {col}")
+
+    def _where(self, selections: dict, rows: slice = None, counted: bool = False):
+        """WHERE clause and parameters for the filter selections and row range"""
+        clauses, params = [], []
+        for dim, values in (selections or {}).items():
+            if values:
+                clauses.append(f"{_quote(FILTER_DIMENSIONS[dim])} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        if counted and CANONICAL_COLUMN in self.columns:
+            clauses.append(f"{_quote(CANONICAL_COLUMN)} = 1")
+        # Rows are stored in Opened_At order, so a time window is a row_id range
+        if rows is not None and rows.start is not None:
+            clauses.append("row_id >= ?")
+            params.append(rows.start)
+        if rows is not None and rows.stop is not None:
+            clauses.append("row_id < ?")
+            params.append(rows.stop)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def _decode(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Restore the dtypes that SQLite cannot store natively"""
+        for col in self.datetime_columns:
+            if col in frame.columns:
+                frame[col] = pd.to_datetime(frame[col], unit="ms")
+        for col in self.uint64_columns:
+            if col in frame.columns:
+                frame[col] = frame[col].to_numpy(dtype=np.int64).view(np.uint64)
+        for col in self.bool_columns:
+            if col in frame.columns:
+                frame[col] = frame[col].astype(bool)
+        return frame
+
+    def filter(self, selections: dict, columns: list = None, rows: slice = None,
+               counted: bool = False) -> pd.DataFrame:
+        columns = columns or self.columns
+        self._check(*columns)
+        where, params = self._where(selections, rows, counted)
+        select = ", ".join(["row_id"] + [_quote(c) for c in columns])
+        with self._connect() as conn:
+            frame = pd.read_sql_query(f"SELECT {select} FROM {self.TABLE}{where}", conn,
+                                      params=params, index_col="row_id")
+        frame.index.name = None
+        return self._decode(frame)
+
+    def count_by(self, column, selections: dict = None, rows: slice = None) -> pd.Series:
+        columns = [column] if isinstance(column, str) else list(column)
+        self._check(*columns)
+        where, params = self._where(selections, rows, counted=True)
+        group = ", ".join(_quote(c) for c in columns)
+        query = (f"SELECT {group}, COUNT(*) AS count FROM {self.TABLE}{where} "
+                 f"GROUP BY {group} ORDER BY count DESC")
+        with self._connect() as conn:
+            frame = pd.read_sql_query(query, conn, params=params)
+        return self._decode(frame).set_index(column)["count"]
+
+    def aggregate(self, x_col: str, y_col: str, agg: str = "sum", selections: dict = None,
+                  color_col: str = None, rows: slice = None) -> pd.DataFrame:
+        if agg not in AGGREGATIONS:
+            raise ValueError(f"Unknown aggregation: {agg}")
+        keys = _group_keys(x_col, color_col)
+        self._check(y_col, *keys)
+        if agg not in ("sum", "mean"):
+            frame = self.filter(selections, list(dict.fromkeys(keys + [y_col])), rows, counted=True)
+            return aggregate_by(frame, x_col, y_col, agg, color_col)
+
+        where, params = self._where(selections, rows, counted=True)
+        function = "SUM" if agg == "sum" else "AVG"
+        group = ", ".join(_quote(k) for k in keys)
+        query = (f"SELECT {group}, {function}({_quote(y_col)}) AS {_quote(y_col)} "
+                 f"FROM {self.TABLE}{where} GROUP BY {group} ORDER BY {_quote(x_col)}")
+        with self._connect() as conn:
+            frame = pd.read_sql_query(query, conn, params=params)
+        return self._decode(frame)
+
+
+class StoragePlan(GroupByPlan):
+    """
+    GroupByPlan answering counts and aggregates through a storage backend
+
+    Bar, line and pie charts are then computed where the data lives (GROUP BY
+    queries for SQLite); the filtered rows are fetched only if a chart needs
+    them (scatter, box). Like the counts, those rows take one row per
+    correlation group.
+
+    Args:
+        backend: Storage backend to query
+        selections: Mapping of dimension name to selected values
+        rows: Optional row range (a time window)
+    """
+
+    def __init__(self, backend: StorageBackend, selections: dict = None, rows: slice = None):
+        self.backend = backend
+        self.selections = selections or {}
+        self.rows = rows
+        self._df = None
+        self._groupbys = {}
+        self._results = {}
+
+    @property
+    def df(self) -> pd.DataFrame:
+        """Filtered findings, read from the backend on first use"""
+        if self._df is None:
+            self._df = self.backend.filter(self.selections, rows=self.rows, counted=True)
+        return self._df
+
+    def counts(self, x_col: str) -> pd.Series:
+        return self.memo("count", [x_col],
+                         lambda: self.backend.count_by(x_col, self.selections, self.rows))
+
+    def aggregate(self, x_col: str, y_col: str, agg: str = "sum", color_col: str = None) -> pd.DataFrame:
+        return self.memo(f"{agg}:{y_col}", _group_keys(x_col, color_col),
+                         lambda: self.backend.aggregate(x_col, y_col, agg, self.selections,
+                                                        color_col, self.rows))
+
+    @property
+    def empty(self) -> bool:
+        # Every finding has a source, so no source counts means no findings
+        return self.counts(FILTER_DIMENSIONS["source"]).empty
+
+
+def sqlite_store_path(version: str) -> str:
+    """SQLite file for one data version: SQLITE_PATH with the version before the extension"""
+    root, ext = os.path.splitext(SQLITE_PATH)
+    return f"{root}.{version}{ext}"
+
+
+def prune_sqlite_stores() -> int:
+    """
+    Remove SQLite files of data versions no backend in any process has open
+
+    Returns:
+        int: Number of files removed (always 0 without flock)
+    """
+    if fcntl is None:
+        return 0
+    root, ext = os.path.splitext(SQLITE_PATH)
+    removed = 0
+    for stale in glob.glob(f"{glob.escape(root)}.*{glob.escape(ext)}"):
+        if stale.endswith(".tmp"):
+            continue
+        try:
+            with open(stale, "rb") as f:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                os.remove(stale)
+                removed += 1
+        except BlockingIOError:
+            continue  # still in use
+        except OSError as e:
+            logger.warning(f"Could not remove stale SQLite store {stale}: {e}")
+    return removed
+
+
+# (file path, data version) -> backend, for the current and the next version
+_backends = LRUCache(maxsize=2)
+_backends_lock = threading.Lock()
+# Serializes store builds, so a version is built once per process
+_build_lock = threading.Lock()
+# (file path, data version) of the stores being built in the background
+_building = set()
+
+
+def build_storage_backend(filepath: str = DATA_PATH) -> StorageBackend:
+    """
+    Build (or reopen) the STORAGE_BACKEND store for the cached dataset
+
+    Meant for startup and for the data watcher, not for requests: the SQLite
+    store of a data version is written here when its file is missing. An
+    existing file, e.g. one built by another worker, is reused. Files of
+    older versions stay until no backend (in any process) uses them.
+
+    Args:
+        filepath: Path to CSV file
+
+    Returns:
+        StorageBackend: Backend over load_security_data(filepath)
+    """
+    df = load_security_data(filepath)
+    version = df.attrs.get("data_version")
+    with _build_lock:
+        backend = _backends.get((filepath, version))
+        if backend is not None:
+            return backend
+
+        if STORAGE_BACKEND == "sqlite":
+            path = sqlite_store_path(version)
+            try:
+                backend = SQLiteBackend(path)
+            except (OSError, sqlite3.Error):
+                backend = None
+            if backend is None or backend.data_version != version:
+                backend = SQLiteBackend.build(df, path)
+            prune_sqlite_stores()
+        elif STORAGE_BACKEND == "partitioned":
+            backend = PartitionedBackend(get_partition_store(filepath))
+            backend.data_version = version
+        else:
+            backend = _pandas_backend(df, filepath)
+        _backends.set((filepath, version), backend)
+        return backend
+
+
+def _pandas_backend(df: pd.DataFrame, filepath: str) -> PandasBackend:
+    """In-memory backend over df, tagged with its data version"""
+    backend = PandasBackend(df, get_findings_cube(filepath))
+    backend.data_version = df.attrs.get("data_version")
+    return backend
+
+
+def _build_in_background(filepath: str, version: str):
+    """
+    Build the store for filepath in a daemon thread, once per data version
+
+    The thread runs in a copy of the caller's context, so it builds the
+    version the calling request has pinned.
+    """
+    with _backends_lock:
+        if (filepath, version) in _building:
+            return
+        _building.add((filepath, version))
+
+    def run():
+        try:
+            build_storage_backend(filepath)
+        except Exception:
+            logger.exception(f"Building the {STORAGE_BACKEND} store for {filepath} failed")
+        finally:
+            with _backends_lock:
+                _building.discard((filepath, version))
+
+    threading.Thread(target=contextvars.copy_context().run, args=(run,),
+                     name="storage-build", daemon=True).start()
+
+
+def get_storage_backend(filepath: str = DATA_PATH) -> StorageBackend:
+    """
+    Storage backend selected by STORAGE_BACKEND for the cached dataset
+
+    Requests never build a store: until the SQLite or partitioned store for
+    the current data version is ready (see build_storage_backend), it is
+    built in the background and the in-memory backend answers.
+
+    Args:
+        filepath: Path to CSV file
+
+    Returns:
+        StorageBackend: Backend over load_security_data(filepath)
+    """
+    df = load_security_data(filepath)
+    version = df.attrs.get("data_version")
+    backend = _backends.get((filepath, version))
+    if backend is not None:
+        return backend
+    if STORAGE_BACKEND in ("sqlite", "partitioned"):
+        _build_in_background(filepath, version)
+        return _pandas_backend(df, filepath)
+    return build_storage_backend(filepath)
@@ -0,0 +1,169 @@
+"""
+Offset-indexed side file for tool URLs
+"""
+import glob
+import os
+import threading
+import numpy as np
+import pandas as pd
+from src.utils.logger import logger
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: side files of old versions are left in place
+    fcntl = None
+
+
+class URLStore:
+    """
+    Tool URLs kept on disk and read back by row position
+
+    URLs are written back to back as UTF-8. An in-memory array of byte
+    offsets locates each row, so a lookup reads exactly the requested URLs.
+    Memory use is 8 bytes per row instead of one Python string per row.
+
+    The file stays open, under a shared flock, for as long as the store
+    exists. That marks it as in use for prune_url_stores in every worker
+    process, and reads keep working even if the file is unlinked.
+
+    Args:
+        path: Side file holding the concatenated URLs
+        offsets: Byte offset of every row, plus the end offset
+    """
+
+    def __init__(self, path: str, offsets: np.ndarray):
+        self.path = path
+        self.offsets = offsets
+        self._lock = threading.Lock()
+        self._file = open(path, "rb")
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_SH)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @classmethod
+    def write(cls, urls: pd.Series, path: str) -> "URLStore":
+        """
+        Write URLs (in row order) to a new side file
+
+        Args:
+            urls: URL column; missing values are stored as empty strings
+            path: Destination file
+
+        Returns:
+            URLStore: Store reading from path
+        """
+        values = urls.fillna("").astype(str).tolist()
+        data = "".join(values).encode("utf-8")
+        lengths = np.fromiter(map(len, values), dtype=np.int64, count=len(values))
+        if len(data) != lengths.sum():
+            # Not pure ASCII: character counts are not byte counts
+            lengths = np.fromiter((len(v.encode("utf-8")) for v in values),
+                                  dtype=np.int64, count=len(values))
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Opened (and locked) before it appears under its final name, so it
+        # is never seen unused
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        store = cls(tmp, offsets)
+        os.replace(tmp, path)
+        store.path = path
+        return store
+
+    def get(self, rows) -> list:
+        """
+        Read the URLs of some rows
+
+        Args:
+            rows: Row positions in the loaded DataFrame
+
+        Returns:
+            list: URL per row ("" when missing or out of range)
+        """
+        urls = []
+        with self._lock:
+            f = self._file
+            for row in rows:
+                row = int(row)
+                if not 0 <= row < len(self):
+                    urls.append("")
+                    continue
+                f.seek(self.offsets[row])
+                urls.append(f.read(self.offsets[row + 1] - self.offsets[row]).decode("utf-8"))
+        return urls
+
+    def get_block(self, rows: np.ndarray) -> list:
+        """
+        Read the URLs of ascending, nearby rows with a single read
+
+        The bytes from the first to the last row are read at once and sliced
+        in memory, which beats one seek per row when rows are close together
+        (e.g. the matches within a chunk of consecutive positions).
+
+        Args:
+            rows: Ascending row positions within range
+
+        Returns:
+            list: URL per row
+        """
+        if len(rows) == 0:
+            return []
+        starts = self.offsets[rows] - self.offsets[rows[0]]
+        stops = self.offsets[rows + 1] - self.offsets[rows[0]]
+        with self._lock:
+            self._file.seek(self.offsets[rows[0]])
+            block = self._file.read(stops[-1])
+        return [block[a:b].decode("utf-8") for a, b in zip(starts.tolist(), stops.tolist())]
+
+
+def write_url_store(urls: pd.Series, directory: str, name: str, version: str) -> URLStore:
+    """
+    Write the side file for one data version
+
+    Files of older versions are left for prune_url_stores, since another
+    worker (or a table rendered before a reload) may still read them.
+
+    Args:
+        urls: URL column in row order
+        directory: Directory for side files
+        name: Base name of the source data file
+        version: Data version the rows belong to
+
+    Returns:
+        URLStore: The new store
+    """
+    path = os.path.join(directory, f"{name}.{version}.urls")
+    store = URLStore.write(urls, path)
+    logger.info(f"Wrote {len(store)} tool URLs to {path}")
+    return store
+
+
+def prune_url_stores(directory: str, name: str) -> int:
+    """
+    Remove side files of name that no URLStore in any process has open
+
+    Args:
+        directory: Directory for side files
+        name: Base name of the source data file
+
+    Returns:
+        int: Number of files removed (always 0 without flock)
+    """
+    if fcntl is None:
+        return 0
+    removed = 0
+    for stale in glob.glob(os.path.join(directory, f"{glob.escape(name)}.*.urls")):
+        try:
+            with open(stale, "rb") as f:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                os.remove(stale)
+                removed += 1
+        except BlockingIOError:
+            continue  # still in use
+        except OSError as e:
+            logger.warning(f"Could not remove stale URL file {stale}: {e}")
+    return removed
@@ -1,9 +1,124 @@
 """
 Data validation and quality checks
 """
+import numpy as np
 import pandas as pd
+from src.data.dedup import find_exact_duplicates
+from src.utils.helpers import get_severity_order
 from src.utils.logger import logger
 
+REQUIRED_COLUMNS = [
+    "Source", "Category", "Severity", "Status",
+    "Assigned_Team", "Repo/Account", "Opened_At", "MTTR_Hours"
+]
+CRITICAL_FIELDS = ["Source", "Severity", "Status", "Opened_At"]
+
+# Reason code -> bit in the per-row violation flags
+RULES = {
+    "NULL_CRITICAL": 1,
+    "INVALID_SEVERITY": 2,
+    "NEGATIVE_MTTR": 4,
+    "INVALID_MTTR": 8,
+    "BAD_DATE": 16,
+    "DUPLICATE": 32,
+}
+
+
+def check_required_columns(columns) -> list:
+    """
+    Find required columns missing from a frame
+
+    Args:
+        columns: Column names present
+
+    Returns:
+        list: Missing required column names, in canonical order
+    """
+    present = set(columns)
+    return [col for col in REQUIRED_COLUMNS if col not in present]
+
+
+def describe_flags(flags: np.ndarray) -> pd.Series:
+    """
+    Turn violation bit flags into "|"-joined reason codes
+
+    Args:
+        flags: Integer flags per row
+
+    Returns:
+        pd.Series: Reason string per row ("" for clean rows)
+    """
+    names = {
+        int(value): "|".join(code for code, bit in RULES.items() if value & bit)
+        for value in np.unique(flags)
+    }
+    return pd.Series(flags).map(names)
+
+
+def evaluate_rules(df: pd.DataFrame):
+    """
+    Evaluate every row rule in one vectorized pass
+
+    Opened_At and MTTR_Hours may be raw strings (as read from CSV) or already
+    parsed; parsing failures are flagged rather than raised.
+
+    Args:
+        df: Findings chunk with the required columns
+
+    Returns:
+        tuple: (flags as uint8 array, parsed Opened_At, parsed MTTR_Hours)
+    """
+    flags = np.zeros(len(df), dtype=np.uint8)
+
+    # Severity nulls fail the membership test too; split them out afterwards
+    severity = df["Severity"]
+    invalid_sev = ~severity.isin(get_severity_order()).to_numpy()
+    null_sev = invalid_sev & severity.isna().to_numpy()
+    flags[invalid_sev & ~null_sev] |= RULES["INVALID_SEVERITY"]
+
+    null_critical = null_sev | df["Source"].isna().to_numpy() | df["Status"].isna().to_numpy()
+
+    mttr = pd.to_numeric(df["MTTR_Hours"], errors="coerce")
+    flags[(mttr < 0).to_numpy()] |= RULES["NEGATIVE_MTTR"]
+    flags[(mttr.isna() & df["MTTR_Hours"].notna()).to_numpy()] |= RULES["INVALID_MTTR"]
+
+    # Likewise unparseable and missing dates both come back as NaT
+    opened = df["Opened_At"]
+    if not pd.api.types.is_datetime64_any_dtype(opened):
+        opened = pd.to_datetime(opened, errors="coerce", format="ISO8601")
+    no_date = opened.isna().to_numpy()
+    null_date = no_date & df["Opened_At"].isna().to_numpy()
+    flags[no_date & ~null_date] |= RULES["BAD_DATE"]
+
+    flags[null_critical | null_date] |= RULES["NULL_CRITICAL"]
+
+    return flags, opened, mttr
+
+
+def validate_chunk(chunk: pd.DataFrame):
+    """
+    Split a raw CSV chunk into clean rows and quarantined rows
+
+    Args:
+        chunk: Raw findings chunk (index = 0-based data row number)
+
+    Returns:
+        tuple: (clean DataFrame with parsed Opened_At/MTTR_Hours,
+        quarantined raw rows with Reason and Line columns)
+    """
+    flags, opened, mttr = evaluate_rules(chunk)
+    bad = flags != 0
+
+    quarantined = chunk[bad].assign(
+        Reason=describe_flags(flags[bad]).to_numpy(),
+        Line=chunk.index[bad] + 2  # 1-based, after the header line
+    )
+    chunk["Opened_At"] = opened
+    chunk["MTTR_Hours"] = mttr
+    clean = chunk[~bad] if bad.any() else chunk
+    return clean, quarantined
+
+
 def validate_data_quality(df: pd.DataFrame) -> list:
     """
     Check data integrity and quality
@@ -17,35 +132,20 @@ def validate_data_quality(df: pd.DataFrame) -> list:
     issues = []
 
     # Check for required columns
-    required_cols = [
-        "Source", "Category", "Severity", "Status", 
-        "Assigned_Team", "Repo/Account", "Opened_At", "MTTR_Hours"
-    ]
-    missing_cols = set(required_cols) - set(df.columns)
+    missing_cols = check_required_columns(df.columns)
     if missing_cols:
-        issues.append(f"Missing required columns: {missing_cols}")
-
-    # Check for null values in critical fields
-    critical_fields = ["Source", "Severity", "Status", "Opened_At"]
-    for field in critical_fields:
-        if field in df.columns:
-            null_count = df[field].isnull().sum()
-            if null_count > 0:
-                issues.append(f"Found {null_count} null values in '{field}'")
-
-    # Validate severity values
-    valid_severities = ["Critical", "High", "Medium", "Low"]
-    if "Severity" in df.columns:
-        invalid_sev = df[~df["Severity"].isin(valid_severities)]["Severity"].unique()
-        if len(invalid_sev) > 0:
+        issues.append(f"Missing required columns: {set(missing_cols)}")
+    else:
+        flags, _, _ = evaluate_rules(df)
+        flags[find_exact_duplicates(df)] |= RULES["DUPLICATE"]
+        for code, bit in RULES.items():
+            count = int(np.count_nonzero(flags & bit))
+            if count > 0:
+                issues.append(f"Found {count} rows failing {code}")
+        if np.any(flags & RULES["INVALID_SEVERITY"]):
+            invalid_sev = df.loc[(flags & RULES["INVALID_SEVERITY"]) != 0, "Severity"].unique()
             issues.append(f"Invalid severity values: {invalid_sev.tolist()}")
 
-    # Validate MTTR values
-    if "MTTR_Hours" in df.columns:
-        negative_mttr = df[df["MTTR_Hours"] < 0]
-        if len(negative_mttr) > 0:
-            issues.append(f"Found {len(negative_mttr)} negative MTTR values")
-
     # Log results
     if issues:
         for issue in issues:
@@ -0,0 +1,272 @@
+"""
+File-watcher driven ingestion: reload the dataset when one of its files changes
+"""
+import ctypes
+import glob
+import os
+import select
+import struct
+import threading
+import time
+from config.settings import DATA_PATH, DATA_SHARD_DIRS, WATCH_DEBOUNCE_SECONDS, WATCH_POLL_SECONDS
+from src.data.loader import load_security_data, reload_security_data
+from src.data.cube import get_findings_cube
+from src.data.rollups import get_rollup_store
+from src.data.backlog import get_backlog_engine
+from src.data.sketches import get_mttr_sketches
+from src.data.sla import get_sla_engine
+from src.data.storage import build_storage_backend
+from src.data.changes import publish_data_change
+from src.utils.logger import logger
+
+# Structures every dashboard update reads, built for a new data version
+# before it is installed. They are cached per data version, so nothing needs
+# clearing; anything else derived from the data is built on first use.
+WARM_BUILDERS = [get_findings_cube, get_rollup_store, get_backlog_engine,
+                 get_mttr_sketches, get_sla_engine, build_storage_backend]
+
+# inotify events that may mean the file changed (linux/inotify.h)
+_IN_MODIFY, _IN_CLOSE_WRITE, _IN_MOVED_TO, _IN_CREATE, _IN_DELETE = 0x2, 0x8, 0x80, 0x100, 0x200
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def file_signature(path: str):
+    """
+    Identity of a file's current contents
+
+    Args:
+        path: File to inspect
+
+    Returns:
+        tuple: (inode, size, mtime in ns), or None if the file is missing
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+class _Inotify:
+    """
+    Linux inotify watch on directories, through libc (no extra package)
+
+    Directories are watched rather than files so that replacing a file by
+    rename, or adding one, is seen too.
+
+    Args:
+        directories: Directories to watch
+    """
+
+    MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+
+    def __init__(self, directories: list):
+        libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        # Watch descriptor -> directory
+        self.directories = {}
+        for directory in directories:
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), self.MASK)
+            if wd < 0:
+                errno = ctypes.get_errno()
+                os.close(self.fd)
+                raise OSError(errno, f"Cannot watch {directory}")
+            self.directories[wd] = directory
+
+    def wait(self, timeout: float) -> set:
+        """
+        Paths of the entries changed in the watched directories
+
+        Args:
+            timeout: Longest wait for an event, in seconds
+
+        Returns:
+            set: Changed paths; empty on timeout
+        """
+        paths = set()
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return paths
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return paths
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            start = offset + _EVENT_HEADER.size
+            name = os.fsdecode(data[start:start + length].rstrip(b"\0"))
+            if wd in self.directories:
+                paths.add(os.path.join(self.directories[wd], name))
+            offset = start + length
+        return paths
+
+    def close(self):
+        os.close(self.fd)
+
+
+class DataWatcher(threading.Thread):
+    """
+    Daemon thread calling on_change once each time the files settle after a change
+
+    The watched files are path plus the *.csv files of shard_dirs; a shard
+    appearing or disappearing is a change too. Changes are noticed through
+    inotify where available and otherwise by comparing the files' size,
+    mtime and inode every poll_seconds. A change is acted on only once the
+    files have held still for debounce_seconds, so a burst of writes (or a
+    writer still appending) triggers one reload of complete files; a file
+    replaced or added by rename settles at once.
+
+    Args:
+        path: File to watch
+        on_change: Function called (in this thread) with no arguments
+        debounce_seconds: Quiet time required before the files count as complete
+        poll_seconds: Stat interval without inotify (a safety net with it)
+        shard_dirs: Directories whose *.csv files are watched too
+    """
+
+    def __init__(self, path: str, on_change, debounce_seconds: float = 1.0, poll_seconds: float = 2.0,
+                 shard_dirs: list = None):
+        super().__init__(name="data-watcher", daemon=True)
+        self.path = os.path.abspath(path)
+        self.shard_dirs = [os.path.abspath(d) for d in shard_dirs or []]
+        self.on_change = on_change
+        self.debounce_seconds = debounce_seconds
+        self.poll_seconds = poll_seconds
+        self.signature = self._signature()
+        self._stopping = threading.Event()
+        directories = [os.path.dirname(self.path)] + [d for d in self.shard_dirs if os.path.isdir(d)]
+        try:
+            self._inotify = _Inotify(directories)
+            self.mode = "inotify"
+        except (OSError, AttributeError) as e:
+            logger.info(f"inotify unavailable ({e}); polling {path} every {poll_seconds}s")
+            self._inotify = None
+            self.mode = "polling"
+
+    def _signature(self) -> tuple:
+        """file_signature of every watched file, keyed by path"""
+        paths = [self.path]
+        for directory in self.shard_dirs:
+            paths.extend(sorted(glob.glob(os.path.join(glob.escape(directory), "*.csv"))))
+        return tuple((path, file_signature(path)) for path in paths)
+
+    def _relevant(self, path: str) -> bool:
+        """Whether a changed directory entry is (or may become) a watched file"""
+        return path == self.path or (os.path.dirname(path) in self.shard_dirs and path.endswith(".csv"))
+
+    def run(self):
+        while not self._stopping.is_set():
+            if self._inotify is not None:
+                changed = self._inotify.wait(self.poll_seconds)
+                if not any(self._relevant(path) for path in changed) \
+                        and self._signature() == self.signature:
+                    continue
+            elif self._stopping.wait(self.poll_seconds) or self._signature() == self.signature:
+                continue
+            settled = self._settle()
+            if settled is None or settled == self.signature:
+                continue
+            self.signature = settled
+            try:
+                self.on_change()
+            except Exception:
+                logger.exception(f"Reloading {self.path} failed; keeping the previous data")
+        if self._inotify is not None:
+            self._inotify.close()
+
+    def _settle(self):
+        """Signature once the files are unchanged for debounce_seconds (None if stopped or missing)"""
+        last = self._signature()
+        while not self._stopping.wait(self.debounce_seconds):
+            current = self._signature()
+            if current == last:
+                return None if current[0][1] is None else current
+            last = current
+        return None
+
+    def stop(self):
+        """Ask the thread to exit (within poll_seconds)"""
+        self._stopping.set()
+
+
+def reload_dataset(filepath: str = DATA_PATH, on_reload=None) -> dict:
+    """
+    Reload the dataset, build what is derived from it and notify clients
+
+    Only the files (or appended lines) that changed are parsed again (see
+    reload_security_data). The WARM_BUILDERS and on_reload run against the
+    new load before it is installed, so requests go on using the previous
+    load and its structures until the new ones are all ready.
+
+    Args:
+        filepath: Path to CSV file
+        on_reload: Optional function run while the new load is prepared
+            (e.g. to build the default view), before clients are told
+
+    Returns:
+        dict: The published change event
+    """
+    def prepare():
+        for builder in WARM_BUILDERS:
+            builder(filepath)
+        if on_reload is not None:
+            on_reload()
+
+    old = load_security_data(filepath)
+    new = reload_security_data(filepath, prepare)
+    return publish_data_change(old, new)
+
+
+def start_data_watcher(filepath: str = DATA_PATH, on_reload=None) -> DataWatcher:
+    """
+    Start watching filepath (and, for DATA_PATH, DATA_SHARD_DIRS), reloading on change
+
+    Args:
+        filepath: Path to CSV file
+        on_reload: See reload_dataset
+
+    Returns:
+        DataWatcher: The running watcher thread
+    """
+    def on_change():
+        start = time.perf_counter()
+        event = reload_dataset(filepath, on_reload)
+        logger.info(f"Ingested {filepath} as {event['version']} "
+                    f"in {time.perf_counter() - start:.2f}s")
+
+    shard_dirs = DATA_SHARD_DIRS if os.path.abspath(filepath) == os.path.abspath(DATA_PATH) else []
+    watcher = DataWatcher(filepath, on_change, WATCH_DEBOUNCE_SECONDS, WATCH_POLL_SECONDS, shard_dirs)
+    watcher.start()
+    logger.info(f"Watching {filepath} for changes ({watcher.mode})")
+    return watcher
+
+
+# (process id, file path) -> watcher started in that process
+_watchers = {}
+_watchers_lock = threading.Lock()
+
+
+def register_data_watcher(server, filepath: str = DATA_PATH, on_reload=None):
+    """
+    Watch filepath from each process that serves requests
+
+    The watcher starts with the first request a process handles rather than
+    at import: under the DEBUG reloader the importing parent process only
+    restarts the server and never serves, and worker processes forked from
+    a preloading parent do not inherit its threads.
+
+    Args:
+        server: Flask app (Dash's app.server)
+        filepath: Path to CSV file
+        on_reload: See reload_dataset
+    """
+    @server.before_request
+    def _start_data_watcher():
+        key = (os.getpid(), filepath)
+        if key in _watchers:
+            return
+        with _watchers_lock:
+            if key not in _watchers:
+                _watchers[key] = start_data_watcher(filepath, on_reload)
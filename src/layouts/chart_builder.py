@@ -2,7 +2,9 @@
 Custom Chart Builder Panel Component
 """
 from dash import dcc, html
+from config.settings import PREVIEW_DEBOUNCE_MS
 from config.theme import CYBER_THEME
+from src.data.aggregations import AGGREGATIONS
 
 def create_chart_builder_panel(columns):
     """
@@ -50,6 +52,16 @@ def create_chart_builder_panel(columns):
             style={"marginBottom": "12px"}
         ),
 
+        # Aggregate for numeric Y-Axis
+        html.Label("Aggregate (numeric Y)", style={"display": "block", "marginBottom": "4px", "fontSize": "12px"}),
+        dcc.Dropdown(
+            id="builder-agg",
+            options=[{"label": label, "value": agg} for agg, label in AGGREGATIONS.items()],
+            value="sum",
+            clearable=False,
+            style={"marginBottom": "12px"}
+        ),
+
         # Color By (optional)
         html.Label("Color By (Optional)", style={"display": "block", "marginBottom": "4px", "fontSize": "12px"}),
         dcc.Dropdown(
@@ -96,7 +108,14 @@ def create_chart_builder_panel(columns):
         # Preview Area
         html.Div([
             html.H5("Preview", style={"marginTop": "20px", "marginBottom": "12px"}),
-            dcc.Graph(id="builder-preview-chart", style={"height": "300px"})
+            html.Div(id="builder-preview-status",
+                     style={"fontSize": "12px", "color": CYBER_THEME["text_muted"], "marginBottom": "8px"}),
+            dcc.Graph(id="builder-preview-chart", style={"height": "300px"}),
+            # Pending request, debounce timer and full-result hand-off for the preview
+            dcc.Store(id="builder-preview-request"),
+            dcc.Store(id="builder-preview-full-request"),
+            dcc.Interval(id="builder-preview-debounce", interval=PREVIEW_DEBOUNCE_MS,
+                         n_intervals=0, max_intervals=1, disabled=True)
         ])
 
     ], style={
@@ -1,17 +1,26 @@
 from dash import dcc, html
-from src.data.loader import load_security_data, get_filter_options
+from src.data.loader import load_security_data
+from src.data.cube import get_findings_cube
+from src.layouts.snapshot import get_default_view
+from src.components.filters import create_facet_options
 from src.components.kpi_cards import create_kpi_card, create_kpi_row
+from src.components.tables import create_export_links
 from src.layouts.chart_builder import create_chart_builder_panel
-from config.settings import AUTO_REFRESH_INTERVAL
+from config.settings import AUTO_REFRESH_INTERVAL, SLA_WARNING_HOURS
 from config.theme import CYBER_THEME
+from src.utils.helpers import utc_now_naive
 
 def create_layout():
     """Create the complete dashboard layout with all features"""
     
     # Load initial data
     df = load_security_data()
-    filter_options = get_filter_options(df)
-    builder_columns = [c for c in df.columns if c not in ["tool_url", "View_Link"]]
+    facets = get_findings_cube().facet_counts({})
+    # Unfiltered state precomputed per data version, so the first paint
+    # needs no callback round trips
+    view = get_default_view()
+    figures, kpis = view["figures"], view["kpis"]
+    builder_columns = [c for c in df.columns if c not in ["Correlation_Id", "Finding_Key", "Is_Canonical"]]
     
     return html.Div([
         # Hidden stores
@@ -25,9 +34,13 @@ def create_layout():
                   style={"textAlign": "center", "color": "#9ca3af", "marginBottom": "24px", "fontSize": "1.1rem"})
         ]),
         
-        # Auto-refresh interval
+        # Data changes are pushed over /events/data-changes (assets/data_changes.js
+        # clicks the hidden signal button); only SLA ages still need a timer
+        dcc.Store(id="data-change"),
+        html.Button(id="data-change-signal", n_clicks=0, style={"display": "none"},
+                    **{"data-version": df.attrs["data_version"]}),
         dcc.Interval(
-            id="refresh-interval",
+            id="sla-clock",
             interval=AUTO_REFRESH_INTERVAL,
             n_intervals=0
         ),
@@ -78,7 +91,7 @@ def create_layout():
                         html.Label("Source", style={"fontWeight": "600", "marginBottom": "6px", "display": "block"}),
                         dcc.Dropdown(
                             id="source-filter",
-                            options=[{"label": opt, "value": opt} for opt in filter_options["sources"]],
+                            options=create_facet_options(facets["source"]),
                             multi=True,
                             placeholder="All Sources",
                             style={"minWidth": "200px"}
@@ -90,7 +103,7 @@ def create_layout():
                         html.Label("Severity", style={"fontWeight": "600", "marginBottom": "6px", "display": "block"}),
                         dcc.Dropdown(
                             id="severity-filter",
-                            options=[{"label": opt, "value": opt} for opt in filter_options["severities"]],
+                            options=create_facet_options(facets["severity"]),
                             multi=True,
                             placeholder="All Severities",
                             style={"minWidth": "200px"}
@@ -102,7 +115,7 @@ def create_layout():
                         html.Label("Status", style={"fontWeight": "600", "marginBottom": "6px", "display": "block"}),
                         dcc.Dropdown(
                             id="status-filter",
-                            options=[{"label": opt, "value": opt} for opt in filter_options["statuses"]],
+                            options=create_facet_options(facets["status"]),
                             multi=True,
                             placeholder="All Statuses",
                             style={"minWidth": "200px"}
@@ -114,7 +127,7 @@ def create_layout():
                         html.Label("Team", style={"fontWeight": "600", "marginBottom": "6px", "display": "block"}),
                         dcc.Dropdown(
                             id="team-filter",
-                            options=[{"label": opt, "value": opt} for opt in filter_options["teams"]],
+                            options=create_facet_options(facets["team"]),
                             multi=True,
                             placeholder="All Teams",
                             style={"minWidth": "200px"}
@@ -126,12 +139,44 @@ def create_layout():
                         html.Label("Repository", style={"fontWeight": "600", "marginBottom": "6px", "display": "block"}),
                         dcc.Dropdown(
                             id="repo-filter",
-                            options=[{"label": opt, "value": opt} for opt in filter_options["repos"]],
+                            options=create_facet_options(facets["repo"]),
                             multi=True,
                             placeholder="All Repositories",
                             style={"minWidth": "200px"}
                         )
-                    ], style={"flex": "1", "minWidth": "200px"}),
+                    ], style={"flex": "1", "minWidth": "200px", "marginRight": "16px"}),
+                    
+                    # Date Range Filter (Opened_At)
+                    html.Div([
+                        html.Label("Opened", style={"fontWeight": "600", "marginBottom": "6px", "display": "block"}),
+                        dcc.DatePickerRange(
+                            id="date-range",
+                            min_date_allowed=df["Opened_At"].min().date() if len(df) else None,
+                            max_date_allowed=utc_now_naive().date(),
+                            display_format="YYYY-MM-DD",
+                            start_date_placeholder_text="All time",
+                            end_date_placeholder_text="Today",
+                            clearable=True
+                        ),
+                        html.Div([
+                            html.Button(
+                                label,
+                                id={"type": "date-preset", "days": days},
+                                n_clicks=0,
+                                style={
+                                    "padding": "4px 10px",
+                                    "marginRight": "6px",
+                                    "backgroundColor": "transparent",
+                                    "color": CYBER_THEME["text_primary"],
+                                    "border": f"1px solid {CYBER_THEME['border_glow']}",
+                                    "borderRadius": "4px",
+                                    "cursor": "pointer",
+                                    "fontSize": "12px"
+                                }
+                            )
+                            for label, days in [("7d", 7), ("30d", 30), ("90d", 90), ("All", 0)]
+                        ], style={"marginTop": "6px"})
+                    ], style={"flex": "1", "minWidth": "260px"}),
                     
                 ], style={
                     "display": "flex",
@@ -153,15 +198,21 @@ def create_layout():
         html.Div([
             html.Div(
                 create_kpi_row([
-                    create_kpi_card("Total Findings", "0", card_id="total-findings"),
-                    create_kpi_card("Open Findings", "0", card_id="open-findings"),
-                    create_kpi_card("Critical Open", "0", card_id="critical-open"),
-                    create_kpi_card("Avg MTTR", "0h", card_id="avg-mttr"),
+                    create_kpi_card("Total Findings", kpis["total-findings"], card_id="total-findings"),
+                    create_kpi_card("Open Findings", kpis["open-findings"], card_id="open-findings"),
+                    create_kpi_card("Critical Open", kpis["critical-open"], card_id="critical-open"),
+                    create_kpi_card("Avg MTTR", kpis["avg-mttr"], card_id="avg-mttr"),
+                    create_kpi_card("MTTR p50 / p90 / p99", kpis["mttr-percentiles"], card_id="mttr-percentiles"),
+                    create_kpi_card("SLA Breached", kpis["sla-breached"], card_id="sla-breached"),
+                    create_kpi_card("Affected Repos", kpis["affected-repos"], card_id="affected-repos"),
+                    create_kpi_card("Distinct Categories", kpis["distinct-categories"],
+                                    trend=kpis["categories-per-team"], card_id="distinct-categories",
+                                    trend_id="categories-per-team"),
                 ]),
                 style={"flex": "1"}
             ),
             html.Div(
-                dcc.Graph(id="risk-gauge"),
+                dcc.Graph(id="risk-gauge", figure=figures["risk-gauge"]),
                 style={"flex": "0 0 300px", "marginLeft": "16px"}
             ),
         ], style={"display": "flex", "flexWrap": "wrap", "gap": "16px", "marginBottom": "16px"}),
@@ -172,31 +223,38 @@ def create_layout():
             html.Div([
                 # ROW 1: Severity Pie + Trend Line
                 html.Div([
-                    html.Div([dcc.Graph(id="severity-chart")], style={"flex": "1", "minWidth": "350px"}),
-                    html.Div([dcc.Graph(id="trend-chart")], style={"flex": "1", "minWidth": "350px"}),
+                    html.Div([dcc.Graph(id="severity-chart", figure=figures["severity-chart"])], style={"flex": "1", "minWidth": "350px"}),
+                    html.Div([dcc.Graph(id="trend-chart", figure=figures["trend-chart"])], style={"flex": "1", "minWidth": "350px"}),
                 ], style={"display": "flex", "gap": "16px", "marginBottom": "24px", "flexWrap": "wrap"}),
                 
                 # ROW 2: Severity by Week
                 html.Div([
-                    dcc.Graph(id="severity-week-chart")
+                    dcc.Graph(id="severity-week-chart", figure=figures["severity-week-chart"])
                 ], style={"marginBottom": "24px"}),
                 
+                # ROW 2b: Open Backlog Over Time + MTTR Distribution
+                html.Div([
+                    html.Div([dcc.Graph(id="backlog-chart", figure=figures["backlog-chart"])], style={"flex": "1", "minWidth": "350px"}),
+                    html.Div([dcc.Graph(id="mttr-distribution-chart", figure=figures["mttr-distribution-chart"])], style={"flex": "1", "minWidth": "350px"}),
+                ], style={"display": "flex", "gap": "16px", "marginBottom": "24px", "flexWrap": "wrap"}),
+                
                 # Trend Summary
                 html.Div(
+                    view["trend_summary"],
                     id="trend-summary",
                     style={"color": CYBER_THEME["text_muted"], "fontSize": "13px", "marginBottom": "16px", "textAlign": "center"}
                 ),
                 
                 # ROW 3: Attack Timeline Heatmap
                 html.Div([
-                    dcc.Graph(id="attack-heatmap")
+                    dcc.Graph(id="attack-heatmap", figure=figures["attack-heatmap"])
                 ], style={"marginBottom": "24px"}),
                 
                 # ROW 4: Source + Category + Repos
                 html.Div([
-                    html.Div([dcc.Graph(id="source-chart")], style={"flex": "1", "minWidth": "280px"}),
-                    html.Div([dcc.Graph(id="category-chart")], style={"flex": "1", "minWidth": "280px"}),
-                    html.Div([dcc.Graph(id="repos-chart")], style={"flex": "1", "minWidth": "280px"}),
+                    html.Div([dcc.Graph(id="source-chart", figure=figures["source-chart"])], style={"flex": "1", "minWidth": "280px"}),
+                    html.Div([dcc.Graph(id="category-chart", figure=figures["category-chart"])], style={"flex": "1", "minWidth": "280px"}),
+                    html.Div([dcc.Graph(id="repos-chart", figure=figures["repos-chart"])], style={"flex": "1", "minWidth": "280px"}),
                 ], style={"display": "flex", "gap": "16px", "marginBottom": "24px", "flexWrap": "wrap"}),
                 
                 # ROW 5: Custom Charts Section
@@ -207,7 +265,12 @@ def create_layout():
                         html.P("Charts created with the Chart Builder appear here",
                               style={"color": CYBER_THEME["text_muted"], "fontSize": "13px", "marginBottom": "16px"})
                     ]),
-                    html.Div(id="custom-charts-container-inline")
+                    html.Div(id="custom-charts-container-inline", style={
+                        "display": "flex",
+                        "flexWrap": "wrap",
+                        "gap": "16px",
+                        "marginTop": "16px"
+                    })
                 ], style={
                     "marginBottom": "32px",
                     "padding": "20px",
@@ -216,6 +279,13 @@ def create_layout():
                     "border": f"1px solid {CYBER_THEME['border_glow']}"
                 }),
                 
+                # SLA watchlist
+                html.Div([
+                    html.H3(f"⏰ Breaching SLA in the next {SLA_WARNING_HOURS}h",
+                           style={"marginBottom": "12px"}),
+                    html.Div(view["sla_watchlist"], id="sla-breach-container")
+                ], style={"marginBottom": "24px"}),
+                
                 # Click instruction
                 html.Div([
                     html.P("💡 Click on any chart to view detailed findings below", 
@@ -233,10 +303,26 @@ def create_layout():
                     html.Div([
                         html.H3("📋 Findings Details", 
                                style={"display": "inline-block", "marginRight": "16px"}),
-                        html.Span(id="selection-info", 
+                        html.Span(view["selection_info"], id="selection-info", 
                                  style={"color": CYBER_THEME["accent"], "fontSize": "14px"})
                     ], style={"marginBottom": "16px"}),
-                    html.Div(id="findings-table-container")
+                    dcc.Input(
+                        id="findings-search",
+                        type="search",
+                        debounce=True,
+                        placeholder="🔎 Search category, repository, team or tool URL (e.g. s3 bucket)",
+                        style={
+                            "width": "100%",
+                            "padding": "8px 12px",
+                            "marginBottom": "12px",
+                            "backgroundColor": CYBER_THEME["bg_main"],
+                            "color": CYBER_THEME["text_primary"],
+                            "border": f"1px solid {CYBER_THEME['border_glow']}",
+                            "borderRadius": "4px"
+                        }
+                    ),
+                    html.Div(create_export_links(), id="export-links", style={"marginBottom": "8px"}),
+                    html.Div(view["table"], id="findings-table-container")
                 ])
                 
             ], id="main-charts-area", style={"flex": "1", "marginRight": "24px", "transition": "all 0.3s ease"}),
@@ -0,0 +1,59 @@
+"""
+Precomputed unfiltered dashboard state for the first paint
+"""
+import time
+from functools import lru_cache
+from config.settings import AUTO_REFRESH_INTERVAL
+from src.data.loader import load_security_data, get_data_version
+from src.callbacks.chart_callbacks import DASHBOARD_FIGURES, build_dashboard_figures
+from src.callbacks.filter_callbacks import (
+    KPI_CARDS, build_kpi_values, build_sla_watchlist, build_trend_summary
+)
+from src.components.tables import FINDINGS_PAGE_SIZE, create_findings_table
+from src.utils.logger import logger
+
+
+# Two entries: the current version's, and the next one's while a reload prepares it
+@lru_cache(maxsize=2)
+def _build_default_view(data_version: str) -> dict:
+    """Compute the time-independent part of the unfiltered dashboard once per data version"""
+    start = time.perf_counter()
+    df = load_security_data()
+    # Only the first page of the full table; the table callback's initial
+    # call replaces it with every finding once the page is up
+    first_page = df.head(FINDINGS_PAGE_SIZE)
+    view = {
+        "figures": dict(zip(DASHBOARD_FIGURES, build_dashboard_figures())),
+        "trend_summary": build_trend_summary(),
+        "table": create_findings_table(first_page, data_version),
+        "selection_info": f"Showing {len(first_page)} of {len(df)} findings, loading the rest...",
+    }
+    logger.info(f"Built default-view snapshot for {data_version} "
+                f"in {time.perf_counter() - start:.2f}s")
+    return view
+
+
+@lru_cache(maxsize=2)
+def _build_sla_view(data_version: str, clock_bucket: int) -> dict:
+    """Compute the age-dependent KPIs and SLA watchlist once per SLA clock tick"""
+    return {
+        "kpis": dict(zip(KPI_CARDS, build_kpi_values())),
+        "sla_watchlist": build_sla_watchlist(),
+    }
+
+
+def get_default_view() -> dict:
+    """
+    Unfiltered dashboard state (KPIs, figures, first table page)
+
+    SLA ages move with time, so the KPIs and watchlist are recomputed every
+    AUTO_REFRESH_INTERVAL (the sla-clock period) rather than once per data
+    version.
+
+    Returns:
+        dict: figures and kpis keyed by component id, plus trend_summary,
+        sla_watchlist, table and selection_info children
+    """
+    version = get_data_version()
+    clock_bucket = int(time.time() * 1000 // AUTO_REFRESH_INTERVAL)
+    return {**_build_default_view(version), **_build_sla_view(version, clock_bucket)}
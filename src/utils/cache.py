@@ -0,0 +1,289 @@
+"""
+In-process result caches and request coalescing
+"""
+import glob
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from src.utils.logger import logger
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: coalesce within a process only
+    fcntl = None
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache with a fixed number of entries
+
+    Args:
+        maxsize: Maximum number of entries kept
+    """
+
+    _MISSING = object()
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the cached value for key (marking it recently used) or default"""
+        with self._lock:
+            value = self._data.get(key, self._MISSING)
+            if value is self._MISSING:
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Store value under key, evicting the least recently used entry if full"""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+def normalized_lru_cache(maxsize: int = 1, version=None):
+    """
+    Thread-safe lru_cache keyed on the arguments with defaults filled in
+
+    get_x(), get_x(DATA_PATH) and get_x(filepath=DATA_PATH) share one entry,
+    rather than occupying (and with a small maxsize, evicting) one each.
+    Concurrent callers of a missing entry wait for a single build.
+
+    Args:
+        maxsize: Maximum number of entries kept
+        version: Optional function of the bound arguments (a name -> value
+            dict) whose result is part of the key, e.g. the data version
+
+    Returns:
+        Decorator; the wrapped function gains cache_clear()
+    """
+    def decorator(fn):
+        signature = inspect.signature(fn)
+        cache = LRUCache(maxsize)
+        lock = threading.Lock()
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = bound.args
+            if version is not None:
+                key += (version(bound.arguments),)
+            value = cache.get(key, LRUCache._MISSING)
+            if value is LRUCache._MISSING:
+                with lock:
+                    value = cache.get(key, LRUCache._MISSING)
+                    if value is LRUCache._MISSING:
+                        value = fn(*bound.args)
+                        cache.set(key, value)
+            return value
+
+        wrapper.cache_clear = cache.clear
+        return wrapper
+    return decorator
+
+
+class _Flight:
+    """One in-progress computation and the callers waiting on it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Run one computation per key at a time and share its result
+
+    The first caller for a key runs the function; callers with the same key
+    arriving while it runs wait for it and get the same result (or
+    exception) instead of starting their own. Nothing is kept once the call
+    has finished.
+
+    With a lock directory, worker processes coordinate too: the running
+    process holds an flock on a per-key lock file and publishes the result
+    as JSON (via the plotly encoder, so figures and components are
+    supported), which other processes read after waiting on the lock.
+    Results that are not JSON-serializable are not shared across processes.
+    Result and lock files of keys idle for a minute are pruned.
+
+    Args:
+        lock_dir: Directory for lock and result files, or None for threads only
+        wait_seconds: Longest wait on another process before computing anyway
+        result_ttl: Seconds a published result answers later callers
+    """
+
+    def __init__(self, lock_dir: str = None, wait_seconds: float = 30.0, result_ttl: float = 2.0):
+        self.lock_dir = lock_dir if fcntl is not None else None
+        self.wait_seconds = wait_seconds
+        self.result_ttl = result_ttl
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.computed = 0
+        self.shared = 0
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Call fn(*args, **kwargs), or wait for the call already running for key
+
+        Args:
+            key: Hashable identity of the computation
+            fn: Function computing the result
+
+        Returns:
+            The result of the (possibly shared) call
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.shared += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = self._run(key, fn, args, kwargs)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def _run(self, key, fn, args, kwargs):
+        """Compute in this process, or reuse the result of another worker"""
+        if not self.lock_dir:
+            self.computed += 1
+            return fn(*args, **kwargs)
+
+        name = hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+        base = os.path.join(self.lock_dir, name)
+        lock_file = self._acquire(f"{base}.lock", time.monotonic() + self.wait_seconds)
+        if lock_file is None:
+            logger.warning(f"Gave up waiting on another worker for {key}")
+            self.computed += 1
+            return fn(*args, **kwargs)
+        with lock_file:
+            try:
+                published = self._read_result(f"{base}.json")
+                if published is not None:
+                    self.shared += 1
+                    return published
+                self.computed += 1
+                value = fn(*args, **kwargs)
+                self._write_result(f"{base}.json", value)
+                self._prune()
+                return value
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _acquire(path: str, deadline: float):
+        """
+        Open path and take its flock, or return None once deadline passes
+
+        _prune may unlink a lock file between our open and flock. The lock
+        then sits on an orphaned file, so it is retaken on the file now at
+        path.
+        """
+        while True:
+            lock_file = open(path, "a")
+            try:
+                while True:
+                    try:
+                        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        if time.monotonic() > deadline:
+                            lock_file.close()
+                            return None
+                        time.sleep(0.05)
+                try:
+                    if os.stat(path).st_ino == os.fstat(lock_file.fileno()).st_ino:
+                        return lock_file
+                except FileNotFoundError:
+                    pass
+            except BaseException:
+                lock_file.close()
+                raise
+            lock_file.close()
+
+    def _read_result(self, path: str):
+        """Result published by another worker within result_ttl, or None"""
+        try:
+            if time.time() - os.path.getmtime(path) > self.result_ttl:
+                return None
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_result(self, path: str, value):
+        """Publish a result for other workers (atomically), dropping stale ones"""
+        from plotly.io.json import to_json_plotly
+        try:
+            payload = to_json_plotly(value)
+        except (TypeError, ValueError):
+            return
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(payload)
+        os.replace(tmp, path)
+
+    def _prune(self, max_age: float = 60.0):
+        """
+        Drop result files older than max_age, and lock files of keys idle as long
+
+        A lock file is only removed while we hold its flock (taken without
+        waiting), so no worker is computing under it; see _acquire for workers
+        that opened it just before.
+        """
+        now = time.time()
+        for stale in glob.glob(os.path.join(self.lock_dir, "*.json")):
+            try:
+                if now - os.path.getmtime(stale) > max_age:
+                    os.remove(stale)
+            except OSError:
+                pass
+        for stale in glob.glob(os.path.join(self.lock_dir, "*.lock")):
+            try:
+                if now - os.path.getmtime(stale) <= max_age:
+                    continue
+                with open(stale, "rb") as f:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    os.remove(stale)
+            except OSError:
+                continue  # in use (BlockingIOError) or already gone
@@ -1,8 +1,10 @@
 """
 Utility helper functions
 """
+import numpy as np
 import pandas as pd
 from datetime import datetime, timezone
+from config.settings import SLA_HOURS_CRITICAL, SLA_HOURS_HIGH, SLA_HOURS_MEDIUM, SLA_HOURS_LOW
 
 def format_timestamp(ts):
     """Format timestamp for display"""
@@ -20,6 +22,37 @@ def calculate_age_hours(opened_at):
     delta = now - opened_at
     return delta.total_seconds() / 3600
 
+def utc_now_naive():
+    """Current UTC time as a naive timestamp, comparable with Opened_At"""
+    return pd.Timestamp.now(tz="UTC").tz_localize(None)
+
+def calculate_ages_hours(opened_at: pd.Series, now=None) -> np.ndarray:
+    """Hours since each finding was opened, in one vectorized operation"""
+    if now is None:
+        now = utc_now_naive()
+    if opened_at.dt.tz is not None:
+        now = pd.Timestamp(now).tz_localize("UTC")
+    return ((now - opened_at) / pd.Timedelta(hours=1)).fillna(0).to_numpy()
+
+def in_date_range(values, start=None, end=None) -> np.ndarray:
+    """Boolean mask of timestamps within [start, end); None leaves a side open"""
+    values = pd.DatetimeIndex(values)
+    mask = np.ones(len(values), dtype=bool)
+    if start is not None:
+        mask &= values >= start
+    if end is not None:
+        mask &= values < end
+    return mask
+
+def get_sla_hours():
+    """Return the resolution SLA in hours per severity"""
+    return {
+        "Critical": SLA_HOURS_CRITICAL,
+        "High": SLA_HOURS_HIGH,
+        "Medium": SLA_HOURS_MEDIUM,
+        "Low": SLA_HOURS_LOW,
+    }
+
 def get_severity_order():
     """Return severity levels in priority order"""
     return ["Critical", "High", "Medium", "Low"]
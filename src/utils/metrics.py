@@ -5,6 +5,7 @@ import pandas as pd
 import numpy as np
 import math
 from datetime import datetime
+from src.utils.helpers import get_sla_hours
 
 def calculate_kpis(df: pd.DataFrame) -> dict:
     """
@@ -111,6 +112,35 @@ def calculate_trend_comparison(df: pd.DataFrame, window: str = "W") -> dict:
         return {"current": 0, "previous": 0, "delta": 0, "delta_pct": 0}
 
 
+def calculate_backlog_trend(backlog: pd.DataFrame, days: int = 7) -> dict:
+    """
+    Compare the open backlog today vs a number of days earlier.
+    
+    Args:
+        backlog: Daily open counts (rows = dates), as from get_open_backlog
+        days: Look-back distance in days
+        
+    Returns:
+        dict: Dictionary with current, previous, delta, delta_pct, and peak
+    """
+    if backlog is None or backlog.empty:
+        return {"current": 0, "previous": 0, "delta": 0, "delta_pct": 0, "peak": 0}
+
+    total = backlog.sum(axis=1)
+    cur = int(total.iloc[-1])
+    prev = int(total.iloc[-days - 1]) if len(total) > days else 0
+    delta = cur - prev
+    delta_pct = 0 if prev == 0 else (delta / prev) * 100
+
+    return {
+        "current": cur,
+        "previous": prev,
+        "delta": delta,
+        "delta_pct": round(delta_pct, 1),
+        "peak": int(total.max()),
+    }
+
+
 def calculate_sla_compliance(df: pd.DataFrame, sla_hours: dict = None) -> dict:
     """
     Calculate SLA compliance rates by severity.
@@ -118,12 +148,13 @@ def calculate_sla_compliance(df: pd.DataFrame, sla_hours: dict = None) -> dict:
     Args:
         df: Security findings DataFrame
         sla_hours: Dictionary mapping severity to SLA hours
+            (defaults to the SLA_HOURS_* settings)
         
     Returns:
         dict: Compliance rates by severity
     """
     if sla_hours is None:
-        sla_hours = {"Critical": 24, "High": 72, "Medium": 168, "Low": 720}
+        sla_hours = get_sla_hours()
     
     if df is None or df.empty:
         return {}
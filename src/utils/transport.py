@@ -0,0 +1,111 @@
+"""
+Compact wire encodings for large callback outputs
+"""
+import base64
+import gzip
+import numpy as np
+import pandas as pd
+from flask import request
+from src.utils.logger import logger
+
+
+def _b64(array: np.ndarray) -> str:
+    """Base64 of an array's little-endian bytes"""
+    return base64.b64encode(np.ascontiguousarray(array).tobytes()).decode("ascii")
+
+
+def encode_column(series: pd.Series) -> dict:
+    """
+    Encode one column for DECODE_COLUMNAR_JS on the client
+
+    Numbers travel as base64 typed arrays, datetimes as epoch milliseconds,
+    and everything else is dictionary-encoded (distinct values + int32 codes).
+
+    Args:
+        series: Column to encode
+
+    Returns:
+        dict: {"type": ..., ...} column payload
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        millis = series.to_numpy(dtype="datetime64[ms]").astype(np.int64).astype("<f8")
+        millis[series.isna().to_numpy()] = np.nan
+        return {"type": "datetime", "data": _b64(millis)}
+    if pd.api.types.is_integer_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        values = series.to_numpy()
+        if len(values) == 0 or (values.min() >= -2**31 and values.max() < 2**31):
+            return {"type": "int32", "data": _b64(values.astype("<i4"))}
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return {"type": "float64", "data": _b64(series.to_numpy(dtype="<f8", na_value=np.nan))}
+    codes, uniques = pd.factorize(series)
+    return {"type": "dict", "values": [str(v) for v in uniques], "codes": _b64(codes.astype("<i4"))}
+
+
+def encode_columnar(df: pd.DataFrame) -> dict:
+    """
+    Column-oriented payload for a DataTable, decoded client-side to records
+
+    Args:
+        df: Rows to send
+
+    Returns:
+        dict: {"length": n_rows, "columns": {name: encoded column}}
+    """
+    return {
+        "length": len(df),
+        "columns": {col: encode_column(df[col]) for col in df.columns},
+    }
+
+
+# Client-side inverse of encode_columnar; logs decode time to the console
+DECODE_COLUMNAR_JS = """
+function(payload) {
+    if (!payload || !payload.columns) { return []; }
+    var start = performance.now();
+    var n = payload.length, rows = new Array(n), i;
+    for (i = 0; i < n; i++) { rows[i] = {}; }
+    function bytes(b64) {
+        var raw = atob(b64), out = new Uint8Array(raw.length);
+        for (var j = 0; j < raw.length; j++) { out[j] = raw.charCodeAt(j); }
+        return out.buffer;
+    }
+    Object.keys(payload.columns).forEach(function(name) {
+        var col = payload.columns[name], k;
+        if (col.type === "dict") {
+            var codes = new Int32Array(bytes(col.codes));
+            for (k = 0; k < n; k++) { rows[k][name] = codes[k] < 0 ? null : col.values[codes[k]]; }
+        } else if (col.type === "datetime") {
+            var millis = new Float64Array(bytes(col.data));
+            for (k = 0; k < n; k++) {
+                rows[k][name] = isNaN(millis[k]) ? null : new Date(millis[k]).toISOString().slice(0, 19);
+            }
+        } else {
+            var values = col.type === "int32" ? new Int32Array(bytes(col.data))
+                                              : new Float64Array(bytes(col.data));
+            for (k = 0; k < n; k++) { rows[k][name] = isNaN(values[k]) ? null : values[k]; }
+        }
+    });
+    console.debug("Decoded " + n + " table rows in " + (performance.now() - start).toFixed(1) + " ms");
+    return rows;
+}
+"""
+
+
+def register_transport_metrics(server):
+    """
+    Log the size of every Dash callback response
+
+    Sizes are taken before any response compression, with the gzip size
+    computed alongside for comparison.
+
+    Args:
+        server: The Flask server behind the Dash app
+    """
+    @server.after_request
+    def log_callback_payload(response):
+        if request.path.endswith("/_dash-update-component") and not response.direct_passthrough:
+            body = response.get_data()
+            outputs = (request.get_json(silent=True) or {}).get("output", "")
+            logger.info(f"Callback payload {outputs[:80]}: {len(body)} bytes, "
+                        f"{len(gzip.compress(body, compresslevel=6))} gzipped")
+        return response
@@ -0,0 +1,26 @@
+"""
+Shared test setup: the sample dataset, with every side file in a scratch directory
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRATCH = tempfile.mkdtemp(prefix="security-insights-tests-")
+
+# Settings are read at import time, so they are pinned before src is imported
+os.environ.setdefault("DATA_PATH", os.path.join(ROOT, "data", "security_findings_unified.csv"))
+os.environ["SQLITE_PATH"] = os.path.join(SCRATCH, "findings.sqlite")
+os.environ["PARTITION_DIR"] = os.path.join(SCRATCH, "partitions")
+os.environ["URL_STORE_DIR"] = os.path.join(SCRATCH, "urls")
+os.environ["WATCH_DATA"] = "False"
+sys.path.insert(0, ROOT)
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def df():
+    """The loaded sample dataset"""
+    from src.data.loader import load_security_data
+    return load_security_data()
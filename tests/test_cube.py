@@ -0,0 +1,56 @@
+"""
+Filter cube results against plain pandas on the sample dataset
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from src.data.cube import FILTER_DIMENSIONS, get_findings_cube
+from src.data.dedup import counted_findings
+
+SELECTIONS = [
+    {},
+    {"severity": ["Critical"]},
+    {"source": ["GHAS"], "status": ["Open", "In Progress"]},
+    {"team": ["SOC", "CloudSec"], "severity": ["High", "Low"]},
+    {"repo": ["no-such-repo"]},
+]
+
+
+def _pandas_mask(df: pd.DataFrame, selections: dict, exclude: str = None) -> np.ndarray:
+    mask = np.ones(len(df), dtype=bool)
+    for dim, values in selections.items():
+        if dim != exclude:
+            mask &= df[FILTER_DIMENSIONS[dim]].isin(values).to_numpy()
+    return mask
+
+
+@pytest.mark.parametrize("selections", SELECTIONS)
+def test_row_mask_matches_isin(df, selections):
+    np.testing.assert_array_equal(get_findings_cube().row_mask(selections),
+                                  _pandas_mask(df, selections))
+
+
+@pytest.mark.parametrize("selections", SELECTIONS)
+def test_row_mask_within_row_range(df, selections):
+    rows = slice(40, 180)
+    expected = _pandas_mask(df, selections)
+    expected[:rows.start] = expected[rows.stop:] = False
+    np.testing.assert_array_equal(get_findings_cube().row_mask(selections, rows), expected)
+
+
+@pytest.mark.parametrize("selections", SELECTIONS)
+def test_facet_counts_match_value_counts(df, selections):
+    facets = get_findings_cube().facet_counts(selections)
+    counted = counted_findings(df)
+    for dim, column in FILTER_DIMENSIONS.items():
+        # Each dropdown is counted under the other dimensions' selections only
+        rows = counted[_pandas_mask(counted, selections, exclude=dim)]
+        expected = {value: int(n) for value, n in rows[column].value_counts().items()}
+        assert facets[dim] == expected, dim
+
+
+def test_cell_counts_cover_each_correlation_group_once(df):
+    cube = get_findings_cube()
+    assert cube.cell_counts.sum() == len(counted_findings(df))
+    groups = df.loc[df["Correlation_Id"] >= 0, "Correlation_Id"]
+    assert len(df) - cube.cell_counts.sum() == len(groups) - groups.nunique()
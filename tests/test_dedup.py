@@ -0,0 +1,72 @@
+"""
+Deduplication and correlation against plain pandas
+"""
+import numpy as np
+import pandas as pd
+from config.settings import CORRELATION_WINDOW_HOURS, DATA_PATH
+from src.data.dedup import (CANONICAL_COLUMN, FINDING_KEY, canonical_rows, correlate_findings,
+                            counted_findings, deduplicate_findings, find_exact_duplicates)
+
+
+def _findings(rows: list) -> pd.DataFrame:
+    df = pd.DataFrame(rows, columns=["Source", "Repo/Account", "Category", "Opened_At", "tool_url"])
+    df["Opened_At"] = pd.to_datetime(df["Opened_At"])
+    return df
+
+
+def test_exact_duplicates_match_pandas_on_sample():
+    raw = pd.read_csv(DATA_PATH)
+    normalized = raw[FINDING_KEY].fillna("").astype(str).apply(lambda col: col.str.strip())
+    for col in FINDING_KEY[:-1]:
+        normalized[col] = normalized[col].str.lower()
+    normalized["tool_url"] = normalized["tool_url"].str.replace(r"[?#].*$", "", regex=True).str.rstrip("/")
+    expected = normalized.duplicated(keep="first") & (normalized["tool_url"] != "")
+    np.testing.assert_array_equal(find_exact_duplicates(raw), expected.to_numpy())
+
+
+def test_url_normalization_and_rows_without_url():
+    df = _findings([
+        ["GHAS", "api", "XSS", "2025-01-01", "https://x/1"],
+        ["ghas ", "API", "xss", "2025-01-02", "https://x/1/?tab=2#L3"],
+        ["GHAS", "api", "XSS", "2025-01-03", "https://x/2"],
+        ["GHAS", "api", "XSS", "2025-01-04", None],
+        ["GHAS", "api", "XSS", "2025-01-05", " "],
+    ])
+    assert find_exact_duplicates(df).tolist() == [False, True, False, False, False]
+    view, duplicates = deduplicate_findings(df, correlate=False)
+    assert duplicates.index.tolist() == [1] and (duplicates["Reason"] == "DUPLICATE").all()
+    assert len(view) == 4 and view[CANONICAL_COLUMN].all()
+
+
+def test_correlation_links_sources_within_window():
+    df = _findings([
+        ["GHAS", "api", "XSS", "2025-01-01 10:00", "https://g/1"],
+        ["AWS_Security", "API", "xss", "2025-01-01 20:00", "https://a/1"],
+        ["Custom", "api", "XSS", "2025-01-03 10:00", "https://c/1"],
+        ["GHAS", "api", "SQLi", "2025-01-01 11:00", "https://g/2"],
+        ["GHAS", "web", "XSS", "2025-01-01 09:00", "https://g/3"],
+    ])
+    group = correlate_findings(df, window_hours=24)
+    assert group[0] == group[1] >= 0
+    assert (group[2:] == -1).all()
+    assert canonical_rows(df, group).tolist() == [True, False, True, True, True]
+
+
+def test_sample_groups_against_pandas(df):
+    linked = df[df["Correlation_Id"] >= 0]
+    groups = linked.groupby("Correlation_Id")
+    window = pd.Timedelta(hours=CORRELATION_WINDOW_HOURS)
+
+    assert (groups.size() > 1).all()
+    # One finding per source, one repo/account and category, within the window
+    assert (groups["Source"].nunique() == groups.size()).all()
+    assert (groups["Repo/Account"].agg(lambda s: s.str.strip().str.lower().nunique()) == 1).all()
+    assert (groups["Category"].agg(lambda s: s.str.strip().str.lower().nunique()) == 1).all()
+    assert ((groups["Opened_At"].max() - groups["Opened_At"].min()) <= window).all()
+
+    # The canonical member is the earliest opened, the first in row order on ties
+    earliest = linked.sort_values(["Opened_At"], kind="stable").groupby("Correlation_Id").head(1).index
+    expected = df["Correlation_Id"] < 0
+    expected[earliest] = True
+    np.testing.assert_array_equal(df[CANONICAL_COLUMN].to_numpy(), expected.to_numpy())
+    assert len(counted_findings(df)) == len(df) - len(linked) + groups.ngroups
@@ -0,0 +1,101 @@
+"""
+LTTB selection and columnar table encoding
+"""
+import base64
+import math
+import numpy as np
+import pandas as pd
+import pytest
+from config.settings import DATA_PATH
+from src.data.downsampling import lttb_indices
+from src.data.loader import get_tool_urls
+from src.utils.transport import encode_columnar
+
+
+def _lttb_reference(x: list, y: list, n_out: int) -> list:
+    """Textbook LTTB: buckets of (n - 2) / (n_out - 2) points between the end points"""
+    n = len(x)
+    every = (n - 2) / (n_out - 2)
+    selected, prev = [0], 0
+    for i in range(n_out - 2):
+        start, end = int(i * every) + 1, int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = sum(x[end:next_end]) / (next_end - end)
+        avg_y = sum(y[end:next_end]) / (next_end - end)
+        areas = [abs((x[prev] - avg_x) * (y[j] - y[prev]) - (x[prev] - x[j]) * (avg_y - y[prev]))
+                 for j in range(start, end)]
+        prev = start + areas.index(max(areas))
+        selected.append(prev)
+    return selected + [n - 1]
+
+
+@pytest.mark.parametrize("n, n_out", [(10, 3), (100, 7), (1000, 100), (1001, 333), (5000, 4999)])
+def test_lttb_matches_reference(n, n_out):
+    rng = np.random.default_rng(n)
+    x = np.sort(rng.uniform(0, 1e6, n))
+    y = rng.normal(size=n).cumsum()
+    selected = lttb_indices(x, y, n_out)
+    assert selected.tolist() == _lttb_reference(x.tolist(), y.tolist(), n_out)
+    assert len(selected) == n_out and (np.diff(selected) > 0).all()
+
+
+@pytest.mark.parametrize("n_out", [0, 2, 50, 60])
+def test_lttb_keeps_everything_when_nothing_to_drop(n_out):
+    x = np.arange(50.0)
+    assert lttb_indices(x, x, n_out).tolist() == list(range(50))
+
+
+def _decode(payload: dict) -> pd.DataFrame:
+    """Python mirror of DECODE_COLUMNAR_JS"""
+    columns = {}
+    for name, col in payload["columns"].items():
+        if col["type"] == "dict":
+            codes = np.frombuffer(base64.b64decode(col["codes"]), dtype="<i4")
+            columns[name] = [None if c < 0 else col["values"][c] for c in codes]
+        else:
+            dtype = "<i4" if col["type"] == "int32" else "<f8"
+            values = np.frombuffer(base64.b64decode(col["data"]), dtype=dtype)
+            if col["type"] == "datetime":
+                values = [None if math.isnan(v) else pd.Timestamp(int(v), unit="ms") for v in values]
+            columns[name] = list(values)
+    assert all(len(values) == payload["length"] for values in columns.values())
+    return pd.DataFrame(columns)
+
+
+def test_columnar_round_trip():
+    df = pd.DataFrame({
+        "Severity": ["High", None, "Low", "High"],
+        "Opened_At": pd.to_datetime(["2025-01-01 10:00:00.123", None, "2025-03-01 00:00:00.000", "2025-04-01 00:00:00.000"]),
+        "MTTR_Hours": [1.5, np.nan, 3.0, 4.25],
+        "Count": [1, -2, 2**31 - 1, 0],
+        "Big": [0, 1, 2**40, 3],
+    })
+    payload = encode_columnar(df)
+    assert payload["columns"]["Count"]["type"] == "int32"
+    assert payload["columns"]["Big"]["type"] == "float64"
+    decoded = _decode(payload)
+    assert decoded["Severity"].isna().tolist() == [False, True, False, False]
+    assert decoded["Severity"].dropna().tolist() == ["High", "Low", "High"]
+    assert decoded["Opened_At"].tolist()[0] == df["Opened_At"][0]
+    assert decoded["Opened_At"].isna().tolist() == [False, True, False, False]
+    np.testing.assert_array_equal(decoded["MTTR_Hours"], df["MTTR_Hours"])
+    assert decoded["Count"].tolist() == df["Count"].tolist()
+    assert decoded["Big"].tolist() == df["Big"].tolist()
+
+
+def test_table_row_ids_point_back_at_their_findings(df):
+    # A drill-down subset, as create_findings_table encodes it
+    subset = df[(df["Severity"] == "High") & df["Status"].isin(["Open", "In Progress"])].iloc[::-1]
+    columns = ["Source", "Category", "Repo/Account", "Opened_At"]
+    decoded = _decode(encode_columnar(subset[columns].assign(Row_Id=subset.index)))
+    assert decoded["Row_Id"].tolist() == subset.index.tolist()
+    for col in columns:
+        assert decoded[col].tolist() == df.loc[decoded["Row_Id"], col].tolist(), col
+
+    # Links resolve through the row ids to the same URLs as a contiguous read
+    everything = get_tool_urls(np.arange(len(df)), ascending=True)
+    assert get_tool_urls(decoded["Row_Id"].tolist()) == [everything[i] for i in decoded["Row_Id"]]
+    raw = pd.read_csv(DATA_PATH)
+    urls = set(zip(raw["Source"], raw["Repo/Account"], raw["tool_url"]))
+    assert all((df.at[i, "Source"], df.at[i, "Repo/Account"], everything[i]) in urls
+               for i in decoded["Row_Id"])
@@ -0,0 +1,59 @@
+"""
+Search index results against a brute-force scan of the sample dataset
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from src.data.loader import get_tool_urls
+from src.data.search import SEARCH_COLUMNS, SearchIndex, build_search_index, tokenize
+
+QUERIES = ["s3", "bucket", "soc", "github com", "aws_security", "ghas 17", "no-such-token", "", "  "]
+
+
+@pytest.fixture(scope="module")
+def urls(df):
+    return pd.Series(get_tool_urls(np.arange(len(df)), ascending=True))
+
+
+def _brute_force(df: pd.DataFrame, urls: pd.Series, query: str, mask=None) -> np.ndarray:
+    """Rows whose tokens start with every query token, best exact-match count first"""
+    tokens = list(dict.fromkeys(tokenize(query)))
+    if not tokens:
+        return np.array([], dtype=np.int64)
+    hits, scores = [], []
+    for row in range(len(df)):
+        if mask is not None and not mask[row]:
+            continue
+        words = set()
+        for value in [df[col].iloc[row] for col in SEARCH_COLUMNS] + [urls.iloc[row]]:
+            if not pd.isna(value):
+                words.update(tokenize(str(value)))
+        if all(any(word.startswith(token) for word in words) for token in tokens):
+            hits.append(row)
+            scores.append(sum(token in words for token in tokens))
+    order = sorted(range(len(hits)), key=lambda i: (-scores[i], -hits[i]))
+    return np.array([hits[i] for i in order], dtype=np.int64)
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_search_matches_brute_force(df, urls, query):
+    index = build_search_index(df, urls)
+    np.testing.assert_array_equal(index.search(query), _brute_force(df, urls, query))
+
+
+@pytest.mark.parametrize("query", ["s3", "soc"])
+def test_search_within_mask(df, urls, query):
+    mask = (df["Severity"] == "High").to_numpy()
+    index = build_search_index(df, urls)
+    np.testing.assert_array_equal(index.search(query, mask=mask),
+                                  _brute_force(df, urls, query, mask))
+
+
+def test_segments_match_a_single_build(df, urls):
+    whole = build_search_index(df, urls)
+    # Appended batches, with a merge forced along the way
+    batched = SearchIndex(max_segments=2)
+    for start in range(0, len(df), 60):
+        batched.add(df.iloc[start:start + 60], urls.iloc[start:start + 60])
+    for query in QUERIES:
+        np.testing.assert_array_equal(batched.search(query), whole.search(query))
@@ -0,0 +1,68 @@
+"""
+SLA engine results against plain pandas on the sample dataset
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from src.data.backlog import OPEN_STATUSES
+from src.data.dedup import CANONICAL_COLUMN
+from src.data.sla import SLAEngine
+from src.utils.helpers import get_sla_hours
+
+NOW = [pd.Timestamp("2025-09-01"), pd.Timestamp("2025-10-15 12:00"), pd.Timestamp("2026-06-01")]
+HORIZONS = [0, 24, 24 * 30]
+
+
+def _open_findings(df: pd.DataFrame) -> pd.DataFrame:
+    """Open canonical findings with their deadline, earliest first"""
+    hours = df["Severity"].map(get_sla_hours())
+    tracked = df[df["Status"].isin(OPEN_STATUSES) & hours.notna() & df["Opened_At"].notna()
+                 & df[CANONICAL_COLUMN]]
+    deadline = tracked["Opened_At"] + pd.to_timedelta(hours[tracked.index], unit="h")
+    return tracked.assign(Deadline=deadline).sort_values("Deadline", kind="stable")
+
+
+@pytest.fixture(scope="module")
+def engine(df):
+    return SLAEngine(df)
+
+
+@pytest.mark.parametrize("now", NOW)
+@pytest.mark.parametrize("horizon", HORIZONS)
+@pytest.mark.parametrize("severity", [None, "High"])
+def test_summary_matches_pandas(df, engine, now, horizon, severity):
+    mask = None if severity is None else (df["Severity"] == severity).to_numpy()
+    tracked = _open_findings(df if mask is None else df[mask])
+    breached = tracked["Deadline"] <= now
+    due = ~breached & (tracked["Deadline"] <= now + pd.Timedelta(hours=horizon))
+    assert engine.summary(mask, horizon, now) == {
+        "open": len(tracked), "breached": int(breached.sum()), "due_soon": int(due.sum()),
+    }
+
+
+@pytest.mark.parametrize("now", NOW)
+@pytest.mark.parametrize("k", [1, 5, 50])
+def test_breaching_within_matches_pandas(df, engine, now, k):
+    tracked = _open_findings(df)
+    due = tracked[(tracked["Deadline"] > now) & (tracked["Deadline"] <= now + pd.Timedelta(days=30))]
+    top = engine.breaching_within(24 * 30, k, now=now)
+    assert top.index.tolist() == due.index[:k].tolist()
+    expected = ((due["Deadline"][:k] - now) / pd.Timedelta(hours=1)).round(1)
+    np.testing.assert_allclose(top["Hours_Remaining"].to_numpy(), expected.to_numpy())
+
+
+def test_merged_engine_matches_fresh_build(df, engine):
+    reloaded = df.copy()
+    # Close some findings, reopen others and move a few deadlines
+    reloaded.loc[reloaded.index[::7], "Status"] = "Closed"
+    reloaded.loc[reloaded.index[3::11], "Status"] = "Open"
+    reloaded.loc[reloaded.index[5::13], "Severity"] = "Critical"
+    merged, fresh = SLAEngine(reloaded, previous=engine), SLAEngine(reloaded)
+    assert len(merged) == len(fresh)
+    for now in NOW:
+        for horizon in HORIZONS:
+            assert merged.summary(None, horizon, now) == fresh.summary(None, horizon, now)
+        top = merged.breaching_within(24 * 365, 500, now=now)
+        # Equal deadlines may come in any order after a merge
+        assert sorted(top.index) == sorted(fresh.breaching_within(24 * 365, 500, now=now).index)
+        assert top["Hours_Remaining"].is_monotonic_increasing
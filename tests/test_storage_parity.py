@@ -0,0 +1,84 @@
+"""
+Parity of the SQLite and partitioned backends with the in-memory pandas backend
+
+Every query runs on the same dataset through each backend; results must
+match PandasBackend up to row order and dtypes the store cannot keep.
+"""
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from src.data.aggregations import AGGREGATIONS
+from src.data.cube import get_findings_cube
+from src.data.loader import get_time_window
+from src.data.partitions import get_partition_store
+from src.data.storage import PandasBackend, PartitionedBackend, SQLiteBackend
+
+SELECTIONS = [
+    {},
+    {"severity": ["Critical", "High"]},
+    {"source": ["GHAS"], "status": ["Open", "In Progress"]},
+    {"team": ["SOC"], "severity": ["Low"], "repo": ["no-such-repo"]},
+]
+WINDOWS = [(None, None), ("2025-09-01", "2025-10-15"), ("2025-10-01", None)]
+GROUPINGS = ["Severity", "Source", ["Category", "Severity"], "Repo/Account"]
+
+
+@pytest.fixture(scope="module")
+def pandas_backend(df):
+    return PandasBackend(df, get_findings_cube())
+
+
+@pytest.fixture(scope="module", params=["sqlite", "partitioned"])
+def backend(request, df, tmp_path_factory):
+    if request.param == "sqlite":
+        path = os.path.join(tmp_path_factory.mktemp("sqlite"), "findings.sqlite")
+        return SQLiteBackend.build(df, path)
+    return PartitionedBackend(get_partition_store())
+
+
+def _rows(df, window):
+    start, end = window
+    return get_time_window(df, start, end) if start or end else None
+
+
+def _sorted(frame: pd.DataFrame) -> pd.DataFrame:
+    return frame.sort_index().reset_index(drop=True)
+
+
+@pytest.mark.parametrize("selections", SELECTIONS)
+@pytest.mark.parametrize("window", WINDOWS)
+@pytest.mark.parametrize("counted", [False, True])
+def test_filter_matches_pandas(df, pandas_backend, backend, selections, window, counted):
+    columns = ["Source", "Severity", "Status", "Assigned_Team", "Opened_At", "MTTR_Hours"]
+    rows = _rows(df, window)
+    expected = pandas_backend.filter(selections, columns, rows, counted=counted)
+    actual = backend.filter(selections, columns, rows, counted=counted)
+    assert actual.index.sort_values().tolist() == expected.index.sort_values().tolist()
+    pd.testing.assert_frame_equal(_sorted(actual.astype(expected.dtypes.to_dict())),
+                                  _sorted(expected), check_index_type=False)
+
+
+@pytest.mark.parametrize("selections", SELECTIONS)
+@pytest.mark.parametrize("window", WINDOWS)
+@pytest.mark.parametrize("column", GROUPINGS)
+def test_count_by_matches_pandas(df, pandas_backend, backend, selections, window, column):
+    rows = _rows(df, window)
+    expected = pandas_backend.count_by(column, selections, rows).sort_index()
+    actual = backend.count_by(column, selections, rows).sort_index()
+    assert actual.to_dict() == expected.to_dict()
+
+
+@pytest.mark.parametrize("agg", list(AGGREGATIONS))
+@pytest.mark.parametrize("selections", SELECTIONS[:3])
+@pytest.mark.parametrize("color_col", [None, "Severity"])
+def test_aggregate_matches_pandas(df, pandas_backend, backend, agg, selections, color_col):
+    rows = _rows(df, WINDOWS[1])
+    expected = pandas_backend.aggregate("Source", "MTTR_Hours", agg, selections, color_col, rows)
+    actual = backend.aggregate("Source", "MTTR_Hours", agg, selections, color_col, rows)
+    keys = ["Source"] + ([color_col] if color_col else [])
+    expected = expected.sort_values(keys).reset_index(drop=True)
+    actual = actual.sort_values(keys).reset_index(drop=True)
+    assert actual[keys].astype(str).equals(expected[keys].astype(str))
+    np.testing.assert_allclose(actual["MTTR_Hours"].to_numpy(dtype=float),
+                               expected["MTTR_Hours"].to_numpy(dtype=float), rtol=1e-9)